@@ -1,10 +1,31 @@
 import os
+import time
 
 import streamlit as st
 
+from socialstream.admission import admission_controller
 from socialstream.chat import chat_demo_omniscient, chat_demo_simple
-from socialstream.rendering import chat_demo, rendering_demo
-from socialstream.utils import initialize_session_state, reset_database
+from socialstream.memory_accounting import (
+    ADMIN_VIEW,
+    render_memory_panel,
+    sample_session_memory,
+)
+from socialstream.metrics import rerun_duration, start_metrics_server
+from socialstream.profiler import (
+    PROFILE_BY_DEFAULT,
+    begin_rerun,
+    end_rerun,
+    render_profiler_panel,
+    span,
+)
+from socialstream.rendering import chat_demo, leaderboard_demo, rendering_demo
+from socialstream.reward_analytics import reward_analytics
+from socialstream.session_lifecycle import session_registry
+from socialstream.utils import (
+    get_admission_id,
+    initialize_session_state,
+    reset_database,
+)
 
 
 def update_database_callback() -> None:
@@ -14,6 +35,7 @@ def update_database_callback() -> None:
     )
     try:
         reset_database(updated_url)
+        reward_analytics.invalidate()
     except Exception as e:
         st.error(f"Error occurred while updating database: {e}, please try again.")
 
@@ -24,6 +46,10 @@ def update_database_callback() -> None:
 
 
 st.set_page_config(page_title="SocialStream_Demo", page_icon="🧊", layout="wide")
+rerun_start = time.perf_counter()
+begin_rerun(st.session_state.get("profiling", PROFILE_BY_DEFAULT))
+start_metrics_server()
+session_registry.heartbeat(create=True)
 st.markdown(
     """
     <style>
@@ -36,6 +62,7 @@ st.markdown(
 
 DISPLAY_MODE = "Display Episodes"
 DISPLAY_STREAM_MODE = "Display Live Chat Stream"
+LEADERBOARD_MODE = "Reward Leaderboard"
 CHAT_SIMPLE_MODE = "Simple Chat"
 CHAT_OMNISCIENT_MODE = "Omniscient Chat & Editable Scenario"
 
@@ -69,23 +96,44 @@ new_database_url = st.sidebar.text_input(
 
 option = st.sidebar.radio(
     "Function",
-    (DISPLAY_MODE, DISPLAY_STREAM_MODE, CHAT_SIMPLE_MODE, CHAT_OMNISCIENT_MODE),
+    (
+        DISPLAY_MODE,
+        DISPLAY_STREAM_MODE,
+        LEADERBOARD_MODE,
+        CHAT_SIMPLE_MODE,
+        CHAT_OMNISCIENT_MODE,
+    ),
 )
 if option != st.session_state.get("mode", None):
     # when switching between modes, reset the active agent
     if "active" in st.session_state:
         del st.session_state["active"]
-
-if option == DISPLAY_MODE:
-    st.session_state.mode = DISPLAY_MODE
-    rendering_demo()
-elif option == CHAT_SIMPLE_MODE:
-    st.session_state.editable = False
-    st.session_state.mode = CHAT_SIMPLE_MODE
-    chat_demo_simple()
-elif option == CHAT_OMNISCIENT_MODE:
-    st.session_state.mode = CHAT_OMNISCIENT_MODE
-    chat_demo_omniscient()
-elif option == DISPLAY_STREAM_MODE:
-    st.session_state.mode = DISPLAY_STREAM_MODE
-    chat_demo()
+    admission_controller.release(get_admission_id())
+
+try:
+    if option == DISPLAY_MODE:
+        st.session_state.mode = DISPLAY_MODE
+        rendering_demo()
+    elif option == CHAT_SIMPLE_MODE:
+        st.session_state.editable = False
+        st.session_state.mode = CHAT_SIMPLE_MODE
+        chat_demo_simple()
+    elif option == CHAT_OMNISCIENT_MODE:
+        st.session_state.mode = CHAT_OMNISCIENT_MODE
+        chat_demo_omniscient()
+    elif option == DISPLAY_STREAM_MODE:
+        st.session_state.mode = DISPLAY_STREAM_MODE
+        chat_demo()
+    elif option == LEADERBOARD_MODE:
+        st.session_state.mode = LEADERBOARD_MODE
+        leaderboard_demo()
+finally:
+    # chat turns end in st.rerun(), which raises, so record those reruns too
+    with span("memory.sample"):
+        sample_session_memory()
+    rerun_duration.observe(time.perf_counter() - rerun_start, mode=option)
+    trace = end_rerun()
+if st.sidebar.checkbox("Profile reruns", value=PROFILE_BY_DEFAULT, key="profiling"):
+    render_profiler_panel(trace)
+if ADMIN_VIEW and st.sidebar.checkbox("Memory usage", key="memory_panel"):
+    render_memory_panel()
@@ -0,0 +1,76 @@
+import json
+import math
+import os
+import sys
+from typing import Iterable, Mapping
+
+Results = dict[str, dict[str, float]]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of `values` for `q` in [0, 100]."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def load_baseline(path: str) -> Results:
+    """Read a saved baseline, exiting non-zero when there is none to gate on."""
+    if not os.path.exists(path):
+        sys.exit(f"No baseline at {path}; run with --save-baseline first to record one")
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Results) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Saved baseline to {path}")
+
+
+def compare_to_baseline(
+    results: Results,
+    baseline: Results,
+    tolerance: float,
+    higher_is_better: Iterable[str] = (),
+    min_change: Mapping[str, float] = {},
+) -> list[str]:
+    """Return one message per metric that is worse than its baseline by more than `tolerance`.
+
+    Metrics are lower-is-better unless listed in `higher_is_better`; cases or
+    metrics missing from the baseline are skipped. A metric listed in
+    `min_change` is only reported when it also moved by more than that amount,
+    so that metrics whose baseline is close to 0 do not fail on noise.
+    """
+    higher_is_better = set(higher_is_better)
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(case, {}).get(metric)
+            if reference is None or not reference or math.isnan(value):
+                continue
+            if abs(value - reference) <= min_change.get(metric, 0.0):
+                continue
+            change = (value - reference) / abs(reference)
+            if metric in higher_is_better:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"{case} {metric}: {value:.4g} vs baseline {reference:.4g} ({change:+.0%})"
+                )
+    return regressions
+
+
+def print_table(results: Results) -> None:
+    metrics = sorted({metric for values in results.values() for metric in values})
+    width = max([len(case) for case in results] + [4])
+    print("case".ljust(width), *(metric.rjust(14) for metric in metrics))
+    for case, values in results.items():
+        print(
+            case.ljust(width),
+            *(f"{values.get(metric, math.nan):14.4g}" for metric in metrics),
+        )
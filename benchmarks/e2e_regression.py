@@ -0,0 +1,340 @@
+"""End-to-end performance regression suite for the Streamlit app.
+
+Runs `app.py` headlessly with Streamlit's `AppTest`, against an in-memory
+Redis stand-in and a zero-latency fake model (see `benchmarks/fakes.py`), so
+only the app's own work is measured:
+
+    cold_start           first script run in a fresh process (median of 3)
+    init,profiles=N      `initialize_session_state` for the first and the next session
+    turns,mode=M         script time of one human turn (plus the model's reply)
+                         at turns 5, 20 and 50 of a conversation
+    viewer               episode viewer: first load and switching episodes
+
+    python -m benchmarks.e2e_regression
+    python -m benchmarks.e2e_regression --save-baseline  # after an intentional change
+
+Exits non-zero when a metric is worse than the saved baseline by more than
+`--tolerance`. Script times come from the `socialstream_rerun_duration_seconds`
+histogram and phase times from the rerun profiler, so harness overhead is not
+counted.
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from benchmarks.baseline import (
+    Results,
+    compare_to_baseline,
+    load_baseline,
+    print_table,
+    save_baseline,
+)
+from benchmarks.fakes import InMemoryRedis, fake_backend
+from benchmarks.synthetic import (
+    make_agents,
+    make_combos,
+    make_environments,
+    make_episode,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(__file__), "baselines", "e2e_regression.json"
+)
+# keep in sync with app.py
+CHAT_SIMPLE_MODE = "Simple Chat"
+CHAT_OMNISCIENT_MODE = "Omniscient Chat & Editable Scenario"
+TURN_CHECKPOINTS = (5, 20, 50)
+
+
+def seed(
+    redis: InMemoryRedis,
+    profiles: int,
+    episodes: int = 20,
+    turns: int = 20,
+) -> None:
+    """`profiles` agents, one environment (and combo) per ten agents, and
+    `episodes` episodes of the first environment."""
+    redis.clear()
+    agents = make_agents(profiles)
+    environments = make_environments(max(profiles // 10, 2))
+    redis.add(agents)
+    redis.add(environments)
+    redis.add(make_combos(environments, agents))
+    redis.add(
+        make_episode(
+            f"episode-{idx:06d}",
+            environments[0],
+            [agents[2 * idx % len(agents)], agents[(2 * idx + 1) % len(agents)]],
+            turns=turns,
+            seed=idx,
+        )
+        for idx in range(episodes)
+    )
+    _invalidate_caches()
+
+
+def _invalidate_caches() -> None:
+    from socialstream.evaluation import evaluation_cache
+    from socialstream.profile_resolver import profile_resolver
+    from socialstream.reward_analytics import reward_analytics
+
+    evaluation_cache.invalidate()
+    profile_resolver.invalidate()
+    reward_analytics.invalidate()
+
+
+def _script_seconds() -> float:
+    """Total script time observed so far, over all modes."""
+    from socialstream.metrics import rerun_duration
+
+    return sum(cells[-1] for cells in rerun_duration.values().values())
+
+
+def _script_runs() -> int:
+    """Number of script runs observed so far, including those ended by `st.rerun`."""
+    from socialstream.metrics import rerun_duration
+
+    return int(sum(sum(cells[:-1]) for cells in rerun_duration.values().values()))
+
+
+class PhaseRecorder:
+    """Sums profiler phase durations of every script run since `reset()`."""
+
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.totals = {}
+
+    @contextmanager
+    def install(self) -> Iterator["PhaseRecorder"]:
+        from unittest import mock
+
+        from socialstream import profiler
+
+        end_rerun = profiler.end_rerun
+
+        def recording_end_rerun() -> Any:
+            trace = end_rerun()
+            if trace is not None:
+                for record in trace.spans:
+                    self.totals[record.name] = (
+                        self.totals.get(record.name, 0.0) + record.duration
+                    )
+            return trace
+
+        # app.py imports these names on every run, so patching the module is enough
+        with (
+            mock.patch.object(profiler, "PROFILE_BY_DEFAULT", True),
+            mock.patch.object(profiler, "end_rerun", recording_end_rerun),
+        ):
+            yield self
+
+
+def new_app() -> Any:
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(APP_PATH, default_timeout=300)
+
+
+def run(app: Any) -> float:
+    """Run the script (and any `st.rerun`s it triggers); returns script seconds."""
+    # garbage left by earlier runs would otherwise be collected at a random point
+    gc.collect()
+    before = _script_seconds()
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"app raised: {app.exception[0].message}")
+    return _script_seconds() - before
+
+
+def _widget(widgets: Any, label: str) -> Any:
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+def select_mode(app: Any, mode: str) -> float:
+    _widget(app.sidebar.radio, "Function").set_value(mode)
+    return run(app)
+
+
+def measure_cold_start(profiles: int, runs: int = 3) -> dict[str, float]:
+    """Time first runs in child processes, so nothing is imported or cached yet.
+
+    A single cold start varies by more than the tolerance, so the median of
+    `runs` is reported.
+    """
+    samples: dict[str, list[float]] = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.e2e_regression",
+                "--child-cold-start",
+                str(profiles),
+            ],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        process = time.perf_counter() - start
+        child = json.loads(output.strip().splitlines()[-1])
+        for metric, value in {"process_ms": process * 1000, **child}.items():
+            samples.setdefault(metric, []).append(value)
+    return {metric: statistics.median(values) for metric, values in samples.items()}
+
+
+def _child_cold_start(profiles: int) -> None:
+    redis = InMemoryRedis()
+    with fake_backend(redis):
+        seed(redis, profiles)
+        start = time.perf_counter()
+        app = new_app()
+        run(app)
+        first_run = time.perf_counter() - start
+    print(json.dumps({"first_run_ms": first_run * 1000}))
+
+
+def measure_init(redis: InMemoryRedis, profiles: int) -> dict[str, float]:
+    seed(redis, profiles)
+    results = {}
+    with PhaseRecorder().install() as recorder:
+        for session in ("first", "next"):
+            recorder.reset()
+            run(new_app())
+            init = recorder.totals.get("initialize_session_state", float("nan"))
+            results[f"{session}_session_ms"] = init * 1000
+    return results
+
+
+def measure_turns(
+    redis: InMemoryRedis, mode: str, checkpoints: tuple[int, ...]
+) -> dict[str, float]:
+    """Play human vs. model; a turn is one human message plus the model's reply."""
+    from socialstream.utils import DEFAULT_MODEL, HUMAN_MODEL_NAME, ActionState
+
+    seed(redis, profiles=100)
+    app = new_app()
+    run(app)
+    select_mode(app, mode)
+    app.session_state["human_agent_selection"] = "Agent 1"
+    app.session_state["agent_models"] = [HUMAN_MODEL_NAME, DEFAULT_MODEL]
+    if mode == CHAT_OMNISCIENT_MODE:
+        app.selectbox(key="agent1_model_choice").select(HUMAN_MODEL_NAME)
+    run(app)
+    _widget(app.button, "Start").click()
+    run(app)
+    if app.session_state["state"] != ActionState.AGENT1_WAITING:
+        raise RuntimeError(
+            f"Start did not begin the episode (state {app.session_state['state']})"
+        )
+
+    durations = []
+    for turn in range(1, max(checkpoints) + 1):
+        app.text_input(key="user_input").input(f"message number {turn}")
+        _widget(app.button, "Submit").click()
+        runs = _script_runs()
+        durations.append(run(app))
+        # the human's step and the model's reply each end in st.rerun()
+        if _script_runs() - runs < 2:
+            raise RuntimeError("the reruns of a turn were not recorded")
+    results = {}
+    for checkpoint in checkpoints:
+        # median of the last five turns up to the checkpoint
+        window = durations[max(checkpoint - 5, 0) : checkpoint]
+        results[f"turn{checkpoint}_ms"] = statistics.median(window) * 1000
+    return results
+
+
+def measure_viewer(redis: InMemoryRedis, episodes: int, turns: int) -> dict[str, float]:
+    seed(redis, profiles=100, episodes=episodes, turns=turns)
+    app = new_app()
+    first_load = run(app)
+    switches = []
+    for index in range(1, min(episodes, 6)):
+        _widget(
+            app.sidebar.number_input, "Specify the index of the episode to display:"
+        ).set_value(index)
+        switches.append(run(app))
+    return {
+        "first_load_ms": first_load * 1000,
+        "switch_episode_ms": statistics.median(switches) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--profiles", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["simple", "omniscient"],
+        choices=["simple", "omniscient"],
+    )
+    parser.add_argument("--turns", type=int, nargs="+", default=list(TURN_CHECKPOINTS))
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--episode-turns", type=int, default=20)
+    parser.add_argument(
+        "--round-trip-ms",
+        type=float,
+        default=0.0,
+        help="simulated Redis latency per command or pipeline",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    # whole reruns vary more between runs than the micro-benchmarks do
+    parser.add_argument("--tolerance", type=float, default=0.4)
+    parser.add_argument("--child-cold-start", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_cold_start is not None:
+        _child_cold_start(args.child_cold_start)
+        return
+
+    # fail before the (long) run when there is nothing to compare against
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    results: Results = {}
+    print("running cold_start ...")
+    results["cold_start"] = measure_cold_start(args.profiles[0])
+
+    redis = InMemoryRedis(round_trip_s=args.round_trip_ms / 1000)
+    with fake_backend(redis, max_turns=2 * max(args.turns) + 10):
+        for profiles in args.profiles:
+            case = f"init,profiles={profiles}"
+            print(f"running {case} ...")
+            results[case] = measure_init(redis, profiles)
+        modes = {"simple": CHAT_SIMPLE_MODE, "omniscient": CHAT_OMNISCIENT_MODE}
+        for mode in args.modes:
+            case = f"turns,mode={mode}"
+            print(f"running {case} ...")
+            results[case] = measure_turns(redis, modes[mode], tuple(args.turns))
+        print("running viewer ...")
+        results["viewer"] = measure_viewer(redis, args.episodes, args.episode_turns)
+
+    print_table(results)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""In-memory stand-ins for Redis and the LLM, for running the app headlessly.
+
+`fake_backend()` patches the sotopia models so that `find()`, `get()`,
+`all_pks()` and `db()` (pipelined `JSON.GET`, `SCAN`) are served from an
+`InMemoryRedis`, and replaces model calls with a zero-latency fake:
+`LLMAgent.aact` answers immediately and the terminal LLM evaluator returns no
+scores. Records are stored as JSON dicts and parsed into fresh model instances
+on every read, like redis-om does, so deserialization still shows up in the
+measurements; `round_trip_s` adds a fixed delay per command or pipeline.
+"""
+
+import fnmatch
+import json
+import time
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from typing import Any, Iterable, Iterator, Optional
+from unittest import mock
+
+from redis_om.model.model import NotFoundError
+from sotopia.agents import LLMAgent
+from sotopia.database import (
+    AgentProfile,
+    EnvAgentComboStorage,
+    EnvironmentProfile,
+    EpisodeLog,
+)
+from sotopia.envs.evaluators import ReachGoalLLMEvaluator, RuleBasedTerminatedEvaluator
+from sotopia.messages import AgentAction, Observation
+
+MODELS = (AgentProfile, EnvironmentProfile, EnvAgentComboStorage, EpisodeLog)
+
+
+class InMemoryRedis:
+    """The subset of a redis-py client (with RedisJSON) the app uses."""
+
+    def __init__(self, round_trip_s: float = 0.0) -> None:
+        self.round_trip_s = round_trip_s
+        self.documents: dict[str, dict[str, Any]] = {}
+        # model -> {pk: key}, in insertion order like an index scan
+        self.keys_by_model: dict[type, dict[str, str]] = {model: {} for model in MODELS}
+
+    def add(self, instances: Iterable[Any]) -> None:
+        for instance in instances:
+            model = type(instance)
+            key = model.make_primary_key(instance.pk)
+            self.documents[key] = json.loads(instance.json())
+            self.keys_by_model.setdefault(model, {})[instance.pk] = key
+
+    def clear(self) -> None:
+        self.documents.clear()
+        for keys in self.keys_by_model.values():
+            keys.clear()
+
+    def _wait(self) -> None:
+        if self.round_trip_s:
+            time.sleep(self.round_trip_s)
+
+    def json_get(self, key: str, *paths: str) -> Any:
+        document = self.documents.get(key)
+        if document is None:
+            return None
+        if not paths:
+            return json.loads(json.dumps(document))
+        # only `$.field` paths; results are one-element lists like JSONPath
+        values = {path: [document.get(path.removeprefix("$."))] for path in paths}
+        return values[paths[0]] if len(paths) == 1 else values
+
+    def execute_command(self, *args: Any) -> Any:
+        # redis-om probes `COMMAND INFO json.set` when a JsonModel is created
+        if [str(arg).lower() for arg in args[:2]] == ["command", "info"]:
+            return [[name] for name in args[2:]]
+        raise NotImplementedError(f"Unsupported command: {args}")
+
+    def hkeys(self, key: str) -> list[str]:
+        # content hashes of import_profiles, which the benchmarks do not run
+        self._wait()
+        return []
+
+    def json(self) -> "_JsonCommands":
+        return _JsonCommands(self, None)
+
+    def pipeline(self, transaction: bool = True) -> "_Pipeline":
+        return _Pipeline(self)
+
+    def scan(
+        self,
+        cursor: int = 0,
+        match: Optional[str] = None,
+        count: Optional[int] = None,
+        _type: Optional[str] = None,
+    ) -> tuple[int, list[str]]:
+        self._wait()
+        keys = list(self.documents)
+        if match:
+            keys = [key for key in keys if fnmatch.fnmatchcase(key, match)]
+        count = count or 10
+        batch = keys[cursor : cursor + count]
+        next_cursor = cursor + count
+        return (next_cursor if next_cursor < len(keys) else 0), batch
+
+
+class _Pipeline:
+    def __init__(self, redis: InMemoryRedis) -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...]]] = []
+
+    def json(self) -> "_JsonCommands":
+        return _JsonCommands(self.redis, self)
+
+    def execute(self) -> list[Any]:
+        self.redis._wait()
+        results = [self.redis.json_get(*args) for _, args in self.commands]
+        self.commands = []
+        return results
+
+
+class _JsonCommands:
+    def __init__(self, redis: InMemoryRedis, pipeline: Optional[_Pipeline]) -> None:
+        self.redis = redis
+        self.pipeline = pipeline
+
+    def get(self, key: str, *paths: str) -> Any:
+        if self.pipeline is not None:
+            self.pipeline.commands.append(("JSON.GET", (key, *paths)))
+            return self.pipeline
+        self.redis._wait()
+        return self.redis.json_get(key, *paths)
+
+
+def _matches(expression: Any, document: dict[str, Any]) -> bool:
+    # supports `Model.field == value`, the only query form the app uses
+    # the field is a pydantic v1 ModelField (`name`) or a v2 FieldInfo (`alias`)
+    field = getattr(expression.left, "name", None) or getattr(
+        expression.left, "alias", None
+    )
+    if field is None or getattr(expression.op, "name", "") != "EQ":
+        raise NotImplementedError(f"Unsupported query expression: {expression}")
+    return document.get(field) == expression.right
+
+
+class _Query:
+    def __init__(self, redis: InMemoryRedis, model: type, expressions: Any) -> None:
+        self.redis = redis
+        self.model = model
+        self.expressions = expressions
+
+    def _documents(self) -> Iterator[dict[str, Any]]:
+        for key in self.redis.keys_by_model.get(self.model, {}).values():
+            document = self.redis.documents[key]
+            if all(_matches(e, document) for e in self.expressions):
+                yield document
+
+    def all(self) -> list[Any]:
+        self.redis._wait()
+        return [self.model(**document) for document in self._documents()]
+
+    def first(self) -> Any:
+        self.redis._wait()
+        for document in self._documents():
+            return self.model(**document)
+        raise NotFoundError(f"No {self.model.__name__} found")
+
+    def count(self) -> int:
+        self.redis._wait()
+        return sum(1 for _ in self._documents())
+
+
+def _find(redis: InMemoryRedis, model: type, *expressions: Any) -> _Query:
+    return _Query(redis, model, expressions)
+
+
+def _get(redis: InMemoryRedis, model: type, pk: str) -> Any:
+    document = redis.json_get(model.make_primary_key(pk))
+    redis._wait()
+    if document is None:
+        raise NotFoundError(f"{model.__name__} {pk} not found")
+    return model(**document)
+
+
+def _all_pks(redis: InMemoryRedis, model: type) -> Iterator[str]:
+    redis._wait()
+    yield from list(redis.keys_by_model.get(model, {}))
+
+
+def _fake_llm(reply_chars: int) -> Any:
+    reply = ("sure, that sounds fair " * (reply_chars // 23 + 1))[:reply_chars]
+
+    async def aact(self: LLMAgent, obs: Observation) -> AgentAction:
+        self.recv_message("Environment", obs)
+        if obs.available_actions == ["none"]:
+            return AgentAction(action_type="none", argument="")
+        return AgentAction(action_type="speak", argument=reply)
+
+    return aact
+
+
+async def _no_evaluation(self: Any, *args: Any, **kwargs: Any) -> list[Any]:
+    return []
+
+
+@contextmanager
+def fake_backend(
+    redis: InMemoryRedis, reply_chars: int = 200, max_turns: int = 1000
+) -> Iterator[InMemoryRedis]:
+    """Serve the sotopia models from `redis` and stub out every LLM call.
+
+    The rule-based terminator is given `max_turns` so long conversations are
+    not cut off at the app's usual 20 turns.
+    """
+    init_terminator = RuleBasedTerminatedEvaluator.__init__
+
+    def terminator(self: Any, max_turn_number: int = 20, max_stale_turn: int = 2):
+        init_terminator(
+            self,
+            max_turn_number=max(max_turn_number, max_turns),
+            max_stale_turn=max(max_stale_turn, max_turns),
+        )
+
+    with ExitStack() as stack:
+        for model in MODELS:
+            stack.enter_context(
+                mock.patch.object(model, "find", partial(_find, redis, model))
+            )
+            stack.enter_context(
+                mock.patch.object(model, "get", partial(_get, redis, model))
+            )
+            stack.enter_context(
+                mock.patch.object(model, "all_pks", partial(_all_pks, redis, model))
+            )
+            stack.enter_context(
+                mock.patch.object(model, "db", classmethod(lambda cls: redis))
+            )
+        stack.enter_context(mock.patch.object(LLMAgent, "aact", _fake_llm(reply_chars)))
+        stack.enter_context(
+            mock.patch.object(ReachGoalLLMEvaluator, "__acall__", _no_evaluation)
+        )
+        stack.enter_context(
+            mock.patch.object(RuleBasedTerminatedEvaluator, "__init__", terminator)
+        )
+        yield redis
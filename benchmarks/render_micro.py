@@ -0,0 +1,211 @@
+"""Micro-benchmarks for the transcript rendering hot paths in `rendering_utils`.
+
+Every function runs on synthetic episodes (see `benchmarks/synthetic.py`) of
+the given sizes; each case reports calls per second and the peak memory
+allocated during one call (tracemalloc).
+
+    python -m benchmarks.render_micro --turns 5 20 50 --observation-chars 1000 8000
+    python -m benchmarks.render_micro --save-baseline  # after an intentional change
+
+Exits non-zero when a metric regresses beyond `--tolerance` relative to the
+saved baseline. `baselines/render_micro_before_single_pass.json` holds the
+numbers of the rendering code before its single-pass rewrite, for comparison:
+
+    python -m benchmarks.render_micro --baseline benchmarks/baselines/render_micro_before_single_pass.json
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks.baseline import (
+    Results,
+    compare_to_baseline,
+    load_baseline,
+    print_table,
+    save_baseline,
+)
+from benchmarks.fakes import InMemoryRedis, fake_backend
+from benchmarks.synthetic import make_agents, make_environments, make_episode
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(__file__), "baselines", "render_micro.json"
+)
+# calls/s is the best of this many rounds of `--min-time / ROUNDS` each
+ROUNDS = 5
+
+
+class _Agent:
+    """What `render_messages` reads from an `LLMAgent`."""
+
+    def __init__(self, profile: Any, model_name: str) -> None:
+        self.profile = profile
+        self.model_name = model_name
+
+
+class _Env:
+    def __init__(self, profile: Any, model_name: str) -> None:
+        self.profile = profile
+        self.model_name = model_name
+
+
+def _live_messages(episode: Any) -> Any:
+    """The episode as the chat modes keep it, a `ConversationStore` of messages."""
+    from sotopia.messages import AgentAction, Observation
+
+    from socialstream.message_store import ConversationStore
+
+    actions = ["none", "speak", "non-verbal communication", "action", "leave"]
+    store = ConversationStore()
+    for turn_number, step in enumerate(episode.messages):
+        turn = []
+        for sender, receiver, content in step:
+            if sender == "Environment":
+                message: Any = Observation(
+                    last_turn=content.partition(": ")[2],
+                    turn_number=turn_number,
+                    available_actions=actions,
+                )
+            elif content.startswith("said: "):
+                message = AgentAction(
+                    action_type="speak", argument=content[len('said: "') : -1]
+                )
+            elif content == "left the conversation":
+                message = AgentAction(action_type="leave", argument="")
+            else:
+                message = AgentAction(action_type="none", argument="")
+            turn.append((sender, receiver, message))
+        store.append(turn)
+    return store
+
+
+def _workloads(
+    turns: int, message_chars: int, observation_chars: int, reasoning_chars: int
+) -> dict[str, Callable[[], Any]]:
+    from socialstream.rendering_utils import (
+        parse_reasoning,
+        render_for_humans,
+        render_messages,
+    )
+    from socialstream.utils import format_for_markdown
+
+    agents = make_agents(2)
+    environment = make_environments(1)[0]
+    episode = make_episode(
+        "episode-micro",
+        environment,
+        agents,
+        turns=turns,
+        message_chars=message_chars,
+        observation_chars=observation_chars,
+        reasoning_chars=reasoning_chars,
+    )
+    live_messages = _live_messages(episode)
+    env = _Env(environment, "gpt-4o")
+    agent_list = [_Agent(agent, "gpt-4o-mini") for agent in agents]
+    contents = [message["content"] for message in render_for_humans(episode)]
+
+    return {
+        "render_for_humans": lambda: render_for_humans(episode),
+        "parse_reasoning": lambda: parse_reasoning(episode.reasoning, 2),
+        "render_messages": lambda: render_messages(
+            env,  # type: ignore
+            agent_list,  # type: ignore
+            live_messages,
+            episode.reasoning,  # type: ignore
+            episode.rewards,  # type: ignore
+        ),
+        "format_for_markdown": lambda: [
+            format_for_markdown(content) for content in contents
+        ],
+    }
+
+
+def measure(
+    func: Callable[[], Any], min_time: float, rounds: int = ROUNDS
+) -> dict[str, float]:
+    func()  # warm up
+    rates = []
+    for _ in range(rounds):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time / rounds:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        rates.append(calls / elapsed)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return {
+        # the fastest round is the one least slowed down by other processes
+        "ops_per_s": max(rates),
+        "peak_kb": (peak - baseline) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--message-chars", type=int, default=300)
+    parser.add_argument(
+        "--observation-chars", type=int, nargs="+", default=[1000, 8000]
+    )
+    parser.add_argument("--reasoning-chars", type=int, default=200)
+    parser.add_argument(
+        "--functions",
+        nargs="+",
+        default=None,
+        help="subset of render_for_humans parse_reasoning render_messages "
+        "format_for_markdown",
+    )
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per case")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # fail before the (long) run when there is nothing to compare against
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    results: Results = {}
+    # sotopia models need a database connection even when nothing is stored
+    with fake_backend(InMemoryRedis()):
+        for turns in args.turns:
+            for observation_chars in args.observation_chars:
+                workloads = _workloads(
+                    turns, args.message_chars, observation_chars, args.reasoning_chars
+                )
+                for name, func in workloads.items():
+                    if args.functions and name not in args.functions:
+                        continue
+                    case = f"{name},turns={turns},obs={observation_chars}"
+                    results[case] = measure(func, args.min_time)
+
+    print_table(results)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return
+    regressions = compare_to_baseline(
+        results,
+        baseline,
+        args.tolerance,
+        higher_is_better=["ops_per_s"],
+    )
+    for regression in regressions:
+        print("REGRESSION", regression)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
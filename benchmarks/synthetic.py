@@ -0,0 +1,170 @@
+"""Deterministic synthetic profiles and episodes for the benchmarks.
+
+Messages follow the natural-language forms sotopia stores in `EpisodeLog`
+(`said: "..."`, `did nothing`, `left the conversation`, `Turn #i: ...`
+observations) and the reasoning follows the evaluator's
+`Agent i comments:` layout, so the rendering code takes its real branches.
+"""
+
+import random
+
+from sotopia.database import (
+    AgentProfile,
+    EnvAgentComboStorage,
+    EnvironmentProfile,
+    EpisodeLog,
+)
+
+DIMENSIONS = (
+    "believability",
+    "relationship",
+    "knowledge",
+    "secret",
+    "social_rules",
+    "financial_and_material_benefits",
+    "goal",
+)
+WORDS = (
+    "the a to of and we could maybe really think offer price deal weekend "
+    "friend help project budget $20 $150 tomorrow honestly fair trade plan "
+    "meeting dinner apartment rent car share time agree sorry thanks idea"
+).split()
+
+
+def text(rng: random.Random, chars: int) -> str:
+    """Roughly `chars` characters of filler words (some contain `$`)."""
+    words: list[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def make_agents(count: int, seed: int = 0) -> list[AgentProfile]:
+    rng = random.Random(seed)
+    return [
+        AgentProfile(
+            pk=f"agent-{idx:06d}",
+            first_name=f"First{idx}",
+            # a few shared last names, so the name registry sees collisions
+            last_name=f"Last{idx % 97}",
+            age=rng.randint(18, 80),
+            occupation=rng.choice(["Teacher", "Chef", "Engineer", "Nurse"]),
+            gender=rng.choice(["Man", "Woman", "Nonbinary"]),
+            gender_pronoun="They/them",
+            public_info=text(rng, 200),
+            personality_and_values=text(rng, 150),
+            secret=text(rng, 80),
+        )
+        for idx in range(count)
+    ]
+
+
+def make_environments(count: int, seed: int = 0) -> list[EnvironmentProfile]:
+    rng = random.Random(seed + 1)
+    return [
+        EnvironmentProfile(
+            pk=f"env-{idx:06d}",
+            codename=f"scenario_{idx:06d}",
+            source="synthetic",
+            scenario=text(rng, 400),
+            agent_goals=[
+                f"<extra_info>{text(rng, 120)}</extra_info>",
+                f"<extra_info>{text(rng, 120)}</extra_info>",
+            ],
+        )
+        for idx in range(count)
+    ]
+
+
+def make_combos(
+    environments: list[EnvironmentProfile],
+    agents: list[AgentProfile],
+    seed: int = 0,
+) -> list[EnvAgentComboStorage]:
+    rng = random.Random(seed + 2)
+    return [
+        EnvAgentComboStorage(
+            pk=f"combo-{idx:06d}",
+            env_id=env.pk,
+            agent_ids=[agent.pk for agent in rng.sample(agents, 2)],
+        )
+        for idx, env in enumerate(environments)
+    ]
+
+
+def make_reasoning(rng: random.Random, chars_per_dimension: int) -> str:
+    lines = [f"Environment comments: terminated: {text(rng, 40)}"]
+    for agent_idx in (1, 2):
+        lines.append(f"Agent {agent_idx} comments:")
+        lines.extend(
+            f"{dimension}: {text(rng, chars_per_dimension)}" for dimension in DIMENSIONS
+        )
+    return "\n".join(lines)
+
+
+def make_episode(
+    pk: str,
+    environment: EnvironmentProfile,
+    agents: list[AgentProfile],
+    turns: int = 20,
+    message_chars: int = 200,
+    observation_chars: int = 1000,
+    reasoning_chars: int = 150,
+    seed: int = 0,
+) -> EpisodeLog:
+    """An episode of `turns` alternating utterances between two agents.
+
+    `observation_chars` sizes the background each agent receives in turn 0;
+    `reasoning_chars` is the length of each per-dimension comment.
+    """
+    rng = random.Random(seed)
+    names = [f"{agent.first_name} {agent.last_name}" for agent in agents]
+    messages = [
+        [
+            (
+                "Environment",
+                name,
+                f"Here is the context: {text(rng, observation_chars)}",
+            )
+            for name in names
+        ]
+    ]
+    last_turn = ""
+    for turn in range(1, turns + 1):
+        speaker = (turn - 1) % 2
+        utterance = text(rng, message_chars)
+        step = [
+            ("Environment", name, f"Turn #{turn - 1}: {last_turn}") for name in names
+        ]
+        for idx, name in enumerate(names):
+            if idx == speaker:
+                action = (
+                    "left the conversation" if turn == turns else f'said: "{utterance}"'
+                )
+            else:
+                action = "did nothing"
+            step.append((name, "Environment", action))
+        messages.append(step)
+        last_turn = f'{names[speaker]} said: "{utterance}"'
+
+    rewards = [
+        (
+            rng.uniform(0, 10),
+            {dimension: float(rng.randint(-5, 10)) for dimension in DIMENSIONS},
+        )
+        for _ in agents
+    ]
+    return EpisodeLog(
+        pk=pk,
+        environment=environment.pk,
+        agents=[agent.pk for agent in agents],
+        tag="benchmark",
+        models=["gpt-4o", "gpt-4o-mini", "gpt-4o-mini"],
+        messages=messages,
+        reasoning=make_reasoning(rng, reasoning_chars),
+        rewards=rewards,
+        rewards_prompt="",
+    )
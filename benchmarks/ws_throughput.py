@@ -0,0 +1,219 @@
+"""Throughput and latency of the streaming chat path.
+
+Starts the synthetic stand-in server (`socialstream.sim_server --synthetic`) in a
+subprocess, so that only the client is measured, and drives the real
+`WebSocketManager` -> `receive_queue` -> `streamlit_rendering` path at the given
+message rates and payload sizes. Streamlit calls run in bare mode (no browser),
+which still builds every element.
+
+    python -m benchmarks.ws_throughput --rates 10 100 1000 --payload-sizes 256 16384
+    python -m benchmarks.ws_throughput --save-baseline  # after an intentional change
+
+Delivery latency is measured from the server's send time to the end of the
+render pass that first shows the message. Exits non-zero when a metric
+regresses beyond `--tolerance` relative to the saved baseline.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.baseline import (
+    compare_to_baseline,
+    load_baseline,
+    percentile,
+    print_table,
+    save_baseline,
+)
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(__file__), "baselines", "ws_throughput.json"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def start_server(port: int) -> subprocess.Popen[bytes]:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "socialstream.sim_server",
+            "--synthetic",
+            "--port",
+            str(port),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/models", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("stand-in server did not start")
+
+
+def run_case(
+    port: int,
+    rate: float,
+    payload_size: int,
+    num_messages: int,
+    poll_interval: float,
+    compress: bool,
+    render: bool,
+) -> dict[str, float]:
+    from socialstream.rendering.api_catalog import simulation_ws_url
+    from socialstream.rendering.render_chat_websocket import (
+        WebSocketManager,
+        streamlit_rendering,
+    )
+    from socialstream.rendering_utils import messageForRendering
+
+    manager = WebSocketManager(
+        simulation_ws_url(f"http://127.0.0.1:{port}"), compress=compress
+    )
+    messages: list[messageForRendering] = []
+    latencies: list[float] = []
+
+    rss_before = _rss_bytes()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    manager.start()
+    manager.send_message(
+        {
+            "type": "START_SIM",
+            "data": {
+                "num_messages": num_messages,
+                "rate": rate,
+                "payload_size": payload_size,
+            },
+        }
+    )
+    finished = False
+    while not finished:
+        sent_at = []
+        while not manager.receive_queue.empty():
+            message = manager.receive_queue.get()
+            if message["type"] == "SERVER_MSG":
+                data = message["data"]
+                messages.append(
+                    messageForRendering(
+                        role=data["role"], type=data["type"], content=data["content"]
+                    )
+                )
+                sent_at.append(data["sent_at"])
+            elif message["type"] in ("END_SIM", "ERROR"):
+                finished = True
+        if sent_at and render:
+            streamlit_rendering(messages, agent_names=["Agent 0", "Agent 1"])
+        now = time.time()
+        latencies.extend(now - t for t in sent_at)
+        if not manager.running and manager.receive_queue.empty():
+            break
+        if not finished:
+            time.sleep(poll_interval)
+
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+    rss_growth = _rss_bytes() - rss_before
+    manager.stop()
+
+    received = len(latencies)
+    if received < num_messages:
+        print(f"warning: received {received}/{num_messages} messages")
+    return {
+        "msgs_per_s": received / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "cpu_us_per_msg": cpu / max(received, 1) * 1e6,
+        "rss_growth_kb": rss_growth / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[10.0, 100.0, 1000.0])
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=[256, 16384])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="seconds between queue drains; chat_demo uses 1s",
+    )
+    parser.add_argument("--no-compress", action="store_true")
+    parser.add_argument(
+        "--no-render", action="store_true", help="stop at the receive queue"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # fail before the (long) run when there is nothing to compare against
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    port = _free_port()
+    server = start_server(port)
+    results = {}
+    try:
+        for rate in args.rates:
+            for payload_size in args.payload_sizes:
+                case = f"rate={rate:g},size={payload_size}"
+                print(f"running {case} ...")
+                results[case] = run_case(
+                    port,
+                    rate,
+                    payload_size,
+                    args.messages,
+                    args.poll_interval,
+                    compress=not args.no_compress,
+                    render=not args.no_render,
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_table(results)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return
+    regressions = compare_to_baseline(
+        results,
+        baseline,
+        args.tolerance,
+        higher_is_better=["msgs_per_s"],
+        # a few pages of allocator noise are not a leak
+        min_change={"rss_growth_kb": 1024},
+    )
+    for regression in regressions:
+        print("REGRESSION", regression)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
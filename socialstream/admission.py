@@ -0,0 +1,199 @@
+"""Admission control for chat episodes when the LLMs are at capacity.
+
+Each chat session that presses Start asks for a slot. It is admitted when
+there are fewer than `MAX_ACTIVE_EPISODES` active episodes and none of its
+models has `max_inflight` turns in flight. Otherwise it waits in a FIFO queue
+and is shown its position and an estimated wait. Only the head of the queue
+is admitted, so a later arrival never overtakes a waiting session. An active
+session that takes no turn for `ADMISSION_IDLE_TIMEOUT` seconds loses its slot
+and rejoins the back of the queue on its next turn. A queued session that
+stops polling (e.g. its tab was closed) is dropped after `QUEUE_STALE_SECONDS`,
+and a session closed by the session reaper gives up its slot right away.
+
+    SOCIALSTREAM_MAX_ACTIVE_EPISODES     concurrent episodes (0: no cap)
+    SOCIALSTREAM_MAX_INFLIGHT_PER_MODEL  concurrent turns per model (0: no cap)
+    SOCIALSTREAM_MODEL_CONCURRENCY       per-model overrides, e.g. {"gpt-4o": 16}
+    SOCIALSTREAM_ADMISSION_IDLE_TIMEOUT  seconds without a turn before release
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+from socialstream.session_lifecycle import session_registry
+
+MAX_ACTIVE_EPISODES = int(os.environ.get("SOCIALSTREAM_MAX_ACTIVE_EPISODES", 20))
+MAX_INFLIGHT_PER_MODEL = int(os.environ.get("SOCIALSTREAM_MAX_INFLIGHT_PER_MODEL", 8))
+MODEL_CONCURRENCY: dict[str, int] = json.loads(
+    os.environ.get("SOCIALSTREAM_MODEL_CONCURRENCY", "") or "{}"
+)
+ADMISSION_IDLE_TIMEOUT = float(
+    os.environ.get("SOCIALSTREAM_ADMISSION_IDLE_TIMEOUT", 300)
+)
+QUEUE_POLL_INTERVAL = 2.0
+QUEUE_STALE_SECONDS = 30.0
+# assumed episode length until some episodes have finished
+DEFAULT_EPISODE_SECONDS = 180.0
+EPISODE_SECONDS_SMOOTHING = 0.2
+
+
+@dataclass
+class Ticket:
+    admitted: bool
+    # 1-based place in the queue, 0 when admitted
+    position: int = 0
+    eta_seconds: float = 0.0
+
+
+@dataclass
+class _Waiting:
+    models: tuple[str, ...]
+    last_poll: float
+
+
+@dataclass
+class _Slot:
+    models: tuple[str, ...]
+    admitted_at: float
+    last_turn: float
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_active_episodes: int = MAX_ACTIVE_EPISODES,
+        max_inflight_per_model: int = MAX_INFLIGHT_PER_MODEL,
+        model_concurrency: Optional[dict[str, int]] = None,
+        idle_timeout: float = ADMISSION_IDLE_TIMEOUT,
+    ) -> None:
+        self.max_active_episodes = max_active_episodes
+        self.max_inflight_per_model = max_inflight_per_model
+        self.model_concurrency = dict(
+            MODEL_CONCURRENCY if model_concurrency is None else model_concurrency
+        )
+        self.idle_timeout = idle_timeout
+        self._active: dict[str, _Slot] = {}
+        # in arrival order
+        self._queue: "OrderedDict[str, _Waiting]" = OrderedDict()
+        self._inflight: dict[str, int] = {}
+        self._episode_seconds = DEFAULT_EPISODE_SECONDS
+        self._lock = threading.Lock()
+
+    def max_inflight(self, model: str) -> int:
+        return self.model_concurrency.get(model, self.max_inflight_per_model)
+
+    def request(
+        self, session_id: str, models: Iterable[str], now: Optional[float] = None
+    ) -> Ticket:
+        """Admit `session_id`, or queue it (keeping its place on later calls)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._release_idle(now)
+            if session_id in self._active:
+                return Ticket(admitted=True)
+            if session_id in self._queue:
+                self._queue[session_id].last_poll = now
+            else:
+                self._queue[session_id] = _Waiting(tuple(models), now)
+            # admit from the head only, so nobody overtakes a waiting session
+            while self._queue:
+                head, waiting = next(iter(self._queue.items()))
+                if not self._has_capacity(waiting.models):
+                    break
+                del self._queue[head]
+                self._active[head] = _Slot(waiting.models, now, now)
+            if session_id in self._active:
+                return Ticket(admitted=True)
+            position = list(self._queue).index(session_id) + 1
+            return Ticket(False, position, self._eta(position))
+
+    def is_active(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._active
+
+    def release(self, session_id: str, now: Optional[float] = None) -> None:
+        """Free the session's slot (or queue place) when its episode ends."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._queue.pop(session_id, None)
+            slot = self._active.pop(session_id, None)
+            if slot is not None:
+                self._episode_seconds += EPISODE_SECONDS_SMOOTHING * (
+                    now - slot.admitted_at - self._episode_seconds
+                )
+
+    def touch(self, session_id: str) -> None:
+        """Mark the session as not idle, e.g. when its human player takes a turn."""
+        with self._lock:
+            slot = self._active.get(session_id)
+            if slot is not None:
+                slot.last_turn = time.monotonic()
+
+    @contextmanager
+    def turn(self, session_id: str, model: str) -> Iterator[None]:
+        """Count a model call as in flight and mark the session as not idle."""
+        with self._lock:
+            self._inflight[model] = self._inflight.get(model, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._inflight[model] -= 1
+                slot = self._active.get(session_id)
+                if slot is not None:
+                    slot.last_turn = time.monotonic()
+
+    def release_idle(self, now: Optional[float] = None) -> list[str]:
+        """Release idle slots and drop stale queue places; returns released ids."""
+        with self._lock:
+            return self._release_idle(time.monotonic() if now is None else now)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "active": len(self._active),
+                "queued": len(self._queue),
+                "inflight": dict(self._inflight),
+                "episode_seconds": self._episode_seconds,
+            }
+
+    def _has_capacity(self, models: tuple[str, ...]) -> bool:
+        if self.max_active_episodes and len(self._active) >= self.max_active_episodes:
+            return False
+        return all(
+            not self.max_inflight(model)
+            or self._inflight.get(model, 0) < self.max_inflight(model)
+            for model in models
+        )
+
+    def _eta(self, position: int) -> float:
+        # slots free up at about (active episodes / episode length) per second
+        parallel = max(len(self._active), 1)
+        return position * self._episode_seconds / parallel
+
+    def _release_idle(self, now: float) -> list[str]:
+        idle = [
+            session_id
+            for session_id, slot in self._active.items()
+            if now - slot.last_turn > self.idle_timeout
+        ]
+        for session_id in idle:
+            # idle time is not part of a typical episode, so it is not averaged in
+            del self._active[session_id]
+        for session_id in [
+            session_id
+            for session_id, waiting in self._queue.items()
+            if now - waiting.last_poll > QUEUE_STALE_SECONDS
+        ]:
+            del self._queue[session_id]
+        return idle
+
+
+admission_controller = AdmissionController()
+# sessions are admitted under their session id, see utils.get_admission_id
+session_registry.add_close_hook(admission_controller.release)
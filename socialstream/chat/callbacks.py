@@ -77,7 +77,8 @@ def agent_edit_callback(key: str = "") -> None:
 
 def edit_callback(key: str = "", reset_msgs: bool = False) -> None:
     # set agent_goals and environment background
-    env_profiles: EnvironmentProfile = st.session_state.env.profile
+    # copy, since profiles loaded from data/ are shared between sessions
+    env_profiles: EnvironmentProfile = st.session_state.env.profile.copy(deep=True)
     scenario = env_profiles.scenario
     agent_goals = env_profiles.agent_goals
 
@@ -163,6 +164,7 @@ def save_callback():
         messages=messages,
         reasoning=reasoning,
         rewards=rewards,
+        evaluation=st.session_state.get("evaluation"),
     )
     message_list = []
     for message in messages:
@@ -7,6 +7,9 @@ from socialstream.chat.callbacks import (
     other_choice_callback,
     save_callback,
 )
+from socialstream.combo_sampler import sample_distinct_pair
+from socialstream.pickers import typeahead_selectbox
+from socialstream.profiler import profiled
 from socialstream.rendering_utils import (
     compose_agent_messages,
     compose_env_messages,
@@ -18,11 +21,13 @@ from socialstream.utils import (
     MODEL_LIST,
     ActionState,
     EnvAgentProfileCombo,
+    admission_gate,
     format_for_markdown,
     initialize_session_state,
     set_from_env_agent_profile_combo,
     set_settings,
     step,
+    stop_if_queued,
 )
 
 
@@ -57,17 +62,14 @@ def chat_demo() -> None:
 
     with st.sidebar:
         with st.expander("Create your scenario!", expanded=True):
-            scenarios = st.session_state.env_mapping
-            agent_list_1, agent_list_2 = st.session_state.agent_mapping
             target_agents = ["Agent 1", "Agent 2"]
 
             scenario_col, scenario_desc_col = st.columns(2)
             with scenario_col:
-                st.selectbox(
+                typeahead_selectbox(
                     "Choose a scenario:",
-                    scenarios.keys(),
+                    st.session_state.scenario_index,
                     disabled=st.session_state.active,
-                    index=0,
                     on_change=env_agent_choice_callback,
                     key="scenario_choice",
                 )
@@ -81,12 +83,11 @@ def chat_demo() -> None:
             def random_select_callback():
                 import random
 
-                agent_choice_1 = random.choice(list(agent_list_1.keys()))
-                agent_choice_2 = random.choice(list(agent_list_2.keys()))
-                while agent_choice_1 == agent_choice_2:
-                    agent_choice_2 = random.choice(list(agent_list_2.keys()))
-                st.session_state.agent_choice_1 = agent_choice_1
-                st.session_state.agent_choice_2 = agent_choice_2
+                # the index keeps the agent names as a list, no need to copy them
+                agent_names = st.session_state.agent_index.keys
+                first, second = sample_distinct_pair(len(agent_names))
+                st.session_state.agent_choice_1 = agent_names[first]
+                st.session_state.agent_choice_2 = agent_names[second]
                 env_agent_choice_callback()
 
                 human_agent = random.choice(target_agents)
@@ -146,6 +147,9 @@ def chat_demo() -> None:
             set_from_env_agent_profile_combo(
                 env_agent_combo=env_agent_combo, reset_msgs=True
             )
+            # set here, not from the button's return value: the button disables
+            # itself, which makes Streamlit treat it as a new, unclicked widget
+            st.session_state.state = ActionState.AGENT1_WAITING
 
         action_taken: bool = False
 
@@ -155,22 +159,22 @@ def chat_demo() -> None:
 
         start_col, stop_col, save_col = st.columns(3)
         with start_col:
-            start_button = st.button(
+            st.button(
                 "Start", disabled=st.session_state.active, on_click=activate_and_start
             )
-            if start_button:
-                # st.session_state.active = True
-                st.session_state.state = ActionState.AGENT1_WAITING
 
         with stop_col:
             stop_button = st.button(
                 "Stop", disabled=not st.session_state.active, on_click=stop_and_eval
             )
             if stop_button and st.session_state.active:
-                st.session_state.state = ActionState.EVALUATION_WAITING
-                with st.spinner("Evaluating..."):
-                    step(user_input="")
+                if stop_if_queued():
                     action_taken = True
+                else:
+                    st.session_state.state = ActionState.EVALUATION_WAITING
+                    with st.spinner("Evaluating..."):
+                        step(user_input="")
+                        action_taken = True
 
         with save_col:
             save_button = st.download_button(
@@ -182,6 +186,7 @@ def chat_demo() -> None:
                 # use_container_width=True
             )
 
+    admitted = admission_gate()
     requires_agent_input = (
         st.session_state.state == ActionState.AGENT1_WAITING
         and st.session_state.agent_models[0] == HUMAN_MODEL_NAME
@@ -198,12 +203,16 @@ def chat_demo() -> None:
         and st.session_state.agent_models[1] != HUMAN_MODEL_NAME
     )
 
+    if not admitted:
+        requires_agent_input = requires_model_input = False
+
     messages = render_messages(
         env=st.session_state.env,
         agent_list=list(st.session_state.agents.values()),
         messages=st.session_state.messages,
         reasoning=st.session_state.reasoning,
         rewards=st.session_state.rewards,
+        evaluation=st.session_state.get("evaluation"),
     )
     tag_for_eval = ["Agent 1", "Agent 2", "General"]
     chat_history = [
@@ -237,7 +246,7 @@ def chat_demo() -> None:
             step(user_input="")
             action_taken = True
 
-    if st.session_state.state == ActionState.EVALUATION_WAITING:
+    if admitted and st.session_state.state == ActionState.EVALUATION_WAITING:
         print("Evaluating...")
         with st.spinner("Evaluating..."):
             step()
@@ -247,6 +256,7 @@ def chat_demo() -> None:
         st.rerun()
 
 
+@profiled("render.streamlit_rendering")
 def streamlit_rendering(messages: list[messageForRendering]) -> None:
     agent1_name, agent2_name = list(st.session_state.agents.keys())[:2]
     agent_color_mapping = {
@@ -0,0 +1,28 @@
+import random
+
+from sotopia.database import EnvAgentComboStorage
+
+from socialstream.metrics import redis_query_latency
+
+
+def sample_distinct_pair(n: int, rng: random.Random | None = None) -> tuple[int, int]:
+    """Two distinct uniform indices in range(n), in O(1) without retry loops."""
+    if n < 2:
+        raise ValueError("Need at least two items to sample a pair")
+    rng = rng or random
+    first = rng.randrange(n)
+    second = rng.randrange(n - 1)
+    if second >= first:
+        second += 1
+    return first, second
+
+
+class ComboAccess:
+    """Reads single `EnvAgentComboStorage` entries without loading all of them."""
+
+    def first(self) -> EnvAgentComboStorage:
+        with redis_query_latency.time(query="combos.first"):
+            return EnvAgentComboStorage.find().first()
+
+
+combo_access = ComboAccess()
@@ -0,0 +1,335 @@
+"""Offline, memory-mapped snapshots of episodes and the profiles they reference.
+
+    python -m socialstream.episode_snapshot export episodes.snap [--tag TAG]
+    python -m socialstream.episode_snapshot info episodes.snap
+
+File layout: `MAGIC | column blobs | manifest | u64 manifest offset | u64 manifest
+length | MAGIC`. Small per-episode fields (pk, environment, agents, tag, models,
+rewards) are stored column-wise as one JSON array each and are only parsed when
+first used. The rest of each episode (messages, reasoning, ...) is a separate
+zlib-compressed blob located through a u64 offset column, so opening a snapshot
+only reads the manifest and each transcript is paged in when it is viewed.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import IO, Any, Iterable, Iterator, Optional, Sequence
+
+from redis_om.model.model import NotFoundError
+from sotopia.database import AgentProfile, EnvironmentProfile, EpisodeLog
+
+from socialstream.profile_resolver import multi_get
+
+MAGIC = b"SSEPSNP1"
+TRAILER = struct.Struct("<QQ")
+META_COLUMNS = ("pk", "environment", "agents", "tag", "models", "rewards")
+EPISODE_CACHE_SIZE = 32
+EXPORT_BATCH_SIZE = 500
+
+
+def _u64_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array("Q", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class _ColumnWriter:
+    def __init__(self, f: IO[bytes]) -> None:
+        self.f = f
+        self.columns: dict[str, list[Any]] = {}
+
+    def write(self, name: str, data: bytes, encoding: str) -> None:
+        self.columns[name] = [self.f.tell(), len(data), encoding]
+        self.f.write(data)
+
+
+def write_snapshot(
+    path: str,
+    episodes: Iterable[EpisodeLog],
+    agents: Iterable[AgentProfile],
+    environments: Iterable[EnvironmentProfile],
+) -> int:
+    """Write `episodes` and profiles to `path` and return the number of episodes.
+
+    Transcripts are streamed to disk as they come; only the small metadata
+    columns are kept in memory until the end.
+    """
+    meta: dict[str, list[Any]] = {name: [] for name in META_COLUMNS}
+    offsets = array("Q", [0])
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            columns = _ColumnWriter(f)
+            body_start = f.tell()
+            for episode in episodes:
+                data = episode.dict()
+                for name in META_COLUMNS:
+                    meta[name].append(data.pop(name, None))
+                f.write(zlib.compress(json.dumps(data, default=str).encode()))
+                offsets.append(f.tell() - body_start)
+            columns.columns["body"] = [body_start, offsets[-1], "json+zlib"]
+
+            columns.write("body_offsets", _u64_bytes(offsets), "u64")
+            for name, values in meta.items():
+                columns.write(name, json.dumps(values, default=str).encode(), "json")
+            for name, profiles in (
+                ("agent_profiles", agents),
+                ("environment_profiles", environments),
+            ):
+                by_pk = {profile.pk: profile.dict() for profile in profiles}
+                payload = zlib.compress(json.dumps(by_pk, default=str).encode())
+                columns.write(name, payload, "json+zlib")
+
+            manifest = json.dumps(
+                {"version": 1, "count": len(offsets) - 1, "columns": columns.columns}
+            ).encode()
+            manifest_offset = f.tell()
+            f.write(manifest)
+            f.write(TRAILER.pack(manifest_offset, len(manifest)))
+            f.write(MAGIC)
+    except BaseException:
+        # a failed export must not leave a partial file behind
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return len(offsets) - 1
+
+
+class EpisodeSnapshot:
+    """Read-only view of a snapshot file; columns and transcripts load on demand."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        trailer_start = len(self._mm) - TRAILER.size - len(MAGIC)
+        if (
+            trailer_start < len(MAGIC)
+            or self._mm[: len(MAGIC)] != MAGIC
+            or self._mm[-len(MAGIC) :] != MAGIC
+        ):
+            self._mm.close()
+            self._file.close()
+            raise ValueError(f"{path} is not an episode snapshot")
+        manifest_offset, manifest_length = TRAILER.unpack_from(self._mm, trailer_start)
+        manifest = json.loads(
+            self._mm[manifest_offset : manifest_offset + manifest_length]
+        )
+        self.count: int = manifest["count"]
+        self._columns: dict[str, list[Any]] = manifest["columns"]
+        self._loaded: dict[str, Any] = {}
+        self._by_environment: Optional[dict[str, list[int]]] = None
+        self._episodes: "OrderedDict[int, EpisodeLog]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def column_info(self) -> dict[str, list[Any]]:
+        """`{name: [offset, length, encoding]}` for every column in the file."""
+        return self._columns
+
+    def close(self) -> None:
+        self._loaded.clear()
+        self._mm.close()
+        self._file.close()
+
+    def _raw(self, name: str) -> bytes:
+        offset, length, _ = self._columns[name]
+        return self._mm[offset : offset + length]
+
+    def column(self, name: str) -> Any:
+        with self._lock:
+            if name not in self._loaded:
+                encoding = self._columns[name][2]
+                raw = self._raw(name)
+                if encoding == "u64":
+                    values = array("Q")
+                    values.frombytes(raw)
+                    if sys.byteorder == "big":
+                        values.byteswap()
+                    self._loaded[name] = values
+                elif encoding == "json+zlib":
+                    self._loaded[name] = json.loads(zlib.decompress(raw))
+                else:
+                    self._loaded[name] = json.loads(raw)
+            return self._loaded[name]
+
+    def episode(self, index: int) -> EpisodeLog:
+        with self._lock:
+            episode = self._episodes.get(index)
+            if episode is not None:
+                self._episodes.move_to_end(index)
+                return episode
+        offsets = self.column("body_offsets")
+        body_start = self._columns["body"][0]
+        start, end = body_start + offsets[index], body_start + offsets[index + 1]
+        data = json.loads(zlib.decompress(self._mm[start:end]))
+        for name in META_COLUMNS:
+            data[name] = self.column(name)[index]
+        episode = EpisodeLog(**data)
+        with self._lock:
+            self._episodes[index] = episode
+            while len(self._episodes) > EPISODE_CACHE_SIZE:
+                self._episodes.popitem(last=False)
+        return episode
+
+    def episodes_for_environment(self, env_pk: str) -> "EpisodeList":
+        with self._lock:
+            by_environment = self._by_environment
+        if by_environment is None:
+            by_environment = {}
+            for index, pk in enumerate(self.column("environment")):
+                by_environment.setdefault(pk, []).append(index)
+            with self._lock:
+                self._by_environment = by_environment
+        return EpisodeList(self, by_environment.get(env_pk, []))
+
+    def environments(self) -> list[EnvironmentProfile]:
+        return [
+            EnvironmentProfile(**data)
+            for data in self.column("environment_profiles").values()
+        ]
+
+    def agents(self, pks: list[str]) -> list[AgentProfile]:
+        profiles = self.column("agent_profiles")
+        for pk in pks:
+            if pk not in profiles:
+                # deleted before the export, which skips missing profiles
+                raise NotFoundError(f"AgentProfile {pk} not in the snapshot")
+        return [AgentProfile(**profiles[pk]) for pk in pks]
+
+    def environment(self, pk: str) -> EnvironmentProfile:
+        profiles = self.column("environment_profiles")
+        if pk not in profiles:
+            raise NotFoundError(f"EnvironmentProfile {pk} not in the snapshot")
+        return EnvironmentProfile(**profiles[pk])
+
+    def episode_profiles(
+        self, episode: EpisodeLog
+    ) -> tuple[list[AgentProfile], EnvironmentProfile]:
+        """Same interface as `ProfileResolver.episode_profiles`, including the
+        `NotFoundError` for a profile that is missing."""
+        return self.agents(episode.agents), self.environment(episode.environment)
+
+
+class EpisodeList(Sequence[EpisodeLog]):
+    """Episodes of a snapshot by position; each one is decoded when accessed."""
+
+    def __init__(self, snapshot: EpisodeSnapshot, indices: list[int]) -> None:
+        self.snapshot = snapshot
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, position):  # type: ignore[no-untyped-def]
+        if isinstance(position, slice):
+            return EpisodeList(self.snapshot, self.indices[position])
+        return self.snapshot.episode(self.indices[position])
+
+    def __iter__(self) -> Iterator[EpisodeLog]:
+        for index in self.indices:
+            yield self.snapshot.episode(index)
+
+
+_SNAPSHOTS: dict[str, tuple[tuple[int, int], EpisodeSnapshot]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def open_snapshot(path: str) -> EpisodeSnapshot:
+    """Open `path` once per process; reopened when the file changes on disk."""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _snapshots_lock:
+        cached = _SNAPSHOTS.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        snapshot = EpisodeSnapshot(path)
+        # the old mapping may still be in use by a running session; let gc close it
+        _SNAPSHOTS[path] = (key, snapshot)
+        return snapshot
+
+
+def _iter_redis_episodes(tag: Optional[str], batch_size: int) -> Iterator[EpisodeLog]:
+    batch: list[str] = []
+    for pk in EpisodeLog.all_pks():
+        batch.append(pk)
+        if len(batch) < batch_size:
+            continue
+        yield from _fetch_episodes(batch, tag)
+        batch = []
+    yield from _fetch_episodes(batch, tag)
+
+
+def _fetch_episodes(pks: list[str], tag: Optional[str]) -> Iterator[EpisodeLog]:
+    for episode in multi_get([(EpisodeLog, pk) for pk in pks]):
+        if episode is not None and (tag is None or episode.tag == tag):
+            yield episode
+
+
+def export_from_redis(
+    path: str, tag: Optional[str] = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> int:
+    agent_pks: set[str] = set()
+    env_pks: set[str] = set()
+
+    def episodes() -> Iterator[EpisodeLog]:
+        for episode in _iter_redis_episodes(tag, batch_size):
+            agent_pks.update(episode.agents)
+            env_pks.add(episode.environment)
+            yield episode
+
+    def profiles(model: type, pks: set[str]) -> Iterator[Any]:
+        pks_list = sorted(pks)
+        for start in range(0, len(pks_list), batch_size):
+            batch = pks_list[start : start + batch_size]
+            for profile in multi_get([(model, pk) for pk in batch]):
+                if profile is not None:
+                    yield profile
+
+    # generators run lazily: profiles are read after all episodes, once the
+    # referenced pks are known
+    return write_snapshot(
+        path,
+        episodes(),
+        profiles(AgentProfile, agent_pks),
+        profiles(EnvironmentProfile, env_pks),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="snapshot episodes in Redis")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--tag", default=None)
+    export_parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    info_parser = subparsers.add_parser("info", help="describe a snapshot file")
+    info_parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = export_from_redis(args.path, args.tag, args.batch_size)
+        print(f"Wrote {count} episodes to {args.path}")
+    else:
+        snapshot = EpisodeSnapshot(args.path)
+        print(f"{args.path}: {len(snapshot)} episodes")
+        for name, (_, length, encoding) in snapshot.column_info.items():
+            print(f"  {name:<22} {encoding:<10} {length:>12} bytes")
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Structured evaluator output: a score and a comment per agent and dimension.
+
+The terminal evaluator returns free text (a general comment followed by one
+`Agent i comments:` block of `dimension: comment` lines per agent) and, per
+agent, a reward of `(overall, {dimension: score})`. `parse_evaluation` reads
+both once into an `EpisodeEvaluation`; rendering, analytics and export then
+use its fields. Evaluations of stored episodes are cached by episode pk.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+OVERALL = "overall_score"
+EVALUATION_CACHE_SIZE = 2048
+
+
+@dataclass(frozen=True)
+class DimensionScore:
+    score: Optional[float]
+    comment: str = ""
+
+
+@dataclass(frozen=True)
+class AgentEvaluation:
+    overall: Optional[float]
+    dimensions: dict[str, DimensionScore] = field(default_factory=dict)
+
+    def scores(self) -> dict[str, float]:
+        """`{dimension: score}` including the overall score, scored dimensions only."""
+        scores = {} if self.overall is None else {OVERALL: self.overall}
+        scores.update(
+            (name, dimension.score)
+            for name, dimension in self.dimensions.items()
+            if dimension.score is not None
+        )
+        return scores
+
+
+@dataclass(frozen=True)
+class EpisodeEvaluation:
+    general_comment: str = ""
+    agents: tuple[AgentEvaluation, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "general_comment": self.general_comment,
+            "agents": [
+                {
+                    "overall": agent.overall,
+                    "dimensions": {
+                        name: {"score": dimension.score, "comment": dimension.comment}
+                        for name, dimension in agent.dimensions.items()
+                    },
+                }
+                for agent in self.agents
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "EpisodeEvaluation":
+        return cls(
+            general_comment=data["general_comment"],
+            agents=tuple(
+                AgentEvaluation(
+                    overall=agent["overall"],
+                    dimensions={
+                        name: DimensionScore(dimension["score"], dimension["comment"])
+                        for name, dimension in agent["dimensions"].items()
+                    },
+                )
+                for agent in data["agents"]
+            ),
+        )
+
+
+@lru_cache(maxsize=8)
+def comment_markers(num_agents: int) -> re.Pattern[str]:
+    """Pattern of the `Agent i comments:` headers for agents 1..`num_agents`."""
+    return re.compile(
+        "|".join(re.escape(f"Agent {i} comments:\n") for i in range(1, num_agents + 1))
+        or "(?!)"
+    )
+
+
+def reward_scores(reward: Any) -> tuple[Optional[float], dict[str, float]]:
+    """`(overall, {dimension: score})` from a stored reward, a float or a pair."""
+    if reward is None:
+        return None, {}
+    if isinstance(reward, (int, float)):
+        return float(reward), {}
+    overall, dimensions = reward
+    return float(overall), {name: float(score) for name, score in dimensions.items()}
+
+
+def _dimension_comments(chunk: str, known: Sequence[str]) -> dict[str, str]:
+    comments: dict[str, str] = {}
+    current: Optional[str] = None
+    for line in chunk.split("\n"):
+        name, colon, rest = line.partition(":")
+        name = name.strip()
+        if colon and name and (name in known or not known):
+            current = name
+            comments[current] = rest.strip()
+        elif current is not None and line.strip():
+            # a comment that runs over several lines
+            comments[current] += "\n" + line.strip()
+    return comments
+
+
+def parse_evaluation(reasoning: str, rewards: Sequence[Any]) -> EpisodeEvaluation:
+    """Combine the evaluator's `reasoning` text with the per-agent `rewards`."""
+    num_agents = len(rewards)
+    chunks = comment_markers(num_agents).split(reasoning.strip(" ").strip("\n"))
+    general_comment = chunks[0].strip(" ").strip("\n")
+    if not general_comment:
+        return EpisodeEvaluation()
+    agent_chunks = chunks[1:]
+    agents = []
+    for idx, reward in enumerate(rewards):
+        overall, scores = reward_scores(reward)
+        chunk = agent_chunks[idx] if idx < len(agent_chunks) else ""
+        comments = _dimension_comments(chunk, list(scores))
+        agents.append(
+            AgentEvaluation(
+                overall=overall,
+                dimensions={
+                    name: DimensionScore(scores.get(name), comments.get(name, ""))
+                    for name in list(scores) + [n for n in comments if n not in scores]
+                },
+            )
+        )
+    return EpisodeEvaluation(general_comment, tuple(agents))
+
+
+class EvaluationCache:
+    """Process-wide LRU of parsed evaluations of stored (immutable) episodes."""
+
+    def __init__(self, max_size: int = EVALUATION_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, EpisodeEvaluation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, episode: Any) -> EpisodeEvaluation:
+        pk = getattr(episode, "pk", None)
+        if not pk:
+            return parse_evaluation(episode.reasoning, episode.rewards)
+        with self._lock:
+            evaluation = self._cache.get(pk)
+            if evaluation is not None:
+                self._cache.move_to_end(pk)
+                return evaluation
+        evaluation = parse_evaluation(episode.reasoning, episode.rewards)
+        with self._lock:
+            self._cache[pk] = evaluation
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return evaluation
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+evaluation_cache = EvaluationCache()
@@ -0,0 +1,334 @@
+"""Streaming export of stored episodes to JSONL or Parquet.
+
+    python -m socialstream.export_episodes episodes.jsonl --tag my_tag
+    python -m socialstream.export_episodes episodes.parquet --model gpt-4o --shards 4
+    python -m socialstream.export_episodes episodes.jsonl --resume
+
+Episode keys are walked with a SCAN cursor and read with pipelined JSON.GETs in
+batches, so memory stays constant regardless of how many episodes are stored.
+When filters are given, only the filtered fields are read first and the full
+episode is fetched for matches only. After every batch the SCAN cursor is
+checkpointed next to the output, and `--resume` continues from there.
+`--shards N` splits the episodes by pk hash over N processes, each writing its
+own output file.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from sotopia.database import EpisodeLog
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is an optional dependency (`poetry install -E export`)
+    pa = None
+
+from socialstream.evaluation import evaluation_cache
+from socialstream.profile_resolver import multi_get
+from socialstream.rendering_utils import render_for_humans
+
+BATCH_SIZE = 500
+FILTER_PATHS = ("$.environment", "$.tag", "$.models")
+PART_FILE = re.compile(r"part-(\d{5})\.parquet")
+# fixed, so that a batch of all-null tags or empty lists has the same types
+# as every other part file
+PARQUET_SCHEMA = (
+    pa.schema(
+        [
+            ("pk", pa.string()),
+            ("environment", pa.string()),
+            ("tag", pa.string()),
+            ("agents", pa.list_(pa.string())),
+            ("models", pa.list_(pa.string())),
+            # free-form fields are kept as JSON text so the schema stays flat
+            ("rewards", pa.string()),
+            ("evaluation", pa.string()),
+            ("transcript", pa.string()),
+        ]
+    )
+    if pa is not None
+    else None
+)
+
+
+@dataclass
+class ExportOptions:
+    output: str
+    fmt: str = "jsonl"  # "jsonl" or "parquet"
+    transcript: str = "rendered"  # "rendered" or "raw"
+    environment: Optional[str] = None
+    tag: Optional[str] = None
+    model: Optional[str] = None
+    batch_size: int = BATCH_SIZE
+    shard: int = 0
+    shards: int = 1
+
+    def filters(self) -> dict[str, Any]:
+        return {
+            "environment": self.environment,
+            "tag": self.tag,
+            "model": self.model,
+            "transcript": self.transcript,
+            "shard": self.shard,
+            "shards": self.shards,
+        }
+
+
+def shard_output(output: str, shard: int, shards: int) -> str:
+    if shards == 1:
+        return output
+    stem, ext = os.path.splitext(output)
+    return f"{stem}-{shard:03d}-of-{shards:03d}{ext}"
+
+
+def _first(value: Any) -> Any:
+    # JSONPath ($.x) results come back as one-element lists
+    return value[0] if isinstance(value, list) and value else None
+
+
+def _matches(options: ExportOptions, fields: dict[str, Any]) -> bool:
+    if options.environment and _first(fields.get("$.environment")) != (
+        options.environment
+    ):
+        return False
+    if options.tag and _first(fields.get("$.tag")) != options.tag:
+        return False
+    if options.model and options.model not in (_first(fields.get("$.models")) or []):
+        return False
+    return True
+
+
+def scan_episode_pks(cursor: int, batch_size: int) -> Iterator[tuple[int, list[str]]]:
+    """Yield `(next cursor, pks)` per SCAN call, starting at `cursor`."""
+    db = EpisodeLog.db()
+    prefix = EpisodeLog.make_primary_key("")
+    while True:
+        cursor, keys = db.scan(
+            cursor=cursor, match=f"{prefix}*", count=batch_size, _type="ReJSON-RL"
+        )
+        pks = [
+            (key.decode() if isinstance(key, bytes) else key)[len(prefix) :]
+            for key in keys
+        ]
+        yield cursor, pks
+        if cursor == 0:
+            return
+
+
+def fetch_matching(options: ExportOptions, pks: list[str]) -> list[EpisodeLog]:
+    pks = [
+        pk
+        for pk in pks
+        if options.shards == 1
+        or zlib.crc32(pk.encode()) % options.shards == options.shard
+    ]
+    if pks and (options.environment or options.tag or options.model):
+        pipe = EpisodeLog.db().pipeline(transaction=False)
+        for pk in pks:
+            pipe.json().get(EpisodeLog.make_primary_key(pk), *FILTER_PATHS)
+        pks = [
+            pk
+            for pk, fields in zip(pks, pipe.execute())
+            if fields is not None and _matches(options, fields)
+        ]
+    return [
+        episode
+        for episode in multi_get([(EpisodeLog, pk) for pk in pks])
+        if episode is not None  # deleted since the scan
+    ]
+
+
+def episode_row(episode: EpisodeLog, transcript: str) -> dict[str, Any]:
+    return {
+        "pk": episode.pk,
+        "environment": episode.environment,
+        "tag": episode.tag,
+        "agents": list(episode.agents),
+        "models": list(episode.models or []),
+        "rewards": episode.rewards,
+        "evaluation": evaluation_cache.get(episode).to_dict(),
+        "transcript": (
+            [dict(message) for message in render_for_humans(episode)]
+            if transcript == "rendered"
+            else episode.messages
+        ),
+    }
+
+
+class JsonlWriter:
+    def __init__(self, path: str, offset: int) -> None:
+        self.f = open(path, "r+b" if offset else "wb")
+        # drop anything written after the last checkpoint
+        self.f.truncate(offset)
+        self.f.seek(offset)
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        for row in rows:
+            self.f.write(json.dumps(row, default=str).encode())
+            self.f.write(b"\n")
+
+    def checkpoint(self) -> int:
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return self.f.tell()
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class ParquetWriter:
+    """Writes one part file per batch into the `path` directory."""
+
+    def __init__(self, path: str, offset: int) -> None:
+        if pa is None:
+            raise ImportError(
+                "Parquet export needs pyarrow, install it with `pip install pyarrow` "
+                "or the `export` extra"
+            )
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.parts = offset
+        # part files after the last checkpoint are incomplete
+        for name in os.listdir(path):
+            match = PART_FILE.fullmatch(name)
+            if match and int(match.group(1)) >= offset:
+                os.remove(os.path.join(path, name))
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        import pyarrow.parquet as pq
+
+        if not rows:
+            return
+        columns = {
+            "pk": [row["pk"] for row in rows],
+            "environment": [row["environment"] for row in rows],
+            "tag": [row["tag"] for row in rows],
+            "agents": [row["agents"] for row in rows],
+            "models": [row["models"] for row in rows],
+            "rewards": [json.dumps(row["rewards"], default=str) for row in rows],
+            "evaluation": [json.dumps(row["evaluation"]) for row in rows],
+            "transcript": [json.dumps(row["transcript"], default=str) for row in rows],
+        }
+        pq.write_table(
+            pa.table(columns, schema=PARQUET_SCHEMA),
+            os.path.join(self.path, f"part-{self.parts:05d}.parquet"),
+        )
+        self.parts += 1
+
+    def checkpoint(self) -> int:
+        return self.parts
+
+    def close(self) -> None:
+        pass
+
+
+def _load_checkpoint(path: str, options: ExportOptions) -> Optional[dict[str, Any]]:
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    if checkpoint["filters"] != options.filters():
+        raise ValueError(
+            f"{path} was written with different options {checkpoint['filters']}, "
+            "remove it to start over"
+        )
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def export_episodes(options: ExportOptions, resume: bool = False) -> int:
+    """Export one shard and return the number of rows written in this run."""
+    output = shard_output(options.output, options.shard, options.shards)
+    checkpoint_path = f"{output}.checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path, options) if resume else None
+    if checkpoint is None:
+        checkpoint = {"cursor": 0, "offset": 0, "rows": 0, "done": False}
+    if checkpoint["done"]:
+        print(f"{output} is already complete")
+        return 0
+    checkpoint["filters"] = options.filters()
+
+    writer_cls = ParquetWriter if options.fmt == "parquet" else JsonlWriter
+    writer = writer_cls(output, checkpoint["offset"])
+    rows_before = checkpoint["rows"]
+    try:
+        for cursor, pks in scan_episode_pks(checkpoint["cursor"], options.batch_size):
+            rows = [
+                episode_row(episode, options.transcript)
+                for episode in fetch_matching(options, pks)
+            ]
+            writer.write(rows)
+            checkpoint["offset"] = writer.checkpoint()
+            checkpoint["cursor"] = cursor
+            checkpoint["rows"] += len(rows)
+            checkpoint["done"] = cursor == 0
+            _save_checkpoint(checkpoint_path, checkpoint)
+    finally:
+        writer.close()
+    return checkpoint["rows"] - rows_before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("output", help="a .jsonl file or a .parquet directory")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default=None)
+    parser.add_argument(
+        "--transcript",
+        choices=("rendered", "raw"),
+        default="rendered",
+        help="render_for_humans messages or the raw EpisodeLog.messages",
+    )
+    parser.add_argument("--environment", default=None, help="environment pk")
+    parser.add_argument("--tag", default=None)
+    parser.add_argument("--model", default=None, help="any agent or evaluator model")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    shard_options = [
+        ExportOptions(
+            output=args.output,
+            fmt=fmt,
+            transcript=args.transcript,
+            environment=args.environment,
+            tag=args.tag,
+            model=args.model,
+            batch_size=args.batch_size,
+            shard=shard,
+            shards=args.shards,
+        )
+        for shard in range(args.shards)
+    ]
+
+    start = time.perf_counter()
+    if args.shards == 1:
+        rows = export_episodes(shard_options[0], args.resume)
+    else:
+        with ProcessPoolExecutor(max_workers=args.shards) as pool:
+            rows = sum(
+                pool.map(
+                    export_episodes, shard_options, [args.resume] * len(shard_options)
+                )
+            )
+    elapsed = time.perf_counter() - start
+    print(f"Exported {rows} episodes in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
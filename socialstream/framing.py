@@ -0,0 +1,87 @@
+"""Frame codecs for the simulation WebSocket protocol.
+
+The client offers the subprotocols in `SUPPORTED_SUBPROTOCOLS` (most compact
+first) and the server picks one. `sotopia.json` is the original text framing;
+`sotopia.msgpack` sends binary msgpack frames whose observation and action
+payloads are structured values rather than JSON encoded strings. Compression is
+negotiated separately through the standard permessage-deflate extension.
+"""
+
+import json
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack is an optional dependency (`poetry install -E fast`)
+    msgpack = None
+
+JSON_SUBPROTOCOL = "sotopia.json"
+MSGPACK_SUBPROTOCOL = "sotopia.msgpack"
+
+SUPPORTED_SUBPROTOCOLS: tuple[str, ...] = (
+    (MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL)
+    if msgpack is not None
+    else (JSON_SUBPROTOCOL,)
+)
+
+# message types whose content is itself a JSON document in the text framing
+STRUCTURED_CONTENT_TYPES = {"observation", "action"}
+
+
+class JsonCodec:
+    subprotocol = JSON_SUBPROTOCOL
+    binary = False
+
+    def encode(self, message: dict[str, Any]) -> str:
+        return json.dumps(message)
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        return decode_structured_content(json.loads(data))
+
+
+class MsgpackCodec:
+    subprotocol = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        if isinstance(data, str):
+            # a text frame is JSON whatever the subprotocol, e.g. a server error
+            return JsonCodec().decode(data)
+        # structured payloads arrive as maps already, so this is a no-op for them
+        return decode_structured_content(msgpack.unpackb(data, raw=False))
+
+
+def get_codec(subprotocol: Optional[str]) -> JsonCodec | MsgpackCodec:
+    """Return the codec for a negotiated subprotocol, defaulting to JSON text."""
+    if subprotocol == MSGPACK_SUBPROTOCOL and msgpack is not None:
+        return MsgpackCodec()
+    return JsonCodec()
+
+
+def decode_structured_content(message: dict[str, Any]) -> dict[str, Any]:
+    """Parse JSON-as-string observation/action content of a `SERVER_MSG` in place.
+
+    Runs once when the frame is received so that renderers never have to parse
+    the same content again on later reruns.
+    """
+    if message.get("type") != "SERVER_MSG":
+        return message
+    data = message.get("data")
+    if (
+        isinstance(data, dict)
+        and isinstance(data.get("content"), str)
+        and (
+            data.get("type") in STRUCTURED_CONTENT_TYPES
+            or data.get("role") == "Observation"
+        )
+    ):
+        try:
+            content = json.loads(data["content"])
+        except ValueError:
+            return message  # plain text content
+        if isinstance(content, dict):
+            data["content"] = content
+    return message
@@ -0,0 +1,263 @@
+"""Bulk import of the local `data/*_agents.json` / `data/*_scenarios.json` profiles into Redis.
+
+    python -m socialstream.import_profiles --dry-run
+    python -m socialstream.import_profiles --combos-per-env 5
+
+Writes go through non-transactional pipelines in batches. The content hash of
+every imported profile is recorded per pk (and the pk per content hash), so a
+profile is rewritten only when its own content changed, and importing the same
+content again under a different or missing pk is a no-op. The pk is also
+recorded per identity (an agent's full name, a scenario's codename), so a
+`data/` profile that was edited after its import, and is loaded with a new
+random pk, updates its earlier copy instead of adding another one.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from sotopia.database import AgentProfile, EnvAgentComboStorage, EnvironmentProfile
+
+from socialstream.combo_sampler import sample_distinct_pair
+from socialstream.profile_source import agent_source, env_source
+
+HASH_KEY_PREFIX = "socialstream:content_hash"
+
+
+def content_hash(profile: Any) -> str:
+    data = profile.dict(exclude={"pk"})
+    return hashlib.sha1(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def identity(profile: Any) -> Optional[str]:
+    """What stays the same when a profile is edited; None when nothing does."""
+    if isinstance(profile, AgentProfile):
+        return f"{profile.first_name} {profile.last_name}"
+    if isinstance(profile, EnvironmentProfile):
+        return profile.codename
+    return None
+
+
+@dataclass
+class ImportPlan:
+    model: type
+    new: list[Any] = field(default_factory=list)
+    changed: list[Any] = field(default_factory=list)
+    unchanged: int = 0
+    hashes: dict[str, str] = field(default_factory=dict)  # pk -> content hash
+    # pk -> its previous content hash, removed when the new one is written
+    replaced: dict[str, str] = field(default_factory=dict)
+    # pk of an unchanged or edited profile -> pk it is stored under
+    resolved: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def writes(self) -> list[Any]:
+        return self.new + self.changed
+
+    def stored_pk(self, profile: Any) -> str:
+        """The pk `profile` has in Redis once this plan is applied."""
+        return self.resolved.get(profile.pk, profile.pk)
+
+    def summary(self) -> str:
+        return (
+            f"{self.model.__name__}: {len(self.new)} new, {len(self.changed)} changed, "
+            f"{self.unchanged} unchanged"
+        )
+
+
+def _hash_key(model: type) -> str:
+    """Redis hash of content hash -> pk."""
+    return f"{HASH_KEY_PREFIX}:{model.__name__}"
+
+
+def _pk_key(model: type) -> str:
+    """Redis hash of pk -> content hash."""
+    return f"{HASH_KEY_PREFIX}:{model.__name__}:pk"
+
+
+def _identity_key(model: type) -> str:
+    """Redis hash of identity -> pk."""
+    return f"{HASH_KEY_PREFIX}:{model.__name__}:identity"
+
+
+def _hgetall(db: Any, key: str) -> dict[str, str]:
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (
+            v.decode() if isinstance(v, bytes) else v
+        )
+        for k, v in db.hgetall(key).items()
+    }
+
+
+def plan_import(model: type, profiles: Iterable[Any], batch_size: int) -> ImportPlan:
+    """Diff `profiles` against Redis with three HGETALLs and pipelined EXISTS calls.
+
+    A profile whose pk was imported before is compared with that pk's content
+    hash. Any other profile (e.g. from data/, whose pk is random on every load)
+    takes the pk its identity was imported under, so an edit replaces the
+    earlier copy; without one it is matched by content to the pk it was stored
+    under. Matches still count as unchanged only if that pk exists.
+    """
+    db = model.db()
+    stored_pks = _hgetall(db, _hash_key(model))
+    stored_hashes = _hgetall(db, _pk_key(model))
+    stored_ids = _hgetall(db, _identity_key(model))
+    plan = ImportPlan(model=model)
+    # (profile, pk to check, content hash; None for a match)
+    checks: list[tuple[Any, str, str | None]] = []
+    pending: dict[str, str] = {}  # content hash -> pk, to dedup within the import
+    claimed: set[str] = set()  # identities seen in this import
+    for profile in profiles:
+        digest = content_hash(profile)
+        key = identity(profile)
+        if (
+            profile.pk not in stored_hashes
+            and key in stored_ids
+            and key not in claimed
+            and stored_ids[key] != profile.pk
+        ):
+            plan.resolved[profile.pk] = stored_ids[key]
+            profile = profile.copy(update={"pk": stored_ids[key]})
+        if key is not None:
+            # a second profile with the same identity is matched by content
+            claimed.add(key)
+        previous = stored_hashes.get(profile.pk)
+        if previous == digest:
+            checks.append((profile, profile.pk, None))
+            continue
+        if previous is None and digest in pending:
+            plan.unchanged += 1
+            plan.resolved[profile.pk] = pending[digest]
+            continue
+        if previous is None and digest in stored_pks:
+            checks.append((profile, stored_pks[digest], None))
+            continue
+        if previous is not None and stored_pks.get(previous) == profile.pk:
+            plan.replaced[profile.pk] = previous
+        pending[digest] = profile.pk
+        checks.append((profile, profile.pk, digest))
+
+    for start in range(0, len(checks), batch_size):
+        batch = checks[start : start + batch_size]
+        pipe = db.pipeline(transaction=False)
+        for _, pk, _ in batch:
+            pipe.exists(model.make_primary_key(pk))
+        for (profile, pk, digest), exists in zip(batch, pipe.execute()):
+            if digest is None:
+                if exists:
+                    plan.unchanged += 1
+                    if pk != profile.pk:
+                        plan.resolved[profile.pk] = pk
+                    continue
+                # the stored copy was deleted, so write this one again
+                plan.hashes[profile.pk] = content_hash(profile)
+                plan.new.append(profile)
+            else:
+                plan.hashes[profile.pk] = digest
+                (plan.changed if exists else plan.new).append(profile)
+    return plan
+
+
+def apply_import(plan: ImportPlan, batch_size: int) -> None:
+    db = plan.model.db()
+    hash_key, pk_key = _hash_key(plan.model), _pk_key(plan.model)
+    identity_key = _identity_key(plan.model)
+    writes = plan.writes
+    for start in range(0, len(writes), batch_size):
+        pipe = db.pipeline(transaction=False)
+        for profile in writes[start : start + batch_size]:
+            digest = plan.hashes[profile.pk]
+            profile.save(pipeline=pipe)
+            if profile.pk in plan.replaced:
+                pipe.hdel(hash_key, plan.replaced[profile.pk])
+            pipe.hset(hash_key, digest, profile.pk)
+            pipe.hset(pk_key, profile.pk, digest)
+            if identity(profile) is not None:
+                pipe.hset(identity_key, identity(profile), profile.pk)
+        pipe.execute()
+
+
+def without_imported(model: type, profiles: list[Any]) -> list[Any]:
+    """Drop the `profiles` whose content was imported, since Redis lists them already."""
+    imported = {
+        digest.decode() if isinstance(digest, bytes) else digest
+        for digest in model.db().hkeys(_hash_key(model))
+    }
+    if not imported:
+        return profiles
+    return [profile for profile in profiles if content_hash(profile) not in imported]
+
+
+def generate_combos(
+    envs: list[EnvironmentProfile],
+    agent_pks: list[str],
+    combos_per_env: int,
+    seed: int,
+) -> list[EnvAgentComboStorage]:
+    """Pair every environment with `combos_per_env` random distinct agent pairs."""
+    if combos_per_env <= 0 or len(agent_pks) < 2:
+        return []
+    rng = random.Random(seed)
+    combos = []
+    for env in envs:
+        for _ in range(combos_per_env):
+            first, second = sample_distinct_pair(len(agent_pks), rng)
+            combos.append(
+                EnvAgentComboStorage(
+                    env_id=env.pk, agent_ids=[agent_pks[first], agent_pks[second]]
+                )
+            )
+    return combos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dry-run", action="store_true", help="only print the diff")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--combos-per-env",
+        type=int,
+        default=0,
+        help="random agent pairings to store for every imported scenario",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    agents = agent_source.load()
+    envs = env_source.load()
+    plans = [
+        plan_import(AgentProfile, agents, args.batch_size),
+        plan_import(EnvironmentProfile, envs, args.batch_size),
+    ]
+    # combos only for scenarios that are written now, paired with all local agents
+    # under the pks they are stored with (unchanged ones keep their earlier pk)
+    agent_pks = [plans[0].stored_pk(agent) for agent in agents]
+    combos = generate_combos(plans[1].writes, agent_pks, args.combos_per_env, args.seed)
+    if combos:
+        plans.append(plan_import(EnvAgentComboStorage, combos, args.batch_size))
+
+    for plan in plans:
+        print(plan.summary())
+        for status, profiles in (("+", plan.new), ("~", plan.changed)):
+            for profile in profiles[:5]:
+                print(f"  {status} {profile.pk}")
+    if args.dry_run:
+        return
+
+    rows = 0
+    for plan in plans:
+        apply_import(plan, args.batch_size)
+        rows += len(plan.writes)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {rows} rows in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Per-session memory accounting and caps.
+
+Every `MEMORY_SAMPLE_INTERVAL` seconds a session estimates the deep size of
+its heavy session-state keys (`HEAVY_KEYS`) and reports them to the session
+registry, which serves the per-session and total figures to the admin panel
+and the metrics endpoint. Sizes are estimates: large containers are measured
+on a sample of their items and scaled up, and objects shared by all sessions
+(snapshots, classes, modules, threads) are not counted.
+
+Two caps, both in MB and disabled when 0:
+
+    SOCIALSTREAM_SESSION_MEMORY_CAP_MB  a session above it has its reloadable
+                                        caches (`EVICTABLE_KEYS`) evicted
+    SOCIALSTREAM_MEMORY_CAP_MB          while all sessions together are above
+                                        it, new episode loads are refused
+
+Evicted caches are not reloaded while they would push the session over its cap
+again, so a cache larger than the cap is not evicted and reloaded in a loop. A
+session kept over its cap by data that cannot be evicted keeps its caches and
+is flagged in the admin panel instead.
+
+Set `SOCIALSTREAM_ADMIN=1` to show the memory panel in the sidebar.
+"""
+
+import os
+import sys
+import time
+from collections import deque
+from queue import Queue
+from types import FunctionType, MethodType, ModuleType
+from typing import Any, Callable, Mapping, Optional
+
+import streamlit as st
+
+from socialstream.episode_snapshot import EpisodeSnapshot
+from socialstream.session_lifecycle import get_session_id, session_registry
+from socialstream.tracing import logger
+
+MB = 1024 * 1024
+MEMORY_SAMPLE_INTERVAL = float(
+    os.environ.get("SOCIALSTREAM_MEMORY_SAMPLE_INTERVAL", 30)
+)
+SESSION_MEMORY_CAP = (
+    float(os.environ.get("SOCIALSTREAM_SESSION_MEMORY_CAP_MB", 512)) * MB
+)
+TOTAL_MEMORY_CAP = float(os.environ.get("SOCIALSTREAM_MEMORY_CAP_MB", 0)) * MB
+ADMIN_VIEW = os.environ.get("SOCIALSTREAM_ADMIN", "") == "1"
+# items of a container measured before the rest is extrapolated
+SAMPLE_SIZE = 64
+
+HEAVY_KEYS = (
+    "current_episodes",
+    "messages",
+    "agent_mapping",
+    "env_mapping",
+    "websocket_manager",
+)
+# keys that are rebuilt on demand (see `render_episode`), in eviction order
+EVICTABLE_KEYS = ("current_episodes",)
+
+_ATOMIC = (str, bytes, bytearray, int, float, complex, bool, type(None))
+# shared by every session, or not data at all
+_SKIPPED = (type, ModuleType, FunctionType, MethodType, EpisodeSnapshot)
+
+
+def _websocket_queues(manager: Any) -> list[Any]:
+    # the thread, event loop and socket belong to the process, not the session
+    return [manager.message_queue, manager.receive_queue]
+
+
+# what to measure of a heavy key instead of the whole object
+MEASURED_PARTS: dict[str, Callable[[Any], Any]] = {
+    "websocket_manager": _websocket_queues
+}
+
+
+def _children(obj: Any) -> list[Any]:
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        return list(obj)
+    if isinstance(obj, Queue):
+        return [obj.queue]
+    children = list(vars(obj).values()) if hasattr(obj, "__dict__") else []
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                children.append(getattr(obj, name))
+    return children
+
+
+def estimate_size(obj: Any, sample_size: int = SAMPLE_SIZE) -> int:
+    """Approximate deep size of `obj` in bytes.
+
+    Containers with more than `sample_size` items are measured on evenly
+    spaced items and scaled up, so the cost stays bounded on large catalogs.
+    """
+    seen: set[int] = set()
+
+    def size(obj: Any) -> float:
+        if isinstance(obj, _SKIPPED) or id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        total = float(sys.getsizeof(obj))
+        if isinstance(obj, _ATOMIC):
+            return total
+        # dicts are sampled by item, so that every sample has a key and a value
+        groups = (
+            list(obj.items())
+            if isinstance(obj, dict)
+            else [(child,) for child in _children(obj)]
+        )
+        step = 1.0
+        if len(groups) > sample_size:
+            step = len(groups) / sample_size
+            groups = [groups[int(i * step)] for i in range(sample_size)]
+        return total + sum(size(item) for group in groups for item in group) * step
+
+    return int(size(obj))
+
+
+def measure_session(state: Mapping[str, Any]) -> dict[str, int]:
+    """Estimated bytes held by each heavy key of a session state."""
+    sizes = {}
+    for key in HEAVY_KEYS:
+        if key in state:
+            value = state[key]
+            if key in MEASURED_PARTS:
+                value = MEASURED_PARTS[key](value)
+            sizes[key] = estimate_size(value)
+    return sizes
+
+
+def evict(state: Any, sizes: dict[str, int], cap: float) -> list[str]:
+    """Drop evictable caches until the session's estimate is under `cap`."""
+    evicted = []
+    for key in EVICTABLE_KEYS:
+        if sum(sizes.values()) <= cap:
+            break
+        if sizes.get(key):
+            del state[key]
+            sizes[key] = 0
+            evicted.append(key)
+    return evicted
+
+
+def _retained(sizes: Mapping[str, int]) -> int:
+    """Bytes of the keys that eviction cannot free."""
+    return sum(size for key, size in sizes.items() if key not in EVICTABLE_KEYS)
+
+
+def sample_session_memory(force: bool = False) -> Optional[dict[str, int]]:
+    """Measure the current session if its last sample is older than the interval.
+
+    Runs from the script thread, since only it may read the session state.
+    Returns the sizes when a sample was taken.
+    """
+    session_id = get_session_id()
+    if session_id is None:
+        return None
+    sampled_at = session_registry.memory_sampled_at(session_id)
+    if not force and time.monotonic() - sampled_at < MEMORY_SAMPLE_INTERVAL:
+        return None
+    sizes = measure_session(st.session_state)
+    total = sum(sizes.values())
+    if SESSION_MEMORY_CAP and total > SESSION_MEMORY_CAP:
+        if _retained(sizes) > SESSION_MEMORY_CAP:
+            # evicting would not get it under the cap, see render_memory_panel
+            logger.warning(
+                "Session %s over its memory cap with %.0f MB that cannot be evicted",
+                session_id,
+                _retained(sizes) / MB,
+            )
+        else:
+            evicted = evict(st.session_state, sizes, SESSION_MEMORY_CAP)
+            # remembered so that admit_load does not reload them right away
+            st.session_state.evicted_bytes = total - sum(sizes.values())
+            logger.info(
+                "Session %s over its memory cap, evicted %s", session_id, evicted
+            )
+    session_registry.record_memory(session_id, sizes)
+    return sizes
+
+
+def admit_load(reload: bool = False) -> bool:
+    """Whether the current session may load more data (e.g. an episode list).
+
+    With `reload`, the data is what `sample_session_memory` evicted; it is
+    refused while it would put the session over its cap again.
+    """
+    if (
+        TOTAL_MEMORY_CAP
+        and session_registry.totals()["memory_bytes"] > TOTAL_MEMORY_CAP
+    ):
+        return False
+    session_id = get_session_id()
+    if reload and SESSION_MEMORY_CAP and session_id is not None:
+        sizes = session_registry.memory_report().get(session_id, {})
+        evicted = st.session_state.get("evicted_bytes", 0)
+        if _retained(sizes) + evicted > SESSION_MEMORY_CAP:
+            return False
+    return True
+
+
+def render_memory_panel() -> None:
+    """Sidebar table of every session's estimated memory, largest first."""
+    report = session_registry.memory_report()
+    current = get_session_id()
+    with st.sidebar.expander("Memory", expanded=True):
+        total = sum(sum(sizes.values()) for sizes in report.values())
+        cap = f" of {TOTAL_MEMORY_CAP / MB:.0f} MB" if TOTAL_MEMORY_CAP else ""
+        st.markdown(f"**{total / MB:.1f} MB{cap}** in {len(report)} sessions")
+        rows = [
+            {
+                "session": session_id[:8] + (" (you)" if session_id == current else ""),
+                "total MB": round(sum(sizes.values()) / MB, 2),
+                # still over the cap after eviction, see sample_session_memory
+                "over cap": bool(SESSION_MEMORY_CAP)
+                and sum(sizes.values()) > SESSION_MEMORY_CAP,
+                **{f"{key} MB": round(sizes.get(key, 0) / MB, 2) for key in HEAVY_KEYS},
+            }
+            for session_id, sizes in report.items()
+        ]
+        st.dataframe(
+            sorted(rows, key=lambda row: -row["total MB"]),
+            hide_index=True,
+            use_container_width=True,
+        )
@@ -0,0 +1,175 @@
+"""Compact in-session storage of a conversation's messages.
+
+A chat session keeps every `(sender, receiver, Message)` of the episode so the
+transcript can be re-rendered on each rerun. Holding the pydantic objects
+themselves is wasteful: every turn adds one `Observation` per agent, the agents
+of a turn receive the same text, and consecutive observations often repeat the
+text that came before. `ConversationStore` keeps slotted records instead:
+
+- sender and receiver names are interned,
+- the other fields of a message are kept as one shared, interned tuple,
+- an observation's text is stored as a delta against the previous observation
+  (the length of their common prefix plus the new tail), with a full copy every
+  `KEYFRAME_INTERVAL` observations so rebuilding one stays cheap.
+
+Messages are rebuilt as `Message` objects only when a turn is read.
+"""
+
+import sys
+from typing import Any, Iterable, Iterator, Optional
+
+from sotopia.messages import AgentAction, Message, Observation
+
+KEYFRAME_INTERVAL = 32
+# shorter shared prefixes are not worth a delta
+MIN_SHARED_PREFIX = 64
+# the field holding the bulk of each message's text
+TEXT_FIELDS: dict[type, str] = {Observation: "last_turn", AgentAction: "argument"}
+
+Turn = list[tuple[str, str, Message]]
+
+
+def _shared_prefix(previous: str, text: str) -> int:
+    """Length of the common prefix of `previous` and `text`."""
+    if text.startswith(previous):
+        return len(previous)
+    low, high = 0, min(len(previous), len(text))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if text.startswith(previous[:middle]):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class _Record:
+    __slots__ = ("sender", "receiver", "kind", "values", "base", "shared", "tail")
+
+    def __init__(
+        self,
+        sender: str,
+        receiver: str,
+        kind: type,
+        values: tuple[Any, ...],
+        base: Optional["_Record"] = None,
+        shared: int = 0,
+        tail: str = "",
+    ) -> None:
+        self.sender = sender
+        self.receiver = receiver
+        self.kind = kind
+        self.values = values
+        # delta-encoded text: `base`'s text up to `shared`, then `tail`
+        self.base = base
+        self.shared = shared
+        self.tail = tail
+
+    def text(self) -> str:
+        chain = [self]
+        while chain[-1].base is not None:
+            chain.append(chain[-1].base)  # type: ignore
+        text = ""
+        for record in reversed(chain):
+            text = text[: record.shared] + record.tail
+        return text
+
+
+class ConversationStore:
+    """Turns of `(sender, receiver, Message)` tuples, stored compactly.
+
+    Supports the list operations the chat code uses on a conversation:
+    `append(turn)`, `len()`, iteration and indexing, which return freshly
+    built `Message` objects. Use `append_to_last_turn` instead of
+    `store[-1].append(...)`.
+    """
+
+    def __init__(self, turns: Iterable[Iterable[tuple[str, str, Message]]] = ()):
+        self._turns: list[list[_Record]] = []
+        self._values: dict[tuple[Any, ...], tuple[Any, ...]] = {}
+        # field names (other than the text field) and list fields, per class
+        self._layouts: dict[type, tuple[tuple[str, ...], frozenset[str]]] = {}
+        self._last_observation: Optional[_Record] = None
+        self._last_observation_text = ""
+        self._depth = 0
+        for turn in turns:
+            self.append(turn)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        # rebuild observation texts in order, applying each delta once
+        texts: dict[int, str] = {}
+        for turn in self._turns:
+            yield [self._materialize(record, texts) for record in turn]
+
+    def __getitem__(self, idx: int) -> Turn:
+        return [self._materialize(record) for record in self._turns[idx]]
+
+    def append(self, turn: Iterable[tuple[str, str, Message]]) -> None:
+        self._turns.append([])
+        for sender, receiver, message in turn:
+            self.append_to_last_turn(sender, receiver, message)
+
+    def append_to_last_turn(self, sender: str, receiver: str, message: Message) -> None:
+        self._turns[-1].append(self._record(sender, receiver, message))
+
+    def _record(self, sender: str, receiver: str, message: Message) -> _Record:
+        kind = type(message)
+        data = message.dict()
+        text_field = TEXT_FIELDS.get(kind)
+        text = data.pop(text_field) if text_field else ""
+        if kind not in self._layouts:
+            lists = frozenset(
+                name for name, value in data.items() if isinstance(value, list)
+            )
+            self._layouts[kind] = (tuple(data), lists)
+        values = tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in data.values()
+        )
+        try:
+            values = self._values.setdefault(values, values)
+        except TypeError:
+            pass  # unhashable field values are kept as they are
+        record = _Record(sys.intern(sender), sys.intern(receiver), kind, values)
+
+        if kind is not Observation:
+            record.tail = text
+            return record
+        shared = _shared_prefix(self._last_observation_text, text)
+        if shared >= MIN_SHARED_PREFIX and self._depth < KEYFRAME_INTERVAL:
+            record.base = self._last_observation
+            record.shared = shared
+            record.tail = text[shared:]
+            self._depth += 1
+        else:
+            record.tail = text
+            self._depth = 0
+        self._last_observation = record
+        self._last_observation_text = text
+        return record
+
+    def _materialize(
+        self, record: _Record, texts: Optional[dict[int, str]] = None
+    ) -> tuple[str, str, Message]:
+        names, lists = self._layouts[record.kind]
+        fields = {
+            name: list(value) if name in lists else value
+            for name, value in zip(names, record.values)
+        }
+        text_field = TEXT_FIELDS.get(record.kind)
+        if text_field:
+            if record.base is None:
+                text = record.tail
+            elif texts is not None and id(record.base) in texts:
+                text = texts[id(record.base)][: record.shared] + record.tail
+            else:
+                text = record.text()
+            if texts is not None and record.kind is Observation:
+                # only the previous observation's text is needed for the next one
+                texts.clear()
+                texts[id(record)] = text
+            fields[text_field] = text
+        return record.sender, record.receiver, record.kind(**fields)
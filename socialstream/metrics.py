@@ -0,0 +1,366 @@
+"""Prometheus-compatible metrics, served as text from a side thread.
+
+Set `SOCIALSTREAM_METRICS_PORT` to expose `http://<host>:<port>/metrics`.
+
+Counters and histograms record into a per-thread shard (a plain dict only its
+own thread writes to), so the recording path takes no lock; shards are summed
+when the endpoint is scraped. Shards of threads that have exited (Streamlit
+starts one per rerun) are folded into a base total and dropped. Gauges are
+callbacks evaluated at scrape time.
+"""
+
+import bisect
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, Optional
+
+from socialstream.admission import admission_controller
+from socialstream.session_lifecycle import session_registry
+
+METRICS_PORT = os.environ.get("SOCIALSTREAM_METRICS_PORT", "")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return {"inf": "+Inf", "-inf": "-Inf", "nan": "NaN"}.get(repr(value), repr(value))
+
+
+class _ShardedMetric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._local = threading.local()
+        # (owning thread, its shard); counts of exited threads live in `_base`
+        self._shards: list[tuple[weakref.ref[threading.Thread], dict]] = []
+        self._base: dict[LabelValues, Any] = {}
+        self._shards_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict[LabelValues, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:  # once per thread
+                self._prune()
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+            self._local.shard = shard
+        return shard
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _merge(self, shard: dict[LabelValues, Any]) -> None:
+        raise NotImplementedError
+
+    def _prune(self) -> None:
+        """Fold the shards of exited threads into `_base`; needs `_shards_lock`."""
+        live = []
+        for ref, shard in self._shards:
+            thread = ref()
+            if thread is not None and thread.is_alive():
+                live.append((ref, shard))
+            else:
+                # an exited thread no longer writes to its shard
+                self._merge(shard)
+        self._shards = live
+
+    def _snapshots(self) -> list[dict[LabelValues, Any]]:
+        with self._shards_lock:
+            self._prune()
+            # histogram cells of the base are added to in place by `_merge`
+            base = {
+                key: list(value) if isinstance(value, list) else value
+                for key, value in self._base.items()
+            }
+            shards = [shard for _, shard in self._shards]
+        # dict copies are atomic under the GIL
+        return [base] + [dict(shard) for shard in shards]
+
+    def expose(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+
+    def _merge(self, shard: dict[LabelValues, float]) -> None:
+        for key, value in shard.items():
+            self._base[key] = self._base.get(key, 0.0) + value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def values(self) -> dict[LabelValues, float]:
+        totals: dict[LabelValues, float] = {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def expose(self) -> list[str]:
+        lines = super().expose()
+        for key, value in sorted(self.values().items()):
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _merge(self, shard: dict[LabelValues, list[float]]) -> None:
+        for key, cells in shard.items():
+            total = self._base.setdefault(key, [0.0] * len(cells))
+            for idx, value in enumerate(cells):
+                total[idx] += value
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        # [count per bucket ..., count above the last bucket, sum]
+        cells = shard.get(key)
+        if cells is None:
+            cells = shard[key] = [0.0] * (len(self.buckets) + 2)
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def values(self) -> dict[LabelValues, list[float]]:
+        totals: dict[LabelValues, list[float]] = {}
+        for shard in self._snapshots():
+            for key, cells in shard.items():
+                total = totals.setdefault(key, [0.0] * len(cells))
+                for idx, value in enumerate(list(cells)):
+                    total[idx] += value
+        return totals
+
+    def expose(self) -> list[str]:
+        lines = super().expose()
+        for key, cells in sorted(self.values().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, cells):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, le=str(bound))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            count = cumulative + cells[-2]
+            labels = _format_labels(self.labelnames, key, le="+Inf")
+            lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(cells[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class Gauge:
+    """Value computed by `read` at scrape time, a number or `{label values: number}`."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float | dict[LabelValues, float]],
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.labelnames = labelnames
+        REGISTRY.append(self)
+
+    def expose(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"Error reading gauge {self.name}: {e}")
+            return lines
+        values = value if isinstance(value, dict) else {(): value}
+        for key, number in sorted(values.items()):
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(number)}")
+        return lines
+
+
+REGISTRY: list[Any] = []
+
+
+def render_exposition() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.expose()) + "\n"
+
+
+def _session_totals() -> dict[str, Any]:
+    return session_registry.totals()
+
+
+turn_latency = Histogram(
+    "socialstream_turn_latency_seconds",
+    "Time for an LLM agent to produce its action in a turn.",
+    ("model",),
+    buckets=LLM_BUCKETS,
+)
+evaluation_latency = Histogram(
+    "socialstream_evaluation_latency_seconds",
+    "Time of the final environment step that runs the terminal evaluators.",
+    ("model",),
+    buckets=LLM_BUCKETS,
+)
+redis_query_latency = Histogram(
+    "socialstream_redis_query_latency_seconds",
+    "Latency of Redis queries and pipelines.",
+    ("query",),
+)
+rerun_duration = Histogram(
+    "socialstream_rerun_duration_seconds",
+    "Wall time of a Streamlit script run.",
+    ("mode",),
+)
+turns_total = Counter(
+    "socialstream_turns_total", "Agent turns taken, by model.", ("model",)
+)
+ws_messages_total = Counter(
+    "socialstream_ws_messages_total",
+    "Messages sent to or received from the simulation server.",
+    ("direction",),
+)
+active_sessions = Gauge(
+    "socialstream_active_sessions",
+    "Browser sessions that sent a heartbeat recently.",
+    lambda: _session_totals()["sessions"],
+)
+ws_queue_depth = Gauge(
+    "socialstream_ws_queue_depth",
+    "Messages waiting in WebSocketManager queues, over all sessions.",
+    lambda: _session_totals()["queued_messages"],
+)
+ws_queue_bytes = Gauge(
+    "socialstream_ws_queue_bytes",
+    "Approximate payload bytes waiting in WebSocketManager queues.",
+    lambda: _session_totals()["queued_bytes"],
+)
+session_memory_bytes = Gauge(
+    "socialstream_session_memory_bytes",
+    "Estimated bytes held in session state, over all sessions (sampled).",
+    lambda: _session_totals()["memory_bytes"],
+)
+admitted_episodes = Gauge(
+    "socialstream_admitted_episodes",
+    "Chat episodes holding an admission slot.",
+    lambda: admission_controller.stats()["active"],
+)
+admission_queue_length = Gauge(
+    "socialstream_admission_queue_length",
+    "Chat sessions waiting for an admission slot.",
+    lambda: admission_controller.stats()["queued"],
+)
+inflight_turns = Gauge(
+    "socialstream_inflight_turns",
+    "Agent turns currently waiting on a model.",
+    lambda: {
+        (model,): count
+        for model, count in admission_controller.stats()["inflight"].items()
+    },
+    ("model",),
+)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # scrapes every few seconds would flood stdout
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[int]:
+    """Start the endpoint once per process; returns the port or None if disabled."""
+    global _server, _server_failed
+    if port is None:
+        if not METRICS_PORT:
+            return None
+        port = int(METRICS_PORT)
+    with _server_lock:
+        if _server_failed:
+            return None
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("", port), _MetricsHandler)
+            except OSError as e:
+                # e.g. another Streamlit process already serves this port
+                print(f"Could not start metrics server on port {port}: {e}")
+                _server_failed = True
+                return None
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+            print(f"Serving metrics on port {_server.server_address[1]}")
+        return _server.server_address[1]
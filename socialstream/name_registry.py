@@ -0,0 +1,114 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+
+def _base_name(profile: Any) -> str:
+    return f"{profile.first_name} {profile.last_name}"
+
+
+def _content_key(profile: Any) -> tuple[str, str, str]:
+    """Order profiles by name and content; profiles loaded from data/ files get a
+    random pk on every start, so the pk only breaks ties."""
+    content = {key: value for key, value in profile.dict().items() if key != "pk"}
+    digest = hashlib.sha1(
+        json.dumps(content, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return _base_name(profile), digest, profile.pk or ""
+
+
+class NameRegistry:
+    """Assigns every agent profile a unique display name in O(1).
+
+    The first profile called "Jane Doe" keeps that name; later ones become
+    "Jane Doe_2", "Jane Doe_3", ... The registry keeps the set of used names and
+    one counter per base name, so nothing is rescanned when a name is assigned.
+
+    A registry built with `parent` is a private overlay: lookups fall through to
+    the parent and new names are only recorded in the overlay, which lets
+    sessions share one read-only registry per catalog.
+    """
+
+    def __init__(self, parent: Optional["NameRegistry"] = None) -> None:
+        self._parent = parent
+        self._names: dict[str, str] = {}
+        self._used: set[str] = set()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profiles(cls, profiles: Iterable[Any]) -> "NameRegistry":
+        """Build a registry whose names depend only on the set of profiles.
+
+        Profiles are named in order of their name and content (pk only breaks
+        ties between identical profiles), so the same catalog yields the same
+        names across restarts regardless of the order Redis returns them in.
+        """
+        registry = cls()
+        for profile in sorted(profiles, key=_content_key):
+            registry.name_for(profile)
+        return registry
+
+    def get(self, pk: str) -> Optional[str]:
+        name = self._names.get(pk)
+        if name is None and self._parent is not None:
+            return self._parent.get(pk)
+        return name
+
+    def __contains__(self, pk: str) -> bool:
+        return self.get(pk) is not None
+
+    def __len__(self) -> int:
+        return len(self._names) + (len(self._parent) if self._parent else 0)
+
+    def name_for(self, profile: Any) -> str:
+        name = self.get(profile.pk)
+        if name is not None:
+            return name
+        with self._lock:
+            base_name = _base_name(profile)
+            name = base_name
+            while self._is_used(name):
+                count = self._counter(base_name) + 1
+                self._counters[base_name] = count
+                name = f"{base_name}_{count}"
+            if name == base_name:
+                self._counters[base_name] = 1
+            self._used.add(name)
+            self._names[profile.pk] = name
+        return name
+
+    def _is_used(self, name: str) -> bool:
+        return name in self._used or (
+            self._parent is not None and self._parent._is_used(name)
+        )
+
+    def _counter(self, base_name: str) -> int:
+        if base_name in self._counters:
+            return self._counters[base_name]
+        if self._parent is not None:
+            return self._parent._counter(base_name)
+        return 0
+
+
+_SHARED_REGISTRIES: "OrderedDict[tuple[str, ...], NameRegistry]" = OrderedDict()
+_SHARED_REGISTRIES_SIZE = 4
+_shared_lock = threading.Lock()
+
+
+def get_shared_registry(profiles: list[Any]) -> NameRegistry:
+    """Return the process-wide registry for this catalog, building it on first use."""
+    key = tuple(profile.pk for profile in profiles)
+    with _shared_lock:
+        registry = _SHARED_REGISTRIES.get(key)
+        if registry is not None:
+            _SHARED_REGISTRIES.move_to_end(key)
+            return registry
+    registry = NameRegistry.from_profiles(profiles)
+    with _shared_lock:
+        _SHARED_REGISTRIES[key] = registry
+        while len(_SHARED_REGISTRIES) > _SHARED_REGISTRIES_SIZE:
+            _SHARED_REGISTRIES.popitem(last=False)
+    return registry
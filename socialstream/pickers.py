@@ -0,0 +1,40 @@
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+from socialstream.search_index import TOP_K, SearchIndex
+
+
+def typeahead_selectbox(
+    label: str,
+    search_index: SearchIndex,
+    key: str,
+    disabled: bool = False,
+    on_change: Optional[Callable[..., None]] = None,
+    k: int = TOP_K,
+    **selectbox_kwargs: Any,
+) -> Any:
+    """A selectbox that only sends the top-`k` matches of a search box to the browser.
+
+    The current selection is always kept among the options so that filtering
+    never resets the widget.
+    """
+    query = st.text_input(
+        f"Search {label}",
+        key=f"{key}_query",
+        disabled=disabled,
+        placeholder=f"Search ({len(search_index)} options)...",
+        label_visibility="collapsed",
+    )
+    options = search_index.search(query, k)
+    current = st.session_state.get(key)
+    if current is not None and current not in options:
+        options = [current] + options
+    return st.selectbox(
+        label,
+        options,
+        key=key,
+        disabled=disabled,
+        on_change=on_change,
+        **selectbox_kwargs,
+    )
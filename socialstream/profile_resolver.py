@@ -0,0 +1,130 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Sequence
+
+from redis_om.model.model import NotFoundError
+from sotopia.database import AgentProfile, EnvironmentProfile, EpisodeLog
+
+from socialstream.metrics import redis_query_latency
+from socialstream.tracing import logger
+
+PROFILE_CACHE_SIZE = 4096
+
+CacheKey = tuple[str, str]
+
+
+def multi_get(requests: Sequence[tuple[type, str]]) -> list[Optional[Any]]:
+    """Fetch `(model, pk)` pairs with one pipelined round-trip; None for missing keys."""
+    if not requests:
+        return []
+    # all sotopia models live in the same database, so one pipeline serves all
+    pipe = requests[0][0].db().pipeline(transaction=False)
+    for model, pk in requests:
+        pipe.json().get(model.make_primary_key(pk))
+    with redis_query_latency.time(query="multi_get"):
+        responses = pipe.execute()
+    results: list[Optional[Any]] = []
+    for (model, pk), data in zip(requests, responses):
+        if data is None:
+            results.append(None)
+            continue
+        if isinstance(data, (str, bytes)):
+            data = json.loads(data)
+        data["pk"] = pk
+        results.append(model(**data))
+    return results
+
+
+class ProfileResolver:
+    """Batched pk -> profile lookups behind a process-wide LRU.
+
+    `resolve` collects every pk that is not cached yet and fetches them with a
+    single pipelined round-trip, so rendering a page of episodes costs one
+    Redis call instead of one per profile. The returned profiles are shared
+    between sessions, so copy one before editing it.
+    """
+
+    def __init__(self, max_size: int = PROFILE_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._cache: "OrderedDict[CacheKey, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(
+        self, requests: Iterable[tuple[type, str]], missing_ok: bool = False
+    ) -> dict[CacheKey, Any]:
+        """Return `{(model name, pk): profile}` for all requested `(model, pk)` pairs.
+
+        Raises `NotFoundError` for a pk that does not exist, or with `missing_ok`
+        leaves it out of the result.
+        """
+        found: dict[CacheKey, Any] = {}
+        missing: dict[CacheKey, type] = {}
+        with self._lock:
+            for model, pk in requests:
+                key = (model.__name__, pk)
+                if key in found or key in missing:
+                    continue
+                profile = self._cache.get(key)
+                if profile is None:
+                    missing[key] = model
+                else:
+                    self._cache.move_to_end(key)
+                    found[key] = profile
+        if not missing:
+            return found
+
+        fetched = {}
+        results = multi_get([(model, pk) for (_, pk), model in missing.items()])
+        for key, profile in zip(missing, results):
+            if profile is None:
+                if not missing_ok:
+                    raise NotFoundError(f"{key[0]} {key[1]} not found")
+                logger.warning("Skipping missing %s %s", *key)
+                continue
+            fetched[key] = profile
+
+        with self._lock:
+            for key, profile in fetched.items():
+                self._cache[key] = profile
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        found.update(fetched)
+        return found
+
+    def prefetch_episodes(self, episodes: Iterable[EpisodeLog]) -> None:
+        """Load the agents and environments of all `episodes` in one round-trip.
+
+        Best effort: profiles that no longer exist are skipped, so one broken
+        episode does not stop the others from loading.
+        """
+        requests: list[tuple[type, str]] = []
+        for episode in episodes:
+            requests.append((EnvironmentProfile, episode.environment))
+            requests.extend((AgentProfile, pk) for pk in episode.agents)
+        self.resolve(requests, missing_ok=True)
+
+    def agents(self, pks: list[str]) -> list[AgentProfile]:
+        profiles = self.resolve((AgentProfile, pk) for pk in pks)
+        return [profiles[("AgentProfile", pk)] for pk in pks]
+
+    def environment(self, pk: str) -> EnvironmentProfile:
+        return self.resolve([(EnvironmentProfile, pk)])[("EnvironmentProfile", pk)]
+
+    def episode_profiles(
+        self, episode: EpisodeLog
+    ) -> tuple[list[AgentProfile], EnvironmentProfile]:
+        self.prefetch_episodes([episode])
+        return self.agents(episode.agents), self.environment(episode.environment)
+
+    def invalidate(self, keys: Optional[Iterable[CacheKey]] = None) -> None:
+        with self._lock:
+            if keys is None:
+                self._cache.clear()
+                return
+            for key in keys:
+                self._cache.pop(key, None)
+
+
+profile_resolver = ProfileResolver()
@@ -0,0 +1,137 @@
+import glob
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Iterator, Optional
+
+from sotopia.database import AgentProfile, EnvironmentProfile
+
+LARGE_FILE_BYTES = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_PROFILE_CLASSES: dict[str, type] = {
+    "agents": AgentProfile,
+    "scenarios": EnvironmentProfile,
+}
+
+
+def iter_json_array(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without reading the whole file."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill(buf: str, pos: int) -> tuple[str, int, bool]:
+        # grow the read size with the pending data so huge elements stay linear
+        data = f.read(max(chunk_size, len(buf) - pos))
+        return buf[pos:] + data, 0, not data
+
+    started = False
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            buf, pos, eof = fill(buf, pos)
+            continue
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array of profiles")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        if buf[pos] == ",":
+            pos += 1
+            continue
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buf, pos, eof = fill(buf, pos)
+            continue
+        if (
+            not eof
+            and not isinstance(item, (dict, list, str))
+            and (end == len(buf) or buf[end] not in " \t\r\n,]")
+        ):
+            # a number or literal at the end of the buffer may have been cut off
+            buf, pos, eof = fill(buf, pos)
+            continue
+        yield item
+        pos = end
+
+
+def parse_profile_file(path: str, kind: str) -> list[Any]:
+    """Parse and validate every profile in `path`; runs in worker processes too."""
+    profile_cls = _PROFILE_CLASSES[kind]
+    with open(path) as f:
+        return [profile_cls(**data) for data in iter_json_array(f)]
+
+
+class FileProfileSource:
+    """Profiles from `data/*_{kind}.json`, cached per file by (path, mtime, size).
+
+    Only new or changed files are parsed again, and removed files are dropped.
+    Files larger than `large_file_bytes` are parsed and validated in a process
+    pool. The returned profiles are shared between sessions, so copy one before
+    editing it.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        data_dir: str = "data",
+        large_file_bytes: int = LARGE_FILE_BYTES,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.kind = kind
+        self.pattern = os.path.join(data_dir, f"*_{kind}.json")
+        self.large_file_bytes = large_file_bytes
+        self.max_workers = max_workers
+        self._cache: dict[str, tuple[tuple[int, int], list[Any]]] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> list[Any]:
+        with self._lock:
+            stats = {}
+            for path in sorted(glob.glob(self.pattern)):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # removed between glob and stat
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+
+            stale = [
+                path
+                for path, key in stats.items()
+                if path not in self._cache or self._cache[path][0] != key
+            ]
+            large = [path for path in stale if stats[path][1] >= self.large_file_bytes]
+            parsed = self._parse_in_pool(large) if large else {}
+            for path in stale:
+                profiles = parsed.get(path)
+                if profiles is None:
+                    profiles = parse_profile_file(path, self.kind)
+                self._cache[path] = (stats[path], profiles)
+            for path in set(self._cache) - set(stats):
+                del self._cache[path]
+
+            return [profile for path in stats for profile in self._cache[path][1]]
+
+    def _parse_in_pool(self, paths: list[str]) -> dict[str, list[Any]]:
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                results = pool.map(parse_profile_file, paths, [self.kind] * len(paths))
+                return dict(zip(paths, results))
+        except Exception as e:
+            # e.g. no fork support or unpicklable models: parse in-process instead
+            print(f"Falling back to in-process parsing of {self.kind} files: {e}")
+            return {}
+
+
+agent_source = FileProfileSource("agents")
+env_source = FileProfileSource("scenarios")
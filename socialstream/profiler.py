@@ -0,0 +1,198 @@
+"""Per-rerun phase timings.
+
+`begin_rerun()` at the top of the script starts a trace for the current thread
+when profiling is enabled for the session; `span(name)` / `@profiled(name)`
+then record nested phases into it. When profiling is off, `span` returns a
+shared no-op context after a single thread-local lookup.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, ContextManager, Optional, TypeVar
+
+import streamlit as st
+
+PROFILE_BY_DEFAULT = os.environ.get("SOCIALSTREAM_PROFILE", "") == "1"
+ROLLING_WINDOW = 1000
+# the live stream view keeps one rerun open while it polls, cap what it records
+MAX_SPANS_PER_RERUN = 2000
+UNATTRIBUTED = "(streamlit / unattributed)"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NOOP = nullcontext()
+_local = threading.local()
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    start: float
+    end: float
+    depth: int
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class RerunTrace:
+    start: float = field(default_factory=time.perf_counter)
+    end: float = 0.0
+    spans: list[SpanRecord] = field(default_factory=list)
+    depth: int = 0
+    dropped: int = 0
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start", "depth")
+
+    def __init__(self, trace: RerunTrace, name: str) -> None:
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.depth = self.trace.depth
+        self.trace.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        end = time.perf_counter()
+        self.trace.depth -= 1
+        if len(self.trace.spans) < MAX_SPANS_PER_RERUN:
+            self.trace.spans.append(SpanRecord(self.name, self.start, end, self.depth))
+        else:
+            self.trace.dropped += 1
+
+
+def span(name: str) -> ContextManager[Any]:
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator form of `span`; sync functions only."""
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trace = getattr(_local, "trace", None)
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+class PhaseStats:
+    """Rolling window of recent durations per phase, shared by all sessions."""
+
+    def __init__(self, window: int = ROLLING_WINDOW) -> None:
+        self.window = window
+        self._durations: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, trace: RerunTrace) -> None:
+        with self._lock:
+            for name, duration in _phase_totals(trace).items():
+                if name not in self._durations:
+                    self._durations[name] = deque(maxlen=self.window)
+                self._durations[name].append(duration)
+
+    def percentiles(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            snapshot = {name: sorted(d) for name, d in self._durations.items()}
+        result = {}
+        for name, durations in snapshot.items():
+            n = len(durations)
+            result[name] = {
+                "n": n,
+                **{
+                    f"p{q}": durations[min(n - 1, int(n * q / 100))]
+                    for q in (50, 95, 99)
+                },
+            }
+        return result
+
+
+def _phase_totals(trace: RerunTrace) -> dict[str, float]:
+    totals: dict[str, float] = {"rerun": trace.duration}
+    top_level = 0.0
+    for record in trace.spans:
+        totals[record.name] = totals.get(record.name, 0.0) + record.duration
+        if record.depth == 0:
+            top_level += record.duration
+    totals[UNATTRIBUTED] = max(0.0, trace.duration - top_level)
+    return totals
+
+
+phase_stats = PhaseStats()
+
+
+def begin_rerun(enabled: bool) -> None:
+    _local.trace = RerunTrace() if enabled else None
+
+
+def end_rerun() -> Optional[RerunTrace]:
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.end = time.perf_counter()
+    phase_stats.record(trace)
+    return trace
+
+
+def render_profiler_panel(trace: Optional[RerunTrace]) -> None:
+    """Sidebar waterfall of `trace` plus rolling percentiles of every phase."""
+    with st.sidebar.expander("Profiler", expanded=True):
+        if trace is None:
+            st.caption("Profiling starts with the next rerun.")
+            return
+        total = trace.duration or 1e-9
+        rows = []
+        for record in sorted(trace.spans, key=lambda r: r.start):
+            left = (record.start - trace.start) / total * 100
+            width = max(record.duration / total * 100, 0.5)
+            rows.append(
+                f"<div style='font-size: 12px; padding-left: {record.depth * 10}px'>"
+                f"{record.name} <b>{record.duration * 1000:.1f} ms</b></div>"
+                f"<div style='margin-left: {left:.1f}%; width: {width:.1f}%; "
+                f"height: 6px; background-color: steelblue'></div>"
+            )
+        dropped = f" ({trace.dropped} spans not shown)" if trace.dropped else ""
+        st.markdown(
+            f"**Last rerun: {total * 1000:.1f} ms**{dropped}" + "".join(rows),
+            unsafe_allow_html=True,
+        )
+        st.dataframe(
+            [
+                {
+                    "phase": name,
+                    "n": stats["n"],
+                    **{
+                        f"{q} ms": round(stats[q] * 1000, 1)
+                        for q in ("p50", "p95", "p99")
+                    },
+                }
+                for name, stats in sorted(phase_stats.percentiles().items())
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
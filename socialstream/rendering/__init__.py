@@ -1,4 +1,5 @@
 from .render_chat_websocket import chat_demo
 from .render_episode import rendering_demo
+from .render_leaderboard import leaderboard_demo
 
-__all__ = ["rendering_demo", "chat_demo"]
+__all__ = ["rendering_demo", "chat_demo", "leaderboard_demo"]
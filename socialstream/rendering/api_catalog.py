@@ -0,0 +1,204 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = os.environ.get("SOTOPIA_API_URL", "http://localhost:8000")
+CATALOG_SNAPSHOT_PATH = os.environ.get(
+    "SOCIALSTREAM_CATALOG_SNAPSHOT", "~/.cache/socialstream/catalog.json"
+)
+CATALOG_TTL = float(os.environ.get("SOCIALSTREAM_CATALOG_TTL", 60))
+CATALOG_ENDPOINTS = ("scenarios", "agents", "models")
+
+
+def simulation_ws_url(base_url: str = API_BASE_URL, token: str = "demo-token") -> str:
+    """The `/ws/simulation` endpoint of the API server at `base_url`."""
+    ws_base = re.sub(r"^http", "ws", base_url.rstrip("/"))
+    return f"{ws_base}/ws/simulation?token={token}"
+
+
+@dataclass
+class CatalogEntry:
+    body: list[Any]
+    etag: Optional[str]
+    fetched_at: float
+    version: int = 0
+
+
+class ApiCatalog:
+    """Process-wide cache of the `/scenarios`, `/agents` and `/models` endpoints.
+
+    The three endpoints are fetched concurrently over one pooled HTTP session and
+    revalidated with `If-None-Match`. Every successful refresh is written to an
+    on-disk snapshot, so that new sessions can start from it while the API server
+    is slow or restarting; stale entries are served immediately and revalidated
+    in the background.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        snapshot_path: Optional[str] = CATALOG_SNAPSHOT_PATH,
+        ttl: float = CATALOG_TTL,
+        timeout: float = 5.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.snapshot_path = (
+            os.path.expanduser(snapshot_path) if snapshot_path else None
+        )
+        self.ttl = ttl
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(CATALOG_ENDPOINTS))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(CATALOG_ENDPOINTS), thread_name_prefix="catalog"
+        )
+
+        self._lock = threading.Lock()
+        self._entries: dict[str, CatalogEntry] = {}
+        self._views: dict[str, tuple[int, Any]] = {}
+        self._refreshing: Optional[threading.Thread] = None
+        self._load_snapshot()
+
+    def scenarios(self) -> dict[str, dict[str, Any]]:
+        return self._view(
+            "scenarios",
+            lambda scenarios: {
+                scenario["codename"]: scenario for scenario in scenarios
+            },
+        )
+
+    def agents(self) -> dict[str, dict[str, Any]]:
+        return self._view(
+            "agents",
+            lambda agents: {
+                f"{agent['first_name']} {agent['last_name']}": agent for agent in agents
+            },
+        )
+
+    def models(self) -> dict[str, str]:
+        return self._view("models", lambda models: {model: model for model in models})
+
+    def refresh(self) -> None:
+        """Revalidate all endpoints concurrently and block until they are done."""
+        results = list(self._executor.map(self._revalidate, CATALOG_ENDPOINTS))
+        if any(results):
+            self._save_snapshot()
+
+    def _view(self, endpoint: str, build: Callable[[list[Any]], Any]) -> Any:
+        """Return the mapping built from `endpoint`, rebuilding it only when it changed.
+
+        The returned dict is shared between sessions and must not be mutated.
+        """
+        entry = self._ensure_entry(endpoint)
+        with self._lock:
+            cached = self._views.get(endpoint)
+            if cached is not None and cached[0] == entry.version:
+                return cached[1]
+        view = build(entry.body)
+        with self._lock:
+            self._views[endpoint] = (entry.version, view)
+        return view
+
+    def _ensure_entry(self, endpoint: str) -> CatalogEntry:
+        with self._lock:
+            entry = self._entries.get(endpoint)
+        if entry is None:
+            # cold start without snapshot: nothing to serve, fetch synchronously
+            self.refresh()
+            with self._lock:
+                entry = self._entries.get(endpoint)
+            if entry is None:
+                raise ConnectionError(
+                    f"Could not fetch /{endpoint} from {self.base_url} and no snapshot is available"
+                )
+        elif time.time() - entry.fetched_at > self.ttl:
+            self._refresh_in_background()
+        return entry
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return
+            self._refreshing = threading.Thread(
+                target=self.refresh, name="catalog-refresh", daemon=True
+            )
+            self._refreshing.start()
+
+    def _revalidate(self, endpoint: str) -> bool:
+        """Fetch `endpoint` conditionally. Returns True if its content changed."""
+        with self._lock:
+            entry = self._entries.get(endpoint)
+        headers = {"If-None-Match": entry.etag} if entry and entry.etag else {}
+        try:
+            resp = self._session.get(
+                f"{self.base_url}/{endpoint}", headers=headers, timeout=self.timeout
+            )
+            if resp.status_code == 304 and entry is not None:
+                with self._lock:
+                    entry.fetched_at = time.time()
+                return False
+            resp.raise_for_status()
+            body = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Failed to fetch /{endpoint}, serving cached catalog: {e}")
+            return False
+
+        with self._lock:
+            version = entry.version + 1 if entry is not None else 1
+            self._entries[endpoint] = CatalogEntry(
+                body=body,
+                etag=resp.headers.get("ETag"),
+                fetched_at=time.time(),
+                version=version,
+            )
+        return True
+
+    def _load_snapshot(self) -> None:
+        if self.snapshot_path is None or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable catalog snapshot {self.snapshot_path}: {e}")
+            return
+        for endpoint in CATALOG_ENDPOINTS:
+            if endpoint in snapshot:
+                # fetched_at=0 marks the entry stale so it is revalidated on first use
+                self._entries[endpoint] = CatalogEntry(
+                    body=snapshot[endpoint]["body"],
+                    etag=snapshot[endpoint].get("etag"),
+                    fetched_at=0.0,
+                    version=1,
+                )
+
+    def _save_snapshot(self) -> None:
+        if self.snapshot_path is None:
+            return
+        with self._lock:
+            snapshot = {
+                endpoint: {"body": entry.body, "etag": entry.etag}
+                for endpoint, entry in self._entries.items()
+            }
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Failed to write catalog snapshot {self.snapshot_path}: {e}")
+
+
+api_catalog = ApiCatalog()
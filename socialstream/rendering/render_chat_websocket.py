@@ -2,16 +2,24 @@ import asyncio
 import json
 import threading
 import time
-from dataclasses import dataclass
+from collections import deque
 from queue import Queue
 from typing import Any, Optional
 
 import aiohttp
-import requests
 import streamlit as st
-import websockets
 
+from socialstream.framing import (
+    SUPPORTED_SUBPROTOCOLS,
+    JsonCodec,
+    MsgpackCodec,
+    get_codec,
+)
+from socialstream.metrics import ws_messages_total
+from socialstream.profiler import profiled
+from socialstream.rendering.api_catalog import api_catalog, simulation_ws_url
 from socialstream.rendering_utils import messageForRendering, render_messages
+from socialstream.session_lifecycle import session_registry
 from socialstream.utils import get_abstract
 
 
@@ -19,27 +27,19 @@ def compose_agent_names(agent_dict: dict[Any]) -> str:
     return f"{agent_dict['first_name']} {agent_dict['last_name']}"
 
 
-def get_scenarios():
-    # use synchronous code to get the scenarios
-    with requests.get("http://localhost:8000/scenarios") as resp:
-        scenarios = resp.json()
-    return {scenario["codename"]: scenario for scenario in scenarios}
+def get_scenarios() -> dict[str, dict[str, Any]]:
+    return api_catalog.scenarios()
 
 
-def get_agents() -> tuple[dict[str, dict[Any]], dict[str, dict[Any]]]:
-    # use synchronous code to get the agents
-    with requests.get("http://localhost:8000/agents") as resp:
-        agents = resp.json()
-    return {compose_agent_names(agent): agent for agent in agents}, {
-        compose_agent_names(agent): agent for agent in agents
-    }
+def get_agents() -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    # both agent lists share one read-only mapping
+    agents = api_catalog.agents()
+    return agents, agents
 
 
-def get_models() -> dict[str, dict[Any]]:
-    # use synchronous code to get the agents
-    with requests.get("http://localhost:8000/models") as resp:
-        models = resp.json()
-    return {model: model for model in models}, {model: model for model in models}
+def get_models() -> tuple[dict[str, str], dict[str, str]]:
+    models = api_catalog.models()
+    return models, models
 
 
 def initialize_session_state():
@@ -65,12 +65,18 @@ def initialize_session_state():
         # Set initial active state
         st.session_state.active = False
 
-        st.session_state.websocket_manager = WebSocketManager(
-            "ws://localhost:8000/ws/simulation?token=demo-token"
-        )
+        st.session_state.websocket_manager = WebSocketManager(simulation_ws_url())
+        session_registry.register(st.session_state.websocket_manager)
         print("Session state initialized")
+    elif not session_registry.is_registered(st.session_state.websocket_manager):
+        # the reaper closed this session's manager while it was away
+        st.session_state.websocket_manager = WebSocketManager(simulation_ws_url())
+        session_registry.register(st.session_state.websocket_manager)
+        st.session_state.active = False
+        print("Websocket manager recreated after reap")
 
 
+@profiled("render.streamlit_rendering")
 def streamlit_rendering(messages: list[messageForRendering], agent_names) -> None:
     agent1_name, agent2_name = agent_names
     avatar_mapping = {
@@ -99,7 +105,10 @@ def streamlit_rendering(messages: list[messageForRendering], agent_names) -> Non
         if role == "background":
             continue
 
-        if role == "obs" or message.get("type") == "action":
+        # structured content is decoded once on receipt, see framing.py
+        if isinstance(content, str) and (
+            role == "obs" or message.get("type") == "action"
+        ):
             try:
                 content = json.loads(content)
             except Exception as e:
@@ -125,66 +134,128 @@ def streamlit_rendering(messages: list[messageForRendering], agent_names) -> Non
                 st.markdown(content.replace("\n", "<br />"), unsafe_allow_html=True)
 
 
+def _payload_size(item: Any) -> int:
+    """Rough size in bytes of a queued frame, counting only its string content."""
+    if isinstance(item, (str, bytes)):
+        return len(item)
+    if isinstance(item, dict):
+        return sum(_payload_size(value) for value in item.values())
+    if isinstance(item, (list, tuple)):
+        return sum(_payload_size(value) for value in item)
+    return 0
+
+
+class SizedQueue(Queue):
+    """A `Queue` that keeps a running estimate of the bytes it holds."""
+
+    def _init(self, maxsize: int) -> None:
+        super()._init(maxsize)
+        self._sizes: deque[int] = deque()
+        self.nbytes = 0
+
+    def _put(self, item: Any) -> None:
+        size = _payload_size(item)
+        self._sizes.append(size)
+        self.nbytes += size
+        super()._put(item)
+
+    def _get(self) -> Any:
+        self.nbytes -= self._sizes.popleft()
+        return super()._get()
+
+    def clear(self) -> None:
+        with self.mutex:
+            self.queue.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+
 class WebSocketManager:
-    def __init__(self, url: str):
+    def __init__(self, url: str, compress: bool = True):
         self.url = url
-        self.websocket: Optional[websockets.WebSocketClientProtocol] = None
-        self.message_queue: Queue = Queue()
+        self.compress = compress
+        self.codec: JsonCodec | MsgpackCodec = JsonCodec()
+        self.websocket: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.message_queue: SizedQueue = SizedQueue()
         self.running: bool = False
-        self.receive_queue: Queue = Queue()
+        self.receive_queue: SizedQueue = SizedQueue()
+        self.thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._closed = threading.Event()
 
     def start(self):
         """Start the client in a separate thread"""
         self._closed.clear()
         self.running = True
-        self.thread = threading.Thread(target=self._run_event_loop)
+        self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
         self.thread.start()
 
-    # def stop(self):
-    #     """Stop the client"""
-    #     self.running = False
-    #     self.thread.join()
     def stop(self):
-        """Stop the client"""
+        """Stop the client, force-closing the socket if it does not exit in time"""
         print("Stopping websocket manager...")
         self.running = False
         self._closed.wait(timeout=5.0)
-        if self.thread.is_alive():
-            print("Thread is still alive after stop")
+        if self.is_thread_alive():
+            print("Thread is still alive after stop, forcing close")
+            self.close()
         else:
             print("Thread has been closed")
 
+    def close(self, timeout: float = 5.0) -> None:
+        """Close the socket from its own loop, join the thread and drop queued frames"""
+        self.running = False
+        loop, websocket = self._loop, self.websocket
+        if loop is not None and websocket is not None and not loop.is_closed():
+            try:
+                asyncio.run_coroutine_threadsafe(websocket.close(), loop)
+            except RuntimeError:
+                pass  # the loop stopped between the check and the call
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+        self.message_queue.clear()
+        self.receive_queue.clear()
+
+    def is_thread_alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def is_socket_open(self) -> bool:
+        return self.websocket is not None and not self.websocket.closed
+
+    def queued_bytes(self) -> int:
+        return self.message_queue.nbytes + self.receive_queue.nbytes
+
+    def queued_messages(self) -> int:
+        return self.message_queue.qsize() + self.receive_queue.qsize()
+
     def send_message(self, message: str | dict[str, Any]):
-        """Add a message to the queue to be sent"""
-        if isinstance(message, dict):
-            message = json.dumps(message)
+        """Add a message to the queue to be sent
+
+        Dicts are encoded with the negotiated codec when they are sent, since the
+        subprotocol is only known once the connection is established.
+        """
         self.message_queue.put(message)
 
     def _run_event_loop(self):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(self._connect())
-
-    # async def _connect(self):
-    #     """Connect to the WebSocket server and handle messages"""
-    #     async with aiohttp.ClientSession() as session:
-    #         async with session.ws_connect(self.url) as ws:
-    #             self.websocket = ws
-
-    #             # Start tasks for sending and receiving messages
-    #             send_task = asyncio.create_task(self._send_messages())
-    #             receive_task = asyncio.create_task(self._receive_messages())
-
-    #             # Wait for both tasks to complete
-    #             await asyncio.gather(send_task, receive_task)
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._connect())
+        finally:
+            self._loop = None
+            loop.close()
 
     async def _connect(self):
         """Connect to the WebSocket server and handle messages"""
         try:
             async with aiohttp.ClientSession() as session:
-                async with session.ws_connect(self.url) as ws:
+                async with session.ws_connect(
+                    self.url,
+                    protocols=SUPPORTED_SUBPROTOCOLS,
+                    compress=15 if self.compress else 0,
+                ) as ws:
                     self.websocket = ws
+                    self.codec = get_codec(ws.protocol)
 
                     # Start tasks for sending and receiving messages
                     send_task = asyncio.create_task(self._send_messages())
@@ -200,6 +271,7 @@ class WebSocketManager:
                         receive_task.cancel()
         finally:
             print("WebSocket connection closed")
+            self.websocket = None
             self._closed.set()
 
     async def _send_messages(self):
@@ -207,7 +279,13 @@ class WebSocketManager:
         while self.running:
             if not self.message_queue.empty():
                 message = self.message_queue.get()
-                await self.websocket.send_str(message)
+                ws_messages_total.inc(direction="sent")
+                if isinstance(message, str):
+                    await self.websocket.send_str(message)
+                elif self.codec.binary:
+                    await self.websocket.send_bytes(self.codec.encode(message))
+                else:
+                    await self.websocket.send_str(self.codec.encode(message))
             await asyncio.sleep(0.1)  # Small delay to prevent busy waiting
 
     async def _receive_messages(self):
@@ -215,16 +293,28 @@ class WebSocketManager:
         while self.running:
             try:
                 msg = await self.websocket.receive()
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    print(f"Received message: {msg.data}")
-                    self.receive_queue.put(json.loads(msg.data))
-                elif msg.type == aiohttp.WSMsgType.CLOSED:
+                if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    ws_messages_total.inc(direction="received")
+                    try:
+                        message = self.codec.decode(msg.data)
+                    except Exception as e:
+                        # a malformed frame should not end the simulation
+                        print(f"Dropping undecodable {msg.type.name} frame: {e}")
+                        continue
+                    self.receive_queue.put(message)
+                elif msg.type in (
+                    aiohttp.WSMsgType.CLOSE,
+                    aiohttp.WSMsgType.CLOSING,
+                    aiohttp.WSMsgType.CLOSED,
+                ):
                     break
                 elif msg.type == aiohttp.WSMsgType.ERROR:
                     break
             except Exception as e:
                 print(f"Error receiving message: {e}")
                 break
+        # unblock the sender so that gather() returns
+        self.running = False
 
 
 def set_active(value: bool):
@@ -317,6 +407,7 @@ def is_active() -> bool:
 
 def chat_demo():
     initialize_session_state()
+    session_registry.heartbeat()
 
     with st.sidebar:
         with st.container():
@@ -390,6 +481,7 @@ def chat_demo():
 
     chat_history_container = st.empty()
     while is_active():
+        session_registry.heartbeat()
         if (
             "websocket_manager" in st.session_state
             and st.session_state.websocket_manager.receive_queue.qsize() > 0
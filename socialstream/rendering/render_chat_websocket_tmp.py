@@ -6,6 +6,7 @@ import aiohttp
 import streamlit as st
 import websockets
 
+from socialstream.rendering.api_catalog import API_BASE_URL, simulation_ws_url
 from socialstream.rendering_utils import messageForRendering, render_messages
 from socialstream.utils import get_abstract
 
@@ -16,13 +17,13 @@ def compose_agent_names(agent_dict: dict[Any]) -> str:
 
 # async def get_scenarios():
 #     async with aiohttp.ClientSession() as session:
-#         async with session.get("http://localhost:8800/scenarios") as resp:
+#         async with session.get(f"{API_BASE_URL}/scenarios") as resp:
 #             scenarios = await resp.json()
 #     return {scenario["codename"]: scenario for scenario in scenarios}
 
 # async def get_agents() -> tuple[dict[str, dict[Any]], dict[str, dict[Any]]]:
 #     async with aiohttp.ClientSession() as session:
-#         async with session.get("http://localhost:8800/agents") as resp:
+#         async with session.get(f"{API_BASE_URL}/agents") as resp:
 #             agents = await resp.json()
 #     return {compose_agent_names(agent): agent for agent in agents}, {compose_agent_names(agent): agent for agent in agents}
 
@@ -31,14 +32,14 @@ import requests
 
 def get_scenarios():
     # use synchronous code to get the scenarios
-    with requests.get("http://localhost:8800/scenarios") as resp:
+    with requests.get(f"{API_BASE_URL}/scenarios") as resp:
         scenarios = resp.json()
     return {scenario["codename"]: scenario for scenario in scenarios}
 
 
 def get_agents() -> tuple[dict[str, dict[Any]], dict[str, dict[Any]]]:
     # use synchronous code to get the agents
-    with requests.get("http://localhost:8800/agents") as resp:
+    with requests.get(f"{API_BASE_URL}/agents") as resp:
         agents = resp.json()
     return {compose_agent_names(agent): agent for agent in agents}, {
         compose_agent_names(agent): agent for agent in agents
@@ -115,9 +116,7 @@ def chat_demo() -> None:
         chat_history_container = st.empty()
 
         async def run_simulation():
-            async with websockets.connect(
-                "ws://localhost:8800/ws/simulation?token=demo-token"
-            ) as websocket:
+            async with websockets.connect(simulation_ws_url()) as websocket:
                 await websocket.send(
                     json.dumps(
                         {
@@ -1,13 +1,25 @@
 import json
+import os
+from typing import Optional
 
 import streamlit as st
-from sotopia.database import AgentProfile, EnvironmentProfile, EpisodeLog
-from sotopia.envs.parallel import render_text_for_agent, render_text_for_environment
-
+from redis_om.model.model import NotFoundError
+from sotopia.database import EnvironmentProfile, EpisodeLog
+from sotopia.envs.parallel import render_text_for_environment
+
+from socialstream.episode_snapshot import EpisodeSnapshot, open_snapshot
+from socialstream.memory_accounting import admit_load
+from socialstream.metrics import redis_query_latency
+from socialstream.name_registry import NameRegistry
+from socialstream.pickers import typeahead_selectbox
+from socialstream.profile_resolver import profile_resolver
+from socialstream.profiler import span
 from socialstream.rendering_utils import (
     _agent_profile_to_friendabove_self,
     render_for_humans,
 )
+from socialstream.scenario_memo import scenario_memo
+from socialstream.search_index import get_codename_index
 from socialstream.utils import (
     format_for_markdown,
     get_full_name,
@@ -23,31 +35,97 @@ role_mapping = {
     "General": "eval",
 }
 
+# episodes on each side of the displayed one whose profiles are prefetched, so
+# stepping through a codename stays fast without loading all of it into the LRU
+PREFETCH_WINDOW = 2
+
 
 def update_database_callback() -> None:
     pass
 
 
-def rendering_demo() -> None:
-    initialize_session_state()
+def get_episode_snapshot() -> Optional[EpisodeSnapshot]:
+    """The snapshot file chosen in the sidebar, or None to browse Redis."""
+    path = st.sidebar.text_input(
+        "Episode snapshot file: (Optional, browse offline instead of Redis)",
+        value=os.environ.get("SOCIALSTREAM_EPISODE_SNAPSHOT", ""),
+        key="snapshot_path",
+    ).strip()
+    if not path:
+        return None
+    try:
+        return open_snapshot(path)
+    except (OSError, ValueError) as e:
+        st.sidebar.error(f"Could not open snapshot {path}: {e}")
+        return None
 
-    codenames = list(st.session_state.all_codenames.keys())
 
-    def update() -> None:
+def rendering_demo() -> None:
+    snapshot = get_episode_snapshot()
+    if snapshot is None:
+        initialize_session_state()
+        if "episode_source" not in st.session_state:
+            # the first codename's episodes were loaded by initialize_session_state
+            st.session_state.episode_source = ""
+    elif "name_registry" not in st.session_state:
+        st.session_state.name_registry = NameRegistry()
+    profiles = profile_resolver if snapshot is None else snapshot
+
+    def update(reload: bool = False) -> None:
         codename_key = st.session_state.selected_codename
-        st.session_state.current_episodes = EpisodeLog.find(
-            EpisodeLog.environment == st.session_state.all_codenames[codename_key]
-        ).all()
+        env_pk = st.session_state.all_codenames[codename_key]
+        if not admit_load(reload=reload):
+            # retried on the next rerun, see memory_accounting
+            st.session_state.pop("current_episodes", None)
+            return
+        if snapshot is None:
+            with (
+                span("redis.episodes"),
+                redis_query_latency.time(query="episodes.find"),
+            ):
+                episodes = EpisodeLog.find(EpisodeLog.environment == env_pk).all()
+        else:
+            # decoded lazily, only the displayed episode is read from the file
+            episodes = snapshot.episodes_for_environment(env_pk)
+        st.session_state.current_episodes = episodes
+        if not reload:
+            st.session_state.pop("evicted_bytes", None)
+
+    source = snapshot.path if snapshot is not None else ""
+    if st.session_state.get("episode_source", "") != source:
+        st.session_state.episode_source = source
+        environments = (
+            EnvironmentProfile.find().all()
+            if snapshot is None
+            else snapshot.environments()
+        )
+        codename_pk_mapping = {env.codename: env.pk for env in environments}
+        st.session_state.all_codenames = codename_pk_mapping
+        st.session_state.codename_index = get_codename_index(codename_pk_mapping)
+        st.session_state.selected_codename = next(iter(codename_pk_mapping))
+        update()
+    elif "current_episodes" not in st.session_state:
+        # evicted or refused under memory pressure; the codename widget has not
+        # been created yet on the first visit, and is cleared after leaving
+        st.session_state.setdefault(
+            "selected_codename", next(iter(st.session_state.all_codenames))
+        )
+        update(reload=True)
 
     with st.sidebar:
         # Dropdown for codename selection
-        st.selectbox(
+        typeahead_selectbox(
             "Choose a codename:",
-            codenames,
-            index=0,
+            st.session_state.codename_index,
             on_change=update,
             key="selected_codename",
         )
+        if "current_episodes" not in st.session_state:
+            st.warning(
+                "The server is low on memory. Episodes will load once memory frees"
+                " up; a codename with fewer episodes may load sooner."
+            )
+            return
 
         selected_index = st.number_input(
             "Specify the index of the episode to display:",
@@ -59,15 +137,20 @@ def rendering_demo() -> None:
 
         if selected_index < len(st.session_state.current_episodes):
             # TODO unify the display function across render and chat
-            episode = st.session_state.current_episodes[selected_index]
-            agents = [AgentProfile.get(agent) for agent in episode.agents]
+            episodes = st.session_state.current_episodes
+            episode = episodes[selected_index]
+            if snapshot is None:
+                first = max(selected_index - PREFETCH_WINDOW, 0)
+                last = selected_index + PREFETCH_WINDOW
+                profile_resolver.prefetch_episodes(episodes[first : last + 1])
+            try:
+                agents, environment = profiles.episode_profiles(episode)
+            except NotFoundError as e:
+                # the profile was deleted after the episode was stored
+                st.error(f"Episode {episode.pk} cannot be shown: {e}")
+                return
             agent_names = [get_full_name(agent) for agent in agents]
-            environment = EnvironmentProfile.get(episode.environment)
-            agent_goals = [
-                render_text_for_agent(agent_goal, agent_id)
-                for agent_id, agent_goal in enumerate(environment.agent_goals)
-            ]
-            agent_goals = [format_for_markdown(goal) for goal in agent_goals]
+            agent_goals = scenario_memo.rendered_goals(environment)
 
             avatar_mapping = {
                 agent_names[0]: "👤",
@@ -89,11 +172,11 @@ def rendering_demo() -> None:
                 and message not in evaluation_messages
             ]
 
-            assert (
-                len(background_messages) == 2
-            ), f"Need 2 background messages, but got {len(background_messages)}"
+            assert len(background_messages) == 2, (
+                f"Need 2 background messages, but got {len(background_messages)}"
+            )
             st.markdown(
-                f"**Scenario**: { render_text_for_environment(environment.scenario)}"
+                f"**Scenario**: {render_text_for_environment(environment.scenario)}"
             )
 
             info_col1, info_col2 = st.columns(2)
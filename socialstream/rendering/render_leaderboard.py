@@ -0,0 +1,49 @@
+import streamlit as st
+
+from socialstream.rendering.render_episode import get_episode_snapshot
+from socialstream.reward_analytics import OVERALL, reward_analytics
+from socialstream.utils import initialize_session_state
+
+
+def leaderboard_demo() -> None:
+    snapshot = get_episode_snapshot()
+    if snapshot is None:
+        initialize_session_state()
+
+    with st.sidebar:
+        tag = st.text_input("Only episodes with tag: (Optional)", key="leaderboard_tag")
+        group_by = st.radio("Group by", ("model", "scenario"), key="leaderboard_by")
+        with_ci = st.checkbox("Bootstrap 95% CI", value=True, key="leaderboard_ci")
+        refresh = st.button("Refresh")
+
+    tag = tag.strip() or None
+    if snapshot is None:
+        store = reward_analytics.store(tag, force=refresh)
+        env_pk_to_codename = {
+            pk: codename for codename, pk in st.session_state.all_codenames.items()
+        }
+    else:
+        store = reward_analytics.snapshot_store(snapshot, tag)
+        env_pk_to_codename = {env.pk: env.codename for env in snapshot.environments()}
+
+    # widgets are rendered outside the lock, which a refresh takes to add rows
+    with store.lock:
+        dimensions = list(store.dimensions)
+    dimension = st.sidebar.selectbox(
+        "Dimension", dimensions, index=dimensions.index(OVERALL)
+    )
+    with store.lock:
+        rows = store.leaderboard(group_by, dimension, with_ci=with_ci)
+        episodes = len(store.seen)
+
+    st.markdown(
+        f"**{len(rows)} {group_by}s** ranked by mean `{dimension}` "
+        f"over {episodes} episodes"
+    )
+    if group_by == "scenario":
+        for row in rows:
+            row["name"] = env_pk_to_codename.get(row["name"], row["name"])
+    if not with_ci:
+        for row in rows:
+            del row["ci_low"], row["ci_high"]
+    st.dataframe(rows, use_container_width=True, hide_index=True)
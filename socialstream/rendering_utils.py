@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import Iterable, Iterator, Optional, Sequence, TypedDict
 
 from sotopia.agents import Agents, LLMAgent
 from sotopia.database import AgentProfile, EpisodeLog
@@ -9,8 +9,18 @@ from sotopia.envs.parallel import (
 )
 from sotopia.messages import Message
 
+from socialstream.evaluation import (
+    AgentEvaluation,
+    EpisodeEvaluation,
+    comment_markers,
+    evaluation_cache,
+    parse_evaluation,
+)
+from socialstream.profiler import profiled
 from socialstream.utils import format_for_markdown
 
+OBSERVATION_MARKER = "Observation:"
+
 
 class messageForRendering(TypedDict):
     role: str
@@ -19,15 +29,8 @@ class messageForRendering(TypedDict):
 
 
 def parse_reasoning(reasoning: str, num_agents: int) -> tuple[list[str], str]:
-    """Parse the reasoning string into a dictionary."""
-    sep_token = "SEPSEP"
-    for i in range(1, num_agents + 1):
-        reasoning = (
-            reasoning.replace(f"Agent {i} comments:\n", sep_token)
-            .strip(" ")
-            .strip("\n")
-        )
-    all_chunks = reasoning.split(sep_token)
+    """Split the reasoning into per-agent comments and the general comment."""
+    all_chunks = comment_markers(num_agents).split(reasoning.strip(" ").strip("\n"))
     general_comment = all_chunks[0].strip(" ").strip("\n")
     comment_chunks = all_chunks[-num_agents:]
 
@@ -54,118 +57,85 @@ def compose_env_messages(env: ParallelSotopiaEnv) -> tuple[str, list[str]]:
     return env_to_render, goals_to_render
 
 
-def render_for_humans(episode: EpisodeLog) -> list[messageForRendering]:
-    """Generate a list of messages for human-readable version of the episode log."""
+def _format_agent_evaluation(idx: int, agent: AgentEvaluation) -> str:
+    comments = "\n".join(
+        f"**{name}**: {dimension.comment}"
+        for name, dimension in agent.dimensions.items()
+        if dimension.comment
+    )
+    scores = ", ".join(
+        f"{name} {round(score, 2):g}" for name, score in agent.scores().items()
+    )
+    return f"**Agent {idx} reasoning**:\n{comments}\n\n**Rewards**: {scores}"
 
-    messages_for_rendering: list[messageForRendering] = []
 
-    for idx, turn in enumerate(episode.messages):
+def iter_transcript(
+    turns: Iterable[Sequence[tuple[str, str, str]]],
+    evaluation: EpisodeEvaluation,
+) -> Iterator[messageForRendering]:
+    """Yield the human-readable messages of an episode, markdown-escaped once.
+
+    Each message is classified by the prefix sotopia gives it
+    (`AgentAction.to_natural_language`), so no message is scanned more than
+    once for observations and once for its payload.
+    """
+
+    def entry(role: str, type: str, content: str) -> messageForRendering:
+        return {"role": role, "type": type, "content": format_for_markdown(content)}
+
+    for idx, turn in enumerate(turns):
         is_observation_printed = False
 
         if idx == 0:
-            assert (
-                len(turn) >= 2
-            ), "The first turn should have at least environment messages"
-
-            messages_for_rendering.append(
-                {"role": "Background Info", "type": "info", "content": turn[0][2]}
-            )
-            messages_for_rendering.append(
-                {"role": "Background Info", "type": "info", "content": turn[1][2]}
-            )
-            messages_for_rendering.append(
-                {"role": "System", "type": "divider", "content": "Start Simulation"}
+            assert len(turn) >= 2, (
+                "The first turn should have at least environment messages"
             )
 
+            yield entry("Background Info", "info", turn[0][2])
+            yield entry("Background Info", "info", turn[1][2])
+            yield entry("System", "divider", "Start Simulation")
+
         for sender, receiver, message in turn:
-            if not is_observation_printed and "Observation:" in message and idx != 0:
-                extract_observation = message.split("Observation:")[1].strip()
-                if extract_observation:
-                    messages_for_rendering.append(
-                        {
-                            "role": "Observation",
-                            "type": "observation",
-                            "content": extract_observation,
-                        }
+            if sender == "Environment":
+                if not is_observation_printed and idx != 0:
+                    start = message.find(OBSERVATION_MARKER)
+                    if start != -1:
+                        start += len(OBSERVATION_MARKER)
+                        end = message.find(OBSERVATION_MARKER, start)
+                        observation = message[start : end if end != -1 else None]
+                        observation = observation.strip()
+                        if observation:
+                            yield entry("Observation", "observation", observation)
+                        is_observation_printed = True
+                if receiver == "Environment":
+                    yield entry("Environment", "environment", message)
+            elif receiver == "Environment":
+                if message.startswith("did nothing"):
+                    continue
+                elif message.startswith("left the conversation"):
+                    yield entry(
+                        "Environment", "leave", f"{sender} left the conversation"
                     )
-                is_observation_printed = True
-
-            if receiver == "Environment":
-                if sender != "Environment":
-                    if "did nothing" in message:
-                        continue
-                    elif "left the conversation" in message:
-                        messages_for_rendering.append(
-                            {
-                                "role": "Environment",
-                                "type": "leave",
-                                "content": f"{sender} left the conversation",
-                            }
-                        )
-                    else:
-                        if "said:" in message:
-                            message = message.split("said:")[1].strip()
-                            messages_for_rendering.append(
-                                {"role": sender, "type": "said", "content": message}
-                            )
-                        else:
-                            message = message.replace("[action]", "")
-                            messages_for_rendering.append(
-                                {"role": sender, "type": "action", "content": message}
-                            )
+                elif message.startswith("said:"):
+                    yield entry(sender, "said", message[len("said:") :].strip())
                 else:
-                    messages_for_rendering.append(
-                        {
-                            "role": "Environment",
-                            "type": "environment",
-                            "content": message,
-                        }
-                    )
-
-    messages_for_rendering.append(
-        {"role": "System", "type": "divider", "content": "End Simulation"}
-    )
-
-    reasoning_per_agent, general_comment = parse_reasoning(
-        episode.reasoning,
-        len(
-            set(
-                msg["role"]
-                for msg in messages_for_rendering
-                if msg["type"] in {"said", "action"}
-            )
-        ),
-    )
-
-    if general_comment == "":
-        return messages_for_rendering[:-1]
+                    yield entry(sender, "action", message.removeprefix("[action]"))
 
-    messages_for_rendering.append(
-        {"role": "General", "type": "comment", "content": general_comment}
-    )
+    if evaluation.general_comment == "":
+        return
 
-    for idx, reasoning in enumerate(reasoning_per_agent):
-        reasoning_lines = reasoning.split("\n")
-        new_reasoning = ""
-        for reasoning_line in reasoning_lines:
-            dimension = reasoning_line.split(":")[0]
-            new_reasoning += (
-                (f"**{dimension}**: {':'.join(reasoning_line.split(':')[1:])}" + "\n")
-                if dimension != ""
-                else reasoning_line + "\n"
-            )
-        messages_for_rendering.append(
-            {
-                "role": f"Agent {idx + 1}",
-                "type": "comment",
-                "content": f"**Agent {idx + 1} reasoning**:\n{new_reasoning}\n\n**Rewards**: {str(episode.rewards[idx])}",
-            }
+    yield entry("System", "divider", "End Simulation")
+    yield entry("General", "comment", evaluation.general_comment)
+    for idx, agent in enumerate(evaluation.agents):
+        yield entry(
+            f"Agent {idx + 1}", "comment", _format_agent_evaluation(idx + 1, agent)
         )
 
-    for item in messages_for_rendering:
-        item["content"] = format_for_markdown(item["content"])
 
-    return messages_for_rendering
+@profiled("render.render_for_humans")
+def render_for_humans(episode: EpisodeLog) -> list[messageForRendering]:
+    """Generate a list of messages for human-readable version of the episode log."""
+    return list(iter_transcript(episode.messages, evaluation_cache.get(episode)))
 
 
 def compose_agent_messages(
@@ -188,33 +158,24 @@ def compose_agent_messages(
     return agent_to_render
 
 
+@profiled("render.render_messages")
 def render_messages(
     env: ParallelSotopiaEnv,
     agent_list: list[LLMAgent],
-    messages: list[list[tuple[str, str, Message]]],
+    messages: Iterable[Sequence[tuple[str, str, Message]]],
     reasoning: list[str],
     rewards: list[list[float]],
+    evaluation: Optional[EpisodeEvaluation] = None,
 ) -> list[messageForRendering]:
-    epilog = EpisodeLog(
-        environment=env.profile.pk,
-        agents=[agent.profile.pk for agent in agent_list],
-        tag="tmp",
-        models=[env.model_name, agent_list[0].model_name, agent_list[1].model_name],
-        messages=[
-            [(m[0], m[1], m[2].to_natural_language()) for m in messages_in_turn]
-            for messages_in_turn in messages
-        ],
-        reasoning=reasoning,
-        rewards=rewards,
-        rewards_prompt="",
+    """Render live chat messages; pass the session's parsed `evaluation` if any."""
+    # rendered straight from the live messages, without building an EpisodeLog
+    turns = (
+        [(m[0], m[1], m[2].to_natural_language()) for m in messages_in_turn]
+        for messages_in_turn in messages
     )
-    rendered_messages = render_for_humans(epilog)
-    # deal with $ which might cause issues in markdown
-    for message in rendered_messages:
-        message["content"] = format_for_markdown(message["content"])
-        # message["content"] = message["content"].replace("$", "&#36;")
-        # print(message["content"])
-    return rendered_messages
+    if evaluation is None:
+        evaluation = parse_evaluation(reasoning, rewards)  # type: ignore
+    return list(iter_transcript(turns, evaluation))
 
 
 def agent_profile_to_public_info(
@@ -0,0 +1,331 @@
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from sotopia.database import EpisodeLog
+
+from socialstream.episode_snapshot import EpisodeSnapshot
+from socialstream.evaluation import OVERALL, reward_scores
+from socialstream.export_episodes import scan_episode_pks
+from socialstream.tracing import logger
+
+REWARD_PATHS = ("$.environment", "$.tag", "$.models", "$.rewards")
+REFRESH_INTERVAL = 30.0
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_CHUNK = 100
+UNKNOWN_MODEL = "unknown"
+
+
+def _first(value: Any) -> Any:
+    # JSONPath ($.x) results come back as one-element lists
+    return value[0] if isinstance(value, list) and value else None
+
+
+def reward_dimensions(reward: Any) -> dict[str, float]:
+    """`{dimension: score}` from a stored reward, either a float or (overall, dims)."""
+    overall, dimensions = reward_scores(reward)
+    return {OVERALL: overall, **dimensions}
+
+
+class _Grow:
+    """Append-only numpy buffer with amortized O(1) appends."""
+
+    def __init__(self, dtype: Any, width: int = 0) -> None:
+        self.width = width
+        shape = (64, width) if width else (64,)
+        self.data = np.full(shape, np.nan) if width else np.zeros(shape, dtype=dtype)
+        self.size = 0
+
+    def extend(self, rows: np.ndarray) -> None:
+        needed = self.size + len(rows)
+        if needed > len(self.data):
+            capacity = max(needed, 2 * len(self.data))
+            if self.width:
+                grown = np.full((capacity, self.data.shape[1]), np.nan)
+            else:
+                grown = np.zeros(capacity, dtype=self.data.dtype)
+            grown[: self.size] = self.data[: self.size]
+            self.data = grown
+        self.data[self.size : needed] = rows
+        self.size = needed
+
+    def add_columns(self, count: int) -> None:
+        self.data = np.hstack([self.data, np.full((len(self.data), count), np.nan)])
+
+    def view(self) -> np.ndarray:
+        return self.data[: self.size]
+
+
+class RewardStore:
+    """Per-(episode, agent) rewards as column arrays, plus running aggregates.
+
+    Every row carries a model id, a scenario id and one score per dimension
+    (NaN when the dimension is missing). Count / sum / sum of squares are kept
+    per (model, scenario, dimension) cell and updated with each added batch,
+    so means and standard deviations never rescan the rows; the raw rows are
+    only needed for bootstrap confidence intervals.
+    """
+
+    def __init__(self) -> None:
+        self.models: list[str] = []
+        self.scenarios: list[str] = []
+        self.dimensions: list[str] = [OVERALL]
+        self._model_ids: dict[str, int] = {}
+        self._scenario_ids: dict[str, int] = {}
+        self._dimension_ids: dict[str, int] = {OVERALL: 0}
+        self._model_col = _Grow(np.int32)
+        self._scenario_col = _Grow(np.int32)
+        self._values = _Grow(np.float64, width=1)
+        # (models, scenarios, dimensions)
+        self._count = np.zeros((0, 0, 1))
+        self._sum = np.zeros((0, 0, 1))
+        self._sumsq = np.zeros((0, 0, 1))
+        # aggregated episodes, and those the tag filter left out
+        self.seen: set[str] = set()
+        self.skipped: set[str] = set()
+        self.lock = threading.Lock()
+        self._ci_cache: dict[tuple[Any, ...], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self._values.size
+
+    @staticmethod
+    def _intern(name: str, names: list[str], ids: dict[str, int]) -> int:
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    def add_episodes(self, episodes: Iterable[dict[str, Any]]) -> int:
+        """Add `{pk, environment, models, rewards}` dicts, skipping seen pks."""
+        model_ids, scenario_ids, rows = [], [], []
+        for episode in episodes:
+            if episode["pk"] in self.seen:
+                continue
+            self.seen.add(episode["pk"])
+            models = episode.get("models") or []
+            scenario_id = self._intern(
+                episode["environment"], self.scenarios, self._scenario_ids
+            )
+            for idx, reward in enumerate(episode.get("rewards") or []):
+                # models are [environment model, agent 1 model, agent 2 model]
+                model = models[idx + 1] if idx + 1 < len(models) else UNKNOWN_MODEL
+                model_ids.append(self._intern(model, self.models, self._model_ids))
+                scenario_ids.append(scenario_id)
+                scores = reward_dimensions(reward)
+                for dimension in scores:
+                    self._intern(dimension, self.dimensions, self._dimension_ids)
+                rows.append(scores)
+        if not rows:
+            return 0
+
+        new_dimensions = len(self.dimensions) - self._values.data.shape[1]
+        if new_dimensions:
+            self._values.add_columns(new_dimensions)
+        values = np.full((len(rows), len(self.dimensions)), np.nan)
+        for row_idx, scores in enumerate(rows):
+            for dimension, score in scores.items():
+                values[row_idx, self._dimension_ids[dimension]] = score
+        model_col = np.asarray(model_ids, dtype=np.int32)
+        scenario_col = np.asarray(scenario_ids, dtype=np.int32)
+        self._model_col.extend(model_col)
+        self._scenario_col.extend(scenario_col)
+        self._values.extend(values)
+        self._update_aggregates(model_col, scenario_col, values)
+        return len(rows)
+
+    def _update_aggregates(
+        self, model_col: np.ndarray, scenario_col: np.ndarray, values: np.ndarray
+    ) -> None:
+        shape = (len(self.models), len(self.scenarios), len(self.dimensions))
+        if self._count.shape != shape:
+            for name in ("_count", "_sum", "_sumsq"):
+                old = getattr(self, name)
+                grown = np.zeros(shape)
+                grown[: old.shape[0], : old.shape[1], : old.shape[2]] = old
+                setattr(self, name, grown)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        np.add.at(self._count, (model_col, scenario_col), present)
+        np.add.at(self._sum, (model_col, scenario_col), filled)
+        np.add.at(self._sumsq, (model_col, scenario_col), filled * filled)
+
+    def summary(self, by: str) -> dict[str, np.ndarray]:
+        """Per-group `count`, `mean` and `std` arrays of shape (groups, dimensions).
+
+        `by` is "model" or "scenario"; uses the running aggregates only.
+        """
+        axis = 1 if by == "model" else 0
+        count = self._count.sum(axis=axis)
+        total = self._sum.sum(axis=axis)
+        total_sq = self._sumsq.sum(axis=axis)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            variance = (total_sq - count * mean * mean) / (count - 1)
+        return {
+            "count": count,
+            "mean": mean,
+            "std": np.sqrt(np.clip(variance, 0.0, None)),
+        }
+
+    def bootstrap_ci(
+        self,
+        by: str,
+        dimension: str,
+        samples: int = BOOTSTRAP_SAMPLES,
+        level: float = 0.95,
+        seed: int = 0,
+    ) -> np.ndarray:
+        """Percentile bootstrap CI of the mean per group, shape (groups, 2).
+
+        Each chunk of resamples is drawn as one (chunk, n) index matrix and
+        averaged in a single gather. Results are cached until rows are added.
+        """
+        key = (by, dimension, samples, level, seed, len(self))
+        if key in self._ci_cache:
+            return self._ci_cache[key]
+        groups = self._model_col.view() if by == "model" else self._scenario_col.view()
+        names = self.models if by == "model" else self.scenarios
+        column = self._values.view()[:, self._dimension_ids[dimension]]
+        rng = np.random.default_rng(seed)
+        alpha = (1.0 - level) / 2
+        result = np.full((len(names), 2), np.nan)
+        for group in range(len(names)):
+            values = column[(groups == group) & ~np.isnan(column)]
+            n = len(values)
+            if n < 2:
+                continue
+            means = []
+            for start in range(0, samples, BOOTSTRAP_CHUNK):
+                size = min(BOOTSTRAP_CHUNK, samples - start)
+                means.append(values[rng.integers(0, n, size=(size, n))].mean(axis=1))
+            result[group] = np.quantile(np.concatenate(means), [alpha, 1 - alpha])
+        if len(self._ci_cache) >= 16:
+            self._ci_cache.clear()
+        self._ci_cache[key] = result
+        return result
+
+    def leaderboard(
+        self, by: str, dimension: str = OVERALL, with_ci: bool = True
+    ) -> list[dict[str, Any]]:
+        """Rows of `{name, episodes, mean, std, ci_low, ci_high}` sorted by mean."""
+        names = self.models if by == "model" else self.scenarios
+        if not names or dimension not in self._dimension_ids:
+            return []
+        column = self._dimension_ids[dimension]
+        summary = self.summary(by)
+        ci = (
+            self.bootstrap_ci(by, dimension)
+            if with_ci
+            else np.full((len(names), 2), np.nan)
+        )
+        rows = [
+            {
+                "name": name,
+                "n": int(summary["count"][idx, column]),
+                "mean": float(summary["mean"][idx, column]),
+                "std": float(summary["std"][idx, column]),
+                "ci_low": float(ci[idx, 0]),
+                "ci_high": float(ci[idx, 1]),
+            }
+            for idx, name in enumerate(names)
+            if summary["count"][idx, column] > 0
+        ]
+        return sorted(rows, key=lambda row: -row["mean"])
+
+
+def fetch_new_rewards(store: RewardStore, tag: Optional[str], batch_size: int) -> int:
+    """Read rewards of episodes the store has not seen yet, without their messages.
+
+    Redis is read without holding `store.lock`, which is only taken to add each
+    batch, so leaderboards of other sessions are not blocked by the SCAN.
+    """
+    added = 0
+    for _, pks in scan_episode_pks(0, batch_size):
+        # membership tests are safe without the lock; add_episodes skips
+        # pks that another refresh added in the meantime
+        pks = [pk for pk in pks if pk not in store.seen and pk not in store.skipped]
+        if not pks:
+            continue
+        pipe = EpisodeLog.db().pipeline(transaction=False)
+        for pk in pks:
+            pipe.json().get(EpisodeLog.make_primary_key(pk), *REWARD_PATHS)
+        episodes, skipped = [], []
+        for pk, fields in zip(pks, pipe.execute()):
+            if fields is None:
+                continue
+            if tag and _first(fields.get("$.tag")) != tag:
+                skipped.append(pk)
+                continue
+            episodes.append(
+                {
+                    "pk": pk,
+                    "environment": _first(fields.get("$.environment")),
+                    "models": _first(fields.get("$.models")),
+                    "rewards": _first(fields.get("$.rewards")),
+                }
+            )
+        with store.lock:
+            store.skipped.update(skipped)
+            added += store.add_episodes(episodes)
+    return added
+
+
+class RewardAnalytics:
+    """Process-wide reward stores per tag filter, refreshed incrementally."""
+
+    def __init__(
+        self, refresh_interval: float = REFRESH_INTERVAL, batch_size: int = 500
+    ) -> None:
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self._stores: dict[Optional[str], tuple[float, RewardStore]] = {}
+        self._snapshot_stores: dict[tuple[str, int, Optional[str]], RewardStore] = {}
+        self._lock = threading.Lock()
+
+    def store(self, tag: Optional[str] = None, force: bool = False) -> RewardStore:
+        with self._lock:
+            checked_at, store = self._stores.get(tag, (0.0, None))
+            if store is None:
+                store = RewardStore()
+            now = time.monotonic()
+            stale = force or now - checked_at >= self.refresh_interval
+            self._stores[tag] = (now if stale else checked_at, store)
+        if stale:
+            added = fetch_new_rewards(store, tag, self.batch_size)
+            if added:
+                logger.info(
+                    "Added %d reward rows (tag=%s), %d in total", added, tag, len(store)
+                )
+        return store
+
+    def snapshot_store(
+        self, snapshot: EpisodeSnapshot, tag: Optional[str] = None
+    ) -> RewardStore:
+        """Store over an offline snapshot, built from its metadata columns only."""
+        key = (snapshot.path, len(snapshot), tag)
+        with self._lock:
+            cached = self._snapshot_stores.get(key)
+        if cached is not None:
+            return cached
+        store = RewardStore()
+        columns = [
+            snapshot.column(name)
+            for name in ("pk", "environment", "models", "rewards", "tag")
+        ]
+        store.add_episodes(
+            {"pk": pk, "environment": environment, "models": models, "rewards": rewards}
+            for pk, environment, models, rewards, episode_tag in zip(*columns)
+            if not tag or episode_tag == tag
+        )
+        with self._lock:
+            self._snapshot_stores[key] = store
+        return store
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stores.clear()
+
+
+reward_analytics = RewardAnalytics()
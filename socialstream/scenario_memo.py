@@ -0,0 +1,129 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, Mapping
+
+from sotopia.database import EnvironmentProfile
+from sotopia.envs.parallel import render_text_for_agent, render_text_for_environment
+
+PRECOMPUTED_PATH = os.environ.get(
+    "SOCIALSTREAM_SCENARIO_MEMO", "data/scenario_abstracts.json"
+)
+MEMO_SIZE = 100_000
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+def _render_abstract(scenario: str) -> str:
+    from socialstream.utils import get_abstract
+
+    return get_abstract(render_text_for_environment(scenario))
+
+
+def _render_goal(goal: str, agent_id: int) -> str:
+    from socialstream.utils import format_for_markdown
+
+    return format_for_markdown(render_text_for_agent(goal, agent_id))
+
+
+class ScenarioMemo:
+    """Shared, lazily filled memo of scenario abstracts and rendered agent goals.
+
+    Entries are keyed by the text they are computed from, so editing a profile
+    (which the omniscient mode does in place) naturally misses the memo and the
+    new text is rendered on its next access. Results precomputed with
+    `python -m socialstream.scenario_memo` are loaded from `PRECOMPUTED_PATH`
+    and looked up by content hash before anything is rendered.
+    """
+
+    def __init__(self, precomputed_path: str | None = PRECOMPUTED_PATH) -> None:
+        self._memo: OrderedDict[tuple[str, ...], Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._precomputed: dict[str, Any] = {}
+        if precomputed_path and os.path.exists(precomputed_path):
+            with open(precomputed_path) as f:
+                self._precomputed = json.load(f)
+
+    def abstract(self, env_profile: EnvironmentProfile) -> str:
+        scenario = env_profile.scenario
+        return self._get(("abstract", scenario), lambda: _render_abstract(scenario))
+
+    def rendered_goals(self, env_profile: EnvironmentProfile) -> list[str]:
+        return [
+            self._get(
+                ("goal", goal, str(agent_id)),
+                lambda goal=goal, agent_id=agent_id: _render_goal(goal, agent_id),
+            )
+            for agent_id, goal in enumerate(env_profile.agent_goals)
+        ]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+    def _get(self, key: tuple[str, ...], compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        value = self._precomputed.get(_digest(*key))
+        if value is None:
+            value = compute()
+        with self._lock:
+            self._memo[key] = value
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return value
+
+
+class LazyAbstractMapping(Mapping[str, str]):
+    """`codename -> abstract` view over an env mapping that renders on first access."""
+
+    def __init__(
+        self, env_mapping: Mapping[str, EnvironmentProfile], memo: ScenarioMemo
+    ) -> None:
+        self._env_mapping = env_mapping
+        self._memo = memo
+
+    def __getitem__(self, codename: str) -> str:
+        return self._memo.abstract(self._env_mapping[codename])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._env_mapping)
+
+    def __len__(self) -> int:
+        return len(self._env_mapping)
+
+
+scenario_memo = ScenarioMemo()
+
+
+def precompute(envs: list[EnvironmentProfile], path: str = PRECOMPUTED_PATH) -> None:
+    """Render abstracts and goals for `envs` and persist them for later startups."""
+    precomputed: dict[str, Any] = {}
+    for env in envs:
+        precomputed[_digest("abstract", env.scenario)] = _render_abstract(env.scenario)
+        for agent_id, goal in enumerate(env.agent_goals):
+            precomputed[_digest("goal", goal, str(agent_id))] = _render_goal(
+                goal, agent_id
+            )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(precomputed, f)
+    print(f"Precomputed {len(precomputed)} entries for {len(envs)} scenarios to {path}")
+
+
+if __name__ == "__main__":
+    from socialstream.utils import load_additional_envs
+
+    parser = argparse.ArgumentParser(
+        description="Precompute scenario abstracts and goals for the configured Redis and data/."
+    )
+    parser.add_argument("--output", default=PRECOMPUTED_PATH)
+    args = parser.parse_args()
+    precompute(load_additional_envs() + EnvironmentProfile.find().all(), args.output)
@@ -0,0 +1,120 @@
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Mapping
+
+TOP_K = 50
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """In-memory typeahead index over (key, searchable text) pairs.
+
+    Queries shorter than three characters are answered from a sorted list of
+    word prefixes; longer ones intersect trigram posting lists and confirm the
+    substring match. Results are ranked key-prefix first, then word-prefix, then
+    any substring match, and keep catalog order within each rank.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, str]]) -> None:
+        self.keys: list[str] = []
+        self._texts: list[str] = []
+        words: list[tuple[str, int]] = []
+        self._postings: dict[str, list[int]] = {}
+        for idx, (key, text) in enumerate(entries):
+            text = text.lower()
+            self.keys.append(key)
+            self._texts.append(text)
+            words.extend((word, idx) for word in set(text.split()))
+            for trigram in _trigrams(text):
+                self._postings.setdefault(trigram, []).append(idx)
+        words.sort()
+        self._words = [word for word, _ in words]
+        self._word_ids = [idx for _, idx in words]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str, k: int = TOP_K) -> list[str]:
+        query = query.strip().lower()
+        if not query:
+            return self.keys[:k]
+        if len(query) < 3:
+            candidates = self._word_prefix_matches(query)
+        else:
+            candidates = self._substring_matches(query)
+        ranked = heapq.nsmallest(
+            k, candidates, key=lambda idx: (self._rank(idx, query), idx)
+        )
+        return [self.keys[idx] for idx in ranked]
+
+    def _word_prefix_matches(self, prefix: str) -> set[int]:
+        start = bisect.bisect_left(self._words, prefix)
+        matches = set()
+        for pos in range(start, len(self._words)):
+            if not self._words[pos].startswith(prefix):
+                break
+            matches.add(self._word_ids[pos])
+        return matches
+
+    def _substring_matches(self, query: str) -> list[int]:
+        postings = []
+        for trigram in _trigrams(query):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return [idx for idx in candidates if query in self._texts[idx]]
+
+    def _rank(self, idx: int, query: str) -> int:
+        text = self._texts[idx]
+        if text.startswith(query):
+            return 0
+        if f" {query}" in text:
+            return 1
+        return 2
+
+
+_SHARED_INDEXES: "OrderedDict[tuple[str, ...], SearchIndex]" = OrderedDict()
+_SHARED_INDEXES_SIZE = 8
+_shared_lock = threading.Lock()
+
+
+def _get_shared_index(entries: list[tuple[str, str]]) -> SearchIndex:
+    key = tuple(text for _, text in entries)
+    with _shared_lock:
+        index = _SHARED_INDEXES.get(key)
+        if index is not None:
+            _SHARED_INDEXES.move_to_end(key)
+            return index
+    index = SearchIndex(entries)
+    with _shared_lock:
+        _SHARED_INDEXES[key] = index
+        while len(_SHARED_INDEXES) > _SHARED_INDEXES_SIZE:
+            _SHARED_INDEXES.popitem(last=False)
+    return index
+
+
+def get_agent_index(agent_mapping: Mapping[str, Any]) -> SearchIndex:
+    """Index over agent display names and occupations, shared between sessions."""
+    return _get_shared_index(
+        [
+            (name, f"{name} {getattr(profile, 'occupation', '')}")
+            for name, profile in agent_mapping.items()
+        ]
+    )
+
+
+def get_codename_index(codenames: Iterable[str]) -> SearchIndex:
+    """Index over scenario codenames, shared between sessions."""
+    return _get_shared_index([(codename, codename) for codename in codenames])
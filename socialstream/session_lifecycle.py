@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Protocol
+
+SESSION_IDLE_TIMEOUT = float(os.environ.get("SOCIALSTREAM_SESSION_IDLE_TIMEOUT", 600))
+REAPER_INTERVAL = float(os.environ.get("SOCIALSTREAM_REAPER_INTERVAL", 30))
+
+
+class ManagedResource(Protocol):
+    """Anything owning a thread and/or a socket that the registry can force-close."""
+
+    def is_thread_alive(self) -> bool: ...
+
+    def is_socket_open(self) -> bool: ...
+
+    def queued_bytes(self) -> int: ...
+
+    def queued_messages(self) -> int: ...
+
+    def close(self, timeout: float = ...) -> None: ...
+
+
+@dataclass
+class SessionStats:
+    threads: int
+    sockets: int
+    queued_bytes: int
+    queued_messages: int
+    idle_seconds: float
+    memory_bytes: int
+
+
+@dataclass
+class _SessionEntry:
+    last_heartbeat: float
+    resources: list[ManagedResource] = field(default_factory=list)
+    # estimated bytes per session-state key, see memory_accounting
+    memory: dict[str, int] = field(default_factory=dict)
+    memory_sampled_at: float = float("-inf")
+
+
+def get_session_id() -> Optional[str]:
+    """Return the id of the Streamlit session running the current script, if any."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _is_streamlit_session_alive(session_id: str) -> bool:
+    """Ask the Streamlit runtime whether the browser session still exists.
+
+    Returns True when the runtime cannot be queried so that only the idle
+    timeout decides in that case.
+    """
+    try:
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return True
+        return bool(Runtime.instance().is_active_session(session_id))
+    except Exception:
+        return True
+
+
+class SessionRegistry:
+    """Tracks the background resources (WebSocket managers) owned by each session.
+
+    Sessions prove they are alive by calling `heartbeat` on every rerun. A
+    daemon reaper thread force-closes the resources of sessions whose browser
+    tab is gone or that have not sent a heartbeat within `idle_timeout`.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        reaper_interval: float = REAPER_INTERVAL,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.reaper_interval = reaper_interval
+        self._sessions: dict[str, _SessionEntry] = {}
+        self._close_hooks: list[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+
+    def register(
+        self, resource: ManagedResource, session_id: Optional[str] = None
+    ) -> None:
+        session_id = session_id or get_session_id()
+        if session_id is None:
+            return
+        with self._lock:
+            entry = self._sessions.setdefault(
+                session_id, _SessionEntry(time.monotonic())
+            )
+            if not any(existing is resource for existing in entry.resources):
+                entry.resources.append(resource)
+            entry.last_heartbeat = time.monotonic()
+        self._ensure_reaper()
+
+    def add_close_hook(self, hook: Callable[[str], None]) -> None:
+        """Call `hook(session_id)` whenever a session is closed, e.g. by the reaper."""
+        self._close_hooks.append(hook)
+
+    def unregister(self, resource: ManagedResource) -> None:
+        with self._lock:
+            for entry in self._sessions.values():
+                entry.resources = [r for r in entry.resources if r is not resource]
+
+    def is_registered(
+        self, resource: ManagedResource, session_id: Optional[str] = None
+    ) -> bool:
+        """Whether `resource` is still tracked, i.e. was not closed by a reap."""
+        session_id = session_id or get_session_id()
+        if session_id is None:
+            # untracked sessions are never reaped
+            return True
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry is not None and any(
+                existing is resource for existing in entry.resources
+            )
+
+    def heartbeat(self, session_id: Optional[str] = None, create: bool = False) -> None:
+        """Mark the session alive; with `create`, start tracking it if needed."""
+        session_id = session_id or get_session_id()
+        if session_id is None:
+            return
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None and create:
+                entry = self._sessions[session_id] = _SessionEntry(time.monotonic())
+            if entry is not None:
+                entry.last_heartbeat = time.monotonic()
+        if create:
+            self._ensure_reaper()
+
+    def record_memory(self, session_id: str, sizes: dict[str, int]) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry.memory = dict(sizes)
+                entry.memory_sampled_at = time.monotonic()
+
+    def memory_sampled_at(self, session_id: str) -> float:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry.memory_sampled_at if entry is not None else float("-inf")
+
+    def memory_report(self) -> dict[str, dict[str, int]]:
+        """The last memory sample of every session."""
+        with self._lock:
+            return {
+                session_id: dict(entry.memory)
+                for session_id, entry in self._sessions.items()
+            }
+
+    def close_session(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return
+        for resource in entry.resources:
+            try:
+                resource.close()
+            except Exception as e:
+                print(f"Error closing resource of session {session_id}: {e}")
+        for hook in self._close_hooks:
+            try:
+                hook(session_id)
+            except Exception as e:
+                print(f"Error in close hook of session {session_id}: {e}")
+
+    def reap(self, now: Optional[float] = None) -> list[str]:
+        """Close every session that is idle or no longer known to Streamlit."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            candidates = [
+                (session_id, now - entry.last_heartbeat)
+                for session_id, entry in self._sessions.items()
+            ]
+        reaped = []
+        for session_id, idle in candidates:
+            if idle > self.idle_timeout or not _is_streamlit_session_alive(session_id):
+                print(f"Reaping session {session_id} (idle {idle:.0f}s)")
+                self.close_session(session_id)
+                reaped.append(session_id)
+        return reaped
+
+    def stats(self) -> dict[str, SessionStats]:
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._sessions.items())
+        return {
+            session_id: SessionStats(
+                threads=sum(r.is_thread_alive() for r in entry.resources),
+                sockets=sum(r.is_socket_open() for r in entry.resources),
+                queued_bytes=sum(r.queued_bytes() for r in entry.resources),
+                queued_messages=sum(r.queued_messages() for r in entry.resources),
+                idle_seconds=now - entry.last_heartbeat,
+                memory_bytes=sum(entry.memory.values()),
+            )
+            for session_id, entry in entries
+        }
+
+    def totals(self) -> dict[str, Any]:
+        stats = self.stats()
+        return {
+            "sessions": len(stats),
+            "threads": sum(s.threads for s in stats.values()),
+            "sockets": sum(s.sockets for s in stats.values()),
+            "queued_bytes": sum(s.queued_bytes for s in stats.values()),
+            "queued_messages": sum(s.queued_messages for s in stats.values()),
+            "memory_bytes": sum(s.memory_bytes for s in stats.values()),
+        }
+
+    def shutdown(self) -> None:
+        self._stop_reaper.set()
+        with self._lock:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            self.close_session(session_id)
+
+    def _ensure_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._stop_reaper.clear()
+            self._reaper = threading.Thread(
+                target=self._reap_forever, name="session-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while not self._stop_reaper.wait(self.reaper_interval):
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Error in session reaper: {e}")
+
+
+session_registry = SessionRegistry()
@@ -0,0 +1,419 @@
+"""A lightweight stand-in for the sotopia simulation API server.
+
+Implements `/scenarios`, `/agents`, `/models` and `/ws/simulation` with the same
+message protocol as the external FastAPI server, so the streaming UI can be run,
+tested and benchmarked locally:
+
+    python -m socialstream.sim_server --port 8000
+    python -m socialstream.sim_server --port 8000 --synthetic  # no Redis / LLM
+
+All simulations run as tasks on a single event loop.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+from aiohttp import WSMsgType, web
+
+from socialstream.framing import SUPPORTED_SUBPROTOCOLS, get_codec
+
+SendFunc = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class Catalog(Protocol):
+    def scenarios(self) -> list[dict[str, Any]]: ...
+
+    def agents(self) -> list[dict[str, Any]]: ...
+
+    def models(self) -> list[str]: ...
+
+
+class EpisodeRunner(Protocol):
+    async def run(
+        self, start: dict[str, Any], send: SendFunc, finish: asyncio.Event
+    ) -> None:
+        """Run one simulation for a `START_SIM` payload, streaming `SERVER_MSG`s."""
+        ...
+
+
+def server_msg(role: str, type: str, content: Any, **extra: Any) -> dict[str, Any]:
+    return {
+        "type": "SERVER_MSG",
+        "data": {"role": role, "type": type, "content": content, **extra},
+    }
+
+
+class ProfileCatalog:
+    """Serves the agent and environment profiles of the configured Redis and `data/`."""
+
+    def __init__(self, models: Optional[list[str]] = None) -> None:
+        from socialstream.utils import HUMAN_MODEL_NAME, MODEL_LIST
+
+        # the server has no one to ask for a human turn
+        self._models = models or [m for m in MODEL_LIST if m != HUMAN_MODEL_NAME]
+        self._agents: Optional[dict[str, Any]] = None
+        self._envs: Optional[dict[str, Any]] = None
+        # requests run in executor threads, so only one of them loads
+        self._load_lock = threading.Lock()
+
+    def _load(self) -> None:
+        from sotopia.database import AgentProfile, EnvironmentProfile
+
+        from socialstream.utils import load_additional_agents, load_additional_envs
+
+        agents = load_additional_agents() + AgentProfile.find().all()
+        envs = load_additional_envs() + EnvironmentProfile.find().all()
+        self._agents = {agent.pk: agent for agent in agents}
+        self._envs = {env.pk: env for env in envs}
+
+    def agent_profiles(self) -> dict[str, Any]:
+        with self._load_lock:
+            if self._agents is None:
+                self._load()
+        return self._agents
+
+    def env_profiles(self) -> dict[str, Any]:
+        with self._load_lock:
+            if self._envs is None:
+                self._load()
+        return self._envs
+
+    def scenarios(self) -> list[dict[str, Any]]:
+        return [env.dict() for env in self.env_profiles().values()]
+
+    def agents(self) -> list[dict[str, Any]]:
+        return [agent.dict() for agent in self.agent_profiles().values()]
+
+    def models(self) -> list[str]:
+        return self._models
+
+
+class SotopiaEpisodeRunner:
+    """Runs a sotopia episode with `get_env_agents` and streams the rendered turns."""
+
+    def __init__(
+        self, catalog: ProfileCatalog, evaluator_model: str = "gpt-4o"
+    ) -> None:
+        self.catalog = catalog
+        self.evaluator_model = evaluator_model
+
+    async def run(
+        self, start: dict[str, Any], send: SendFunc, finish: asyncio.Event
+    ) -> None:
+        from sotopia.messages import AgentAction
+
+        from socialstream.evaluation import EpisodeEvaluation, parse_evaluation
+        from socialstream.message_store import ConversationStore
+        from socialstream.rendering_utils import render_messages
+        from socialstream.utils import (
+            DEFAULT_MODEL,
+            EnvAgentProfileCombo,
+            get_env_agents,
+        )
+
+        def prepare() -> tuple[Any, dict[str, Any], dict[str, Any]]:
+            env_profile = self.catalog.env_profiles()[start["env_id"]]
+            agent_profiles = [
+                self.catalog.agent_profiles()[agent_id]
+                for agent_id in start["agent_ids"]
+            ]
+            agent_models = start.get("agent_models") or [DEFAULT_MODEL, DEFAULT_MODEL]
+            return get_env_agents(
+                EnvAgentProfileCombo(env=env_profile, agents=agent_profiles),
+                agent_models=agent_models,
+                evaluator_model=self.evaluator_model,
+            )
+
+        # loading the profiles and building the agents block, so run it off the loop
+        env, agents, observations = await asyncio.get_running_loop().run_in_executor(
+            None, prepare
+        )
+        agent_list = list(agents.values())
+        messages = ConversationStore(
+            [[("Environment", name, observations[name]) for name in env.agents]]
+        )
+        reasoning, rewards = "", [0.0, 0.0]
+        evaluation = EpisodeEvaluation()
+        sent = 0
+
+        done = False
+        while not done:
+            if finish.is_set():
+                actions = [
+                    AgentAction(action_type="leave", argument="") for _ in env.agents
+                ]
+            else:
+                actions = await asyncio.gather(
+                    *[agents[name].aact(observations[name]) for name in env.agents]
+                )
+            for name, action in zip(env.agents, actions):
+                messages.append_to_last_turn(name, "Environment", action)
+            observations, _, terminated, _, info = await env.astep(
+                dict(zip(env.agents, actions))
+            )
+            messages.append(
+                [("Environment", name, observations[name]) for name in env.agents]
+            )
+            done = all(terminated.values())
+            if done:
+                rewards = [info[name]["complete_rating"] for name in env.agents]
+                reasoning = info[env.agents[0]]["comments"]
+                evaluation = parse_evaluation(reasoning, rewards)
+
+            rendered = render_messages(
+                env, agent_list, messages, reasoning, rewards, evaluation
+            )
+            for message in rendered[sent:]:
+                await send(
+                    server_msg(message["role"], message["type"], message["content"])
+                )
+            sent = len(rendered)
+
+
+class SyntheticCatalog:
+    """A fixed in-memory catalog for tests and load benchmarks."""
+
+    def __init__(self, num_agents: int = 10, num_scenarios: int = 5) -> None:
+        self._agents = [
+            {"pk": f"agent-{i}", "first_name": "Agent", "last_name": str(i)}
+            for i in range(num_agents)
+        ]
+        self._scenarios = [
+            {
+                "pk": f"env-{i}",
+                "codename": f"scenario_{i}",
+                "scenario": f"Synthetic scenario number {i}.",
+                "agent_goals": ["Goal one", "Goal two"],
+            }
+            for i in range(num_scenarios)
+        ]
+
+    def scenarios(self) -> list[dict[str, Any]]:
+        return self._scenarios
+
+    def agents(self) -> list[dict[str, Any]]:
+        return self._agents
+
+    def models(self) -> list[str]:
+        return ["synthetic"]
+
+
+class SyntheticEpisodeRunner:
+    """Streams `num_messages` frames of `payload_size` characters at `rate` per second.
+
+    Every frame carries `seq` and the server-side `sent_at` wall clock time so
+    that clients can measure delivery latency.
+    """
+
+    def __init__(
+        self, num_messages: int = 100, rate: float = 100.0, payload_size: int = 1024
+    ) -> None:
+        self.num_messages = num_messages
+        self.rate = rate
+        self.payload_size = payload_size
+
+    async def run(
+        self, start: dict[str, Any], send: SendFunc, finish: asyncio.Event
+    ) -> None:
+        num_messages = start.get("num_messages", self.num_messages)
+        rate = start.get("rate", self.rate)
+        payload = "x" * start.get("payload_size", self.payload_size)
+        interval = 1.0 / rate if rate > 0 else 0.0
+        next_at = time.perf_counter()
+        for seq in range(num_messages):
+            if finish.is_set():
+                break
+            await send(
+                server_msg(
+                    "Environment", "environment", payload, seq=seq, sent_at=time.time()
+                )
+            )
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            # yield to other simulations even when sending as fast as possible
+            await asyncio.sleep(max(delay, 0.0))
+
+
+def _json_response(request: web.Request, body: Any) -> web.Response:
+    """JSON response with an ETag so that clients can revalidate conditionally."""
+    text = json.dumps(body, default=str)
+    etag = '"' + hashlib.sha1(text.encode()).hexdigest() + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(
+        text=text, content_type="application/json", headers={"ETag": etag}
+    )
+
+
+class SimulationServer:
+    def __init__(self, catalog: Catalog, runner: EpisodeRunner) -> None:
+        self.catalog = catalog
+        self.runner = runner
+        self.active_simulations = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/scenarios", self.handle_scenarios)
+        app.router.add_get("/agents", self.handle_agents)
+        app.router.add_get("/models", self.handle_models)
+        app.router.add_get("/ws/simulation", self.handle_simulation)
+        return app
+
+    async def handle_scenarios(self, request: web.Request) -> web.Response:
+        # the first call of a ProfileCatalog loads from Redis and data/
+        loop = asyncio.get_running_loop()
+        return _json_response(
+            request, await loop.run_in_executor(None, self.catalog.scenarios)
+        )
+
+    async def handle_agents(self, request: web.Request) -> web.Response:
+        loop = asyncio.get_running_loop()
+        return _json_response(
+            request, await loop.run_in_executor(None, self.catalog.agents)
+        )
+
+    async def handle_models(self, request: web.Request) -> web.Response:
+        return _json_response(request, self.catalog.models())
+
+    async def handle_simulation(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(protocols=SUPPORTED_SUBPROTOCOLS, compress=True)
+        await ws.prepare(request)
+        codec = get_codec(ws.ws_protocol)
+
+        async def send(message: dict[str, Any]) -> None:
+            if codec.binary:
+                await ws.send_bytes(codec.encode(message))
+            else:
+                await ws.send_str(codec.encode(message))
+
+        finish = asyncio.Event()
+        simulation: Optional[asyncio.Task[None]] = None
+
+        async def run(start: dict[str, Any]) -> None:
+            self.active_simulations += 1
+            try:
+                await self.runner.run(start, send, finish)
+                await send({"type": "END_SIM", "data": ""})
+            except Exception as e:
+                print(f"Simulation failed: {e}")
+                await send(
+                    {"type": "ERROR", "data": {"type": "SIM_ERROR", "content": str(e)}}
+                )
+            finally:
+                self.active_simulations -= 1
+
+        try:
+            async for msg in ws:
+                if msg.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    break
+                message = codec.decode(msg.data)
+                match message.get("type"):
+                    case "START_SIM":
+                        if simulation is None or simulation.done():
+                            finish.clear()
+                            simulation = asyncio.create_task(run(message["data"]))
+                    case "FINISH_SIM":
+                        finish.set()
+                    case _:
+                        await send(
+                            {
+                                "type": "ERROR",
+                                "data": {
+                                    "type": "INVALID_MESSAGE",
+                                    "content": f"Unknown message type: {message.get('type')}",
+                                },
+                            }
+                        )
+        finally:
+            if simulation is not None and not simulation.done():
+                simulation.cancel()
+        return ws
+
+
+class ServerHandle:
+    """A simulation server running on its own event loop in a daemon thread."""
+
+    def __init__(self, server: SimulationServer, host: str, port: int) -> None:
+        self.server = server
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(
+            target=self._serve, name="sim-server", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "ServerHandle":
+        self._thread.start()
+        self._started.wait(timeout=10)
+        return self
+
+    def stop(self) -> None:
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(
+                timeout=10
+            )
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.server.make_app())
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        if self.port == 0:
+            # pick up the port chosen by the OS
+            self.port = self._runner.addresses[0][1]
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+
+def run_in_thread(
+    catalog: Optional[Catalog] = None,
+    runner: Optional[EpisodeRunner] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> ServerHandle:
+    """Start a stand-in server in the background; defaults to the synthetic setup."""
+    server = SimulationServer(
+        catalog or SyntheticCatalog(), runner or SyntheticEpisodeRunner()
+    )
+    return ServerHandle(server, host, port).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="serve a synthetic catalog and stream synthetic messages",
+    )
+    parser.add_argument("--evaluator-model", default="gpt-4o")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        server = SimulationServer(SyntheticCatalog(), SyntheticEpisodeRunner())
+    else:
+        catalog = ProfileCatalog()
+        server = SimulationServer(
+            catalog, SotopiaEpisodeRunner(catalog, evaluator_model=args.evaluator_model)
+        )
+    web.run_app(server.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Structured trace spans for episodes, written as JSON lines or sent over OTLP.
+
+    SOCIALSTREAM_TRACE_FILE=logs/traces.jsonl        rotating local file
+    SOCIALSTREAM_OTLP_ENDPOINT=http://localhost:4318  OTLP/HTTP JSON collector
+
+Each span carries the episode id as its trace id, so every turn of an episode
+(the UI-triggered `turn` span, the agent's `agent.act` and the environment's
+`env.step`) can be followed end to end. Without an exporter configured,
+`trace_span` records nothing.
+
+`debug_sampled` replaces unconditional prints of large objects: the message is
+only formatted when the `socialstream` logger is at DEBUG level and the call is
+sampled (`SOCIALSTREAM_DEBUG_SAMPLE_RATE`, default 0.1). Set
+`SOCIALSTREAM_LOG_LEVEL=DEBUG` to see them.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Protocol
+
+TRACE_FILE = os.environ.get("SOCIALSTREAM_TRACE_FILE", "")
+OTLP_ENDPOINT = os.environ.get("SOCIALSTREAM_OTLP_ENDPOINT", "")
+DEBUG_SAMPLE_RATE = float(os.environ.get("SOCIALSTREAM_DEBUG_SAMPLE_RATE", 0.1))
+TRACE_FILE_MAX_BYTES = 50 * 1024 * 1024
+TRACE_FILE_BACKUPS = 5
+OTLP_BATCH_SIZE = 256
+OTLP_FLUSH_INTERVAL = 5.0
+
+LOG_LEVEL = os.environ.get("SOCIALSTREAM_LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("socialstream")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "socialstream_current_span", default=None
+)
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def estimate_tokens(chars: int) -> int:
+    """Rough token count for `chars` characters (~4 per token); no tokenizer needed."""
+    return (chars + 3) // 4
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes")
+
+    def __init__(
+        self, trace_id: str, parent_id: Optional[str], name: str, attributes: dict
+    ) -> None:
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class Exporter(Protocol):
+    def export(self, record: dict[str, Any]) -> None: ...
+
+
+class JsonLinesExporter:
+    """Appends one JSON line per span to a size-rotated file from a listener thread."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = TRACE_FILE_MAX_BYTES,
+        backups: int = TRACE_FILE_BACKUPS,
+    ) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def export(self, record: dict[str, Any]) -> None:
+        self._queue.put(logging.makeLogRecord({"msg": json.dumps(record, default=str)}))
+
+
+class OtlpHttpExporter:
+    """Batches spans and posts them as OTLP/HTTP JSON from a daemon thread."""
+
+    def __init__(self, endpoint: str, service_name: str = "socialstream") -> None:
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._queue: queue.SimpleQueue[dict[str, Any]] = queue.SimpleQueue()
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, record: dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def _run(self) -> None:
+        import requests
+
+        session = requests.Session()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + OTLP_FLUSH_INTERVAL
+            while len(batch) < OTLP_BATCH_SIZE and time.monotonic() < deadline:
+                try:
+                    batch.append(self._queue.get(timeout=0.5))
+                except queue.Empty:
+                    pass
+            try:
+                session.post(self.url, json=self._payload(batch), timeout=10)
+            except Exception as e:
+                print(f"Error exporting {len(batch)} spans to {self.url}: {e}")
+
+    def _payload(self, batch: list[dict[str, Any]]) -> dict[str, Any]:
+        def attribute(key: str, value: Any) -> dict[str, Any]:
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            return {"key": key, "value": typed}
+
+        spans = [
+            {
+                "traceId": record["trace_id"],
+                "spanId": record["span_id"],
+                "parentSpanId": record["parent_id"] or "",
+                "name": record["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(record["start_ns"]),
+                "endTimeUnixNano": str(record["end_ns"]),
+                "attributes": [
+                    attribute(key, value) for key, value in record["attributes"].items()
+                ],
+                "status": {"code": 2 if record["error"] else 1},
+            }
+            for record in batch
+        ]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [attribute("service.name", self.service_name)]
+                    },
+                    "scopeSpans": [{"scope": {"name": "socialstream"}, "spans": spans}],
+                }
+            ]
+        }
+
+
+class Tracer:
+    def __init__(self, exporters: Optional[list[Exporter]] = None) -> None:
+        self.exporters = exporters or []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    @contextmanager
+    def span(
+        self, name: str, trace_id: Optional[str] = None, **attributes: Any
+    ) -> Iterator[Optional[Span]]:
+        """Record `name` as a child of the current span, or a root in `trace_id`."""
+        if not self.exporters:
+            yield None
+            return
+        parent = _current_span.get()
+        if trace_id is None:
+            trace_id = parent.trace_id if parent is not None else new_trace_id()
+        parent_id = (
+            parent.span_id
+            if parent is not None and parent.trace_id == trace_id
+            else None
+        )
+        span = Span(trace_id, parent_id, name, attributes)
+        token = _current_span.set(span)
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            yield span
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_span.reset(token)
+            self._export(
+                {
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ns": start_ns,
+                    "end_ns": start_ns + int(elapsed * 1e9),
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "attributes": span.attributes,
+                    "error": error,
+                }
+            )
+
+    def _export(self, record: dict[str, Any]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                print(f"Error exporting span {record['name']}: {e}")
+
+
+def _default_exporters() -> list[Exporter]:
+    exporters: list[Exporter] = []
+    if TRACE_FILE:
+        exporters.append(JsonLinesExporter(TRACE_FILE))
+    if OTLP_ENDPOINT:
+        exporters.append(OtlpHttpExporter(OTLP_ENDPOINT))
+    return exporters
+
+
+tracer = Tracer(_default_exporters())
+trace_span = tracer.span
+
+
+def debug_sampled(msg: str, *args: Any, rate: float = DEBUG_SAMPLE_RATE) -> None:
+    """`logger.debug` for a sampled fraction of calls; args are formatted lazily."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < rate:
+        logger.debug(msg, *args)
@@ -1,7 +1,5 @@
 import asyncio
-import glob
-import json
-import os
+import time
 from functools import wraps
 from typing import Optional, TypedDict, cast
 
@@ -24,10 +22,41 @@ from sotopia.envs.evaluators import (
 from sotopia.envs.parallel import (
     _agent_profile_to_friendabove_self,
     render_text_for_agent,
-    render_text_for_environment,
 )
 from sotopia.messages import AgentAction, Observation
 
+from socialstream.admission import QUEUE_POLL_INTERVAL, Ticket, admission_controller
+from socialstream.combo_sampler import combo_access
+from socialstream.evaluation import (
+    EpisodeEvaluation,
+    evaluation_cache,
+    parse_evaluation,
+)
+from socialstream.import_profiles import without_imported
+from socialstream.memory_accounting import admit_load
+from socialstream.message_store import ConversationStore
+from socialstream.metrics import (
+    evaluation_latency,
+    redis_query_latency,
+    turn_latency,
+    turns_total,
+)
+from socialstream.name_registry import NameRegistry, get_shared_registry
+from socialstream.profile_resolver import profile_resolver
+from socialstream.profile_source import agent_source, env_source
+from socialstream.profiler import profiled, span
+from socialstream.scenario_memo import LazyAbstractMapping, scenario_memo
+from socialstream.search_index import get_agent_index, get_codename_index
+from socialstream.session_lifecycle import get_session_id
+from socialstream.tracing import (
+    debug_sampled,
+    estimate_tokens,
+    logger,
+    new_trace_id,
+    trace_span,
+    tracer,
+)
+
 HUMAN_MODEL_NAME = "human"
 MODEL_LIST = [
     "gpt-4o-mini",
@@ -61,36 +90,11 @@ class ActionState:
 
 WAIT_STATE: list[int] = [ActionState.AGENT1_WAITING, ActionState.AGENT2_WAITING]
 SPEAK_STATE: list[int] = [ActionState.AGENT1_SPEAKING, ActionState.AGENT2_SPEAKING]
-from collections import defaultdict
 
 
-def get_full_name(agent_profile) -> str:
-    """
-    根据agent_profile返回唯一的全名。
-    如果存在重名，会自动添加数字后缀。
-    """
-    # 如果这个profile已经有映射的名字，直接返回
-    if agent_profile.pk in st.session_state.profile_name_mapping:
-        return st.session_state.profile_name_mapping[agent_profile.pk]
-
-    base_name = f"{agent_profile.first_name} {agent_profile.last_name}"
-
-    existing_names = set(st.session_state.profile_name_mapping.values())
-
-    if base_name not in existing_names:
-        st.session_state.profile_name_mapping[agent_profile.pk] = base_name
-        st.session_state.name_count[base_name] = 1
-        return base_name
-
-    st.session_state.name_count[base_name] += 1
-    new_name = f"{base_name}_{st.session_state.name_count[base_name]}"
-
-    while new_name in existing_names:
-        st.session_state.name_count[base_name] += 1
-        new_name = f"{base_name}_{st.session_state.name_count[base_name]}"
-
-    st.session_state.profile_name_mapping[agent_profile.pk] = new_name
-    return new_name
+def get_full_name(agent_profile: AgentProfile) -> str:
+    """Return the unique display name of a profile (duplicates get _2, _3, ...)."""
+    return st.session_state.name_registry.name_for(agent_profile)
 
 
 # def get_full_name(agent_profile: AgentProfile) -> str:
@@ -100,15 +104,15 @@ def get_full_name(agent_profile) -> str:
 def print_current_speaker() -> None:
     match st.session_state.state:
         case ActionState.AGENT1_SPEAKING:
-            print("Agent 1 is speaking...")
+            logger.debug("Agent 1 is speaking...")
         case ActionState.AGENT2_SPEAKING:
-            print("Agent 2 is speaking...")
+            logger.debug("Agent 2 is speaking...")
         case ActionState.AGENT1_WAITING:
-            print("Agent 1 is waiting...")
+            logger.debug("Agent 1 is waiting...")
         case ActionState.AGENT2_WAITING:
-            print("Agent 2 is waiting...")
+            logger.debug("Agent 2 is waiting...")
         case ActionState.EVALUATION_WAITING:
-            print("Evaluation is waiting...")
+            logger.debug("Evaluation is waiting...")
 
 
 class EnvAgentProfileCombo:
@@ -134,43 +138,30 @@ def get_abstract(description: str) -> str:
 
 
 def load_additional_agents() -> list[AgentProfile]:
-    data_file_pattern = "data/*_agents.json"
-    all_files = glob.glob(data_file_pattern)
-    agents = []
-    for data_file in all_files:
-        if not os.path.exists(data_file):
-            return []
-        agents.extend(
-            [AgentProfile(**agent_data) for agent_data in json.load(open(data_file))]
-        )
-    return agents
+    # imported ones are listed from Redis, see import_profiles
+    return without_imported(AgentProfile, agent_source.load())
 
 
 def load_additional_envs() -> list[EnvironmentProfile]:
-    data_file_pattern = "data/*_scenarios.json"
-    all_files = glob.glob(data_file_pattern)
-    envs = []
-    for data_file in all_files:
-        if not os.path.exists(data_file):
-            return []
-        envs.extend(
-            [EnvironmentProfile(**env_data) for env_data in json.load(open(data_file))]
-        )
-    return envs
+    return without_imported(EnvironmentProfile, env_source.load())
 
 
+@profiled("initialize_session_state")
 def initialize_session_state(force_reload: bool = False) -> None:
     if "active" not in st.session_state or force_reload:
-        st.session_state.profile_name_mapping = defaultdict()
-        st.session_state.name_count = defaultdict(int)
-
-        all_agents = AgentProfile.find().all()
-        all_envs = EnvironmentProfile.find().all()
+        with redis_query_latency.time(query="profiles.find"):
+            all_agents = AgentProfile.find().all()
+            all_envs = EnvironmentProfile.find().all()
         additional_agents = load_additional_agents()
         additional_envs = load_additional_envs()
 
         all_agents = additional_agents + all_agents
         all_envs = additional_envs + all_envs
+        # names are assigned once per catalog and shared between sessions;
+        # profiles seen later (e.g. in episodes) go to the session's overlay
+        st.session_state.name_registry = NameRegistry(
+            parent=get_shared_registry(all_agents)
+        )
 
         # if there are the same name, use _1, _2, _3, ...
         # agent_names = [get_full_name(agent) for agent in all_agents]
@@ -193,22 +184,26 @@ def initialize_session_state(force_reload: bool = False) -> None:
         st.session_state.env_mapping = {
             env_profile.codename: env_profile for env_profile in all_envs
         }
-        st.session_state.env_description_mapping = {
-            env_profile.codename: get_abstract(
-                render_text_for_environment(env_profile.scenario)
-            )
-            for env_profile in all_envs
-        }
+        st.session_state.agent_index = get_agent_index(
+            st.session_state.agent_mapping[0]
+        )
+        st.session_state.scenario_index = get_codename_index(
+            st.session_state.env_mapping
+        )
+        # abstracts are rendered on first access and shared between sessions
+        st.session_state.env_description_mapping = LazyAbstractMapping(
+            st.session_state.env_mapping, scenario_memo
+        )
 
         st.session_state.active = False
         st.session_state.conversation = []
         st.session_state.background = "Default Background"
-        st.session_state.env_agent_combo = EnvAgentComboStorage.find().all()[0]
+        st.session_state.env_agent_combo = combo_access.first()
         st.session_state.state = ActionState.IDLE
         st.session_state.env = None
         st.session_state.agents = None
         st.session_state.environment_messages = None
-        st.session_state.messages = []
+        st.session_state.messages = ConversationStore()
         st.session_state.agent_models = [DEFAULT_MODEL, DEFAULT_MODEL]
         st.session_state.evaluator_model = "gpt-4o"
         st.session_state.editable = False
@@ -216,6 +211,7 @@ def initialize_session_state(force_reload: bool = False) -> None:
 
         st.session_state.rewards = [0.0, 0.0]
         st.session_state.reasoning = ""
+        st.session_state.evaluation = EpisodeEvaluation()
         st.session_state.agent_choice_1 = get_full_name(all_agents[0])
         st.session_state.agent_choice_2 = get_full_name(all_agents[1])
         st.session_state.scenario_choice = all_envs[0].codename
@@ -235,10 +231,12 @@ def initialize_session_state(force_reload: bool = False) -> None:
             env.codename: env.pk for env in EnvironmentProfile.find().all()
         }
         st.session_state.all_codenames = codename_pk_mapping
-        st.session_state.current_episodes = EpisodeLog.find(
-            EpisodeLog.environment
-            == codename_pk_mapping[list(codename_pk_mapping.keys())[0]]
-        ).all()
+        st.session_state.codename_index = get_codename_index(codename_pk_mapping)
+        if admit_load():
+            st.session_state.current_episodes = EpisodeLog.find(
+                EpisodeLog.environment
+                == codename_pk_mapping[list(codename_pk_mapping.keys())[0]]
+            ).all()
 
 
 def set_from_env_agent_profile_combo(
@@ -250,30 +248,33 @@ def set_from_env_agent_profile_combo(
     st.session_state.agents = agents
     st.session_state.environment_messages = environment_messages
     if reset_msgs:
-        st.session_state.messages = []
+        st.session_state.episode_id = new_trace_id()
+        st.session_state.messages = ConversationStore()
         st.session_state.reasoning = ""
         st.session_state.rewards = [0.0, 0.0]
-    st.session_state.messages = (
-        [
-            [
-                ("Environment", agent_name, environment_messages[agent_name])
-                for agent_name in env.agents
-            ]
-        ]
-        if st.session_state.messages == []
-        else st.session_state.messages
-    )
+        st.session_state.evaluation = EpisodeEvaluation()
+    if len(st.session_state.messages) == 0:
+        st.session_state.messages.append(
+            ("Environment", agent_name, environment_messages[agent_name])
+            for agent_name in env.agents
+        )
 
 
 def get_env_agents(
     env_agent_combo: EnvAgentProfileCombo,
+    agent_models: list[str] | None = None,
+    evaluator_model: str | None = None,
 ) -> tuple[ParallelSotopiaEnv, Agents, dict[str, Observation]]:
+    # models default to the current session's choices; pass them explicitly
+    # when running outside of a Streamlit session (e.g. the simulation server)
+    agent_models = agent_models or st.session_state.agent_models
+    evaluator_model = evaluator_model or st.session_state.evaluator_model
     environment_profile = env_agent_combo.env
     agent_profiles = env_agent_combo.agents
     agent_list = [
         LLMAgent(
             agent_profile=agent_profile,
-            model_name=st.session_state.agent_models[agent_idx],
+            model_name=agent_models[agent_idx],
         )
         for agent_idx, agent_profile in enumerate(agent_profiles)
     ]
@@ -283,13 +284,13 @@ def get_env_agents(
     agents = Agents({agent.agent_name: agent for agent in agent_list})
     env = ParallelSotopiaEnv(
         action_order="round-robin",
-        model_name=st.session_state.evaluator_model,
+        model_name=evaluator_model,
         evaluators=[
             RuleBasedTerminatedEvaluator(max_turn_number=20, max_stale_turn=2),
         ],
         terminal_evaluators=[
             ReachGoalLLMEvaluator(
-                st.session_state.evaluator_model,
+                evaluator_model,
                 EvaluationForTwoAgents[SotopiaDimensions],
             ),
         ],
@@ -330,28 +331,135 @@ def set_settings(
     )
 
 
+def get_episode_id() -> str:
+    """Id of the session's current episode, used as the trace id of its turns."""
+    if "episode_id" not in st.session_state:
+        st.session_state.episode_id = new_trace_id()
+    return st.session_state.episode_id
+
+
+def _prompt_size(agent: LLMAgent, observation: Observation) -> int:
+    history = sum(len(message.to_natural_language()) for _, message in agent.inbox)
+    return history + len(observation.to_natural_language())
+
+
+def get_admission_id() -> str:
+    """Key of the current session in the admission controller."""
+    return get_session_id() or get_episode_id()
+
+
+def _request_admission() -> Ticket:
+    models = [
+        model for model in st.session_state.agent_models if model != HUMAN_MODEL_NAME
+    ]
+    # the environment calls the evaluator on every step
+    models.append(st.session_state.evaluator_model)
+    return admission_controller.request(get_admission_id(), models)
+
+
+@st.fragment(run_every=QUEUE_POLL_INTERVAL)
+def _queue_status() -> None:
+    # polls without rerunning the whole page; reruns it once admitted
+    ticket = _request_admission()
+    if ticket.admitted:
+        st.rerun()
+    st.info(
+        f"All models are busy. You are number {ticket.position} in the queue, "
+        f"estimated wait about {max(round(ticket.eta_seconds / 60), 1)} min. "
+        "The conversation starts automatically."
+    )
+
+
+def admission_gate() -> bool:
+    """Whether the active episode may take turns now.
+
+    A session that has pressed Start asks for a slot on every rerun; while it
+    waits, its place in the queue and the estimated wait are shown instead.
+    """
+    if not st.session_state.get("active"):
+        return True
+    admitted = _request_admission().admitted
+    if not admitted:
+        _queue_status()
+    return admitted
+
+
+def stop_if_queued() -> bool:
+    """End the active episode without evaluating it if the session is not admitted.
+
+    Evaluating calls the evaluator model, so a queued session must not run it.
+    Returns whether the episode was ended.
+    """
+    if _request_admission().admitted:
+        return False
+    admission_controller.release(get_admission_id())
+    st.session_state.state = ActionState.IDLE
+    st.session_state.active = False
+    st.session_state.done = False
+    return True
+
+
 def step(user_input: str | None = None) -> None:
+    with trace_span(
+        "turn",
+        trace_id=get_episode_id(),
+        episode_id=get_episode_id(),
+        turn=len(st.session_state.messages),
+        state=st.session_state.state,
+    ):
+        _step(user_input)
+
+
+def _step(user_input: str | None = None) -> None:
     print_current_speaker()
     env: ParallelSotopiaEnv = st.session_state.env
-    print("Env profile: ", env.profile)
+    debug_sampled("Env profile: %s", env.profile)
     for agent_name in env.agents:
-        print("Agent profile: ", st.session_state.agents[agent_name].profile)
-        print("Agent goal: ", st.session_state.agents[agent_name].goal)
+        debug_sampled(
+            "Agent profile: %s, goal: %s",
+            st.session_state.agents[agent_name].profile,
+            st.session_state.agents[agent_name].goal,
+        )
 
     def act_function(
         user_input: Optional[str], is_human: bool, agent_name: str
     ) -> AgentAction:
         assert user_input is not None or not is_human, "User input is required"
+        model = st.session_state.agents[agent_name].model_name
+        turns_total.inc(model=model)
         if is_human:
             st.session_state.agents[agent_name].recv_message(
                 "Environment", st.session_state.environment_messages[agent_name]
             )
+            admission_controller.touch(get_admission_id())
             # set the message to the agents
             return AgentAction(action_type="speak", argument=user_input)
         else:
-            return async_to_sync(st.session_state.agents[agent_name].aact)(
-                st.session_state.environment_messages[agent_name]
-            )  # type: ignore
+            agent = st.session_state.agents[agent_name]
+            observation = st.session_state.environment_messages[agent_name]
+            prompt_chars = _prompt_size(agent, observation) if tracer.enabled else 0
+            with (
+                trace_span(
+                    "agent.act",
+                    agent=agent_name,
+                    model=model,
+                    prompt_chars=prompt_chars,
+                    prompt_tokens_estimate=estimate_tokens(prompt_chars),
+                ) as trace,
+                span("llm.aact"),
+                turn_latency.time(model=model),
+                admission_controller.turn(get_admission_id(), model),
+            ):
+                action = async_to_sync(agent.aact)(observation)  # type: ignore
+                if trace is not None:
+                    trace.set(
+                        action_type=action.action_type,
+                        completion_chars=len(action.argument),
+                        completion_tokens_estimate=estimate_tokens(
+                            len(action.argument)
+                        ),
+                    )
+                return action
 
     agent_messages: dict[str, AgentAction] = dict()
     actions = []
@@ -391,24 +499,37 @@ def step(user_input: str | None = None) -> None:
                         action = AgentAction(action_type="leave", argument="")
                     case _:
                         action = AgentAction(action_type="none", argument="")
-        print(f"Agent {agent_idx} model {model_in_turn} output action: ", action)
+        debug_sampled(
+            "Agent %s model %s output action: %s", agent_idx, model_in_turn, action
+        )
 
         actions.append(action)
 
     for idx, agent_name in enumerate(st.session_state.env.agents):
         agent_messages[agent_name] = actions[idx]
-        st.session_state.messages[-1].append(
-            (agent_name, "Environment", agent_messages[agent_name])
+        st.session_state.messages.append_to_last_turn(
+            agent_name, "Environment", agent_messages[agent_name]
         )
 
     # send agent messages to environment
-    (
-        st.session_state.environment_messages,
-        rewards_in_turn,
-        terminated,
-        ___,
-        info,
-    ) = async_to_sync(st.session_state.env.astep)(agent_messages)
+    step_start = time.perf_counter()
+    with (
+        trace_span(
+            "env.step", evaluator_model=st.session_state.evaluator_model
+        ) as trace,
+        span("llm.astep"),
+        admission_controller.turn(get_admission_id(), st.session_state.evaluator_model),
+    ):
+        (
+            st.session_state.environment_messages,
+            _,
+            terminated,
+            ___,
+            info,
+        ) = async_to_sync(st.session_state.env.astep)(agent_messages)
+        done = all(terminated.values())
+        if trace is not None:
+            trace.set(terminal=done)
     st.session_state.messages.append(
         [
             (
@@ -420,12 +541,16 @@ def step(user_input: str | None = None) -> None:
         ]
     )
 
-    done = all(terminated.values())
     if done:
-        print("Conversation ends...")
+        # the terminal evaluators only run on the last step
+        evaluation_latency.observe(
+            time.perf_counter() - step_start, model=st.session_state.evaluator_model
+        )
+        logger.info("Conversation ends (episode %s)", get_episode_id())
         st.session_state.state = ActionState.IDLE
         st.session_state.active = False
         st.session_state.done = False
+        admission_controller.release(get_admission_id())
 
         agent_list = list(st.session_state.agents.values())
 
@@ -434,6 +559,9 @@ def step(user_input: str | None = None) -> None:
             for agent_name in st.session_state.env.agents
         ]
         st.session_state.reasoning = info[st.session_state.env.agents[0]]["comments"]
+        st.session_state.evaluation = parse_evaluation(
+            st.session_state.reasoning, st.session_state.rewards
+        )
         st.session_state.rewards_prompt = info["rewards_prompt"]["overall_prompt"]
 
     session_state: ActionState = st.session_state.state
@@ -468,6 +596,8 @@ def reset_database(db_url: str) -> None:
 
     EnvAgentComboStorage._meta.database = get_redis_connection(url=db_url)
     EnvAgentComboStorage.Meta.database = get_redis_connection(url=db_url)
+    evaluation_cache.invalidate()
+    profile_resolver.invalidate()
 
 
 def format_for_markdown(text: str) -> str:
@@ -0,0 +1,103 @@
+from socialstream.admission import QUEUE_STALE_SECONDS, AdmissionController
+from socialstream.session_lifecycle import SessionRegistry
+
+
+def controller(**kwargs: object) -> AdmissionController:
+    options: dict = dict(
+        max_active_episodes=2,
+        max_inflight_per_model=1,
+        model_concurrency={},
+        idle_timeout=60.0,
+    )
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_admits_up_to_capacity_then_queues_in_order() -> None:
+    admission = controller()
+    assert admission.request("a", ["gpt"], now=0).admitted
+    assert admission.request("b", ["gpt"], now=0).admitted
+    c = admission.request("c", ["gpt"], now=0)
+    d = admission.request("d", ["gpt"], now=0)
+    assert (c.admitted, c.position) == (False, 1)
+    assert (d.admitted, d.position) == (False, 2)
+    # polling keeps the place in the queue
+    assert admission.request("d", ["gpt"], now=1).position == 2
+
+    admission.release("a", now=2)
+    assert admission.request("d", ["gpt"], now=2).position == 1
+    assert admission.is_active("c")
+    assert admission.stats()["queued"] == 1
+
+
+def test_only_the_head_of_the_queue_is_admitted() -> None:
+    admission = controller(max_active_episodes=0)
+    with admission.turn("x", "busy"):
+        assert not admission.request("head", ["busy"], now=0).admitted
+        # has capacity, but must not overtake the waiting head
+        ticket = admission.request("later", ["free"], now=0)
+        assert (ticket.admitted, ticket.position) == (False, 2)
+    assert admission.request("later", ["free"], now=1).admitted
+    assert admission.is_active("head")
+
+
+def test_inflight_turns_limit_admission() -> None:
+    admission = controller(max_active_episodes=0, model_concurrency={"big": 2})
+    with admission.turn("x", "big"):
+        assert admission.request("a", ["big"], now=0).admitted
+        with admission.turn("y", "big"):
+            assert admission.stats()["inflight"] == {"big": 2}
+            assert not admission.request("b", ["big"], now=0).admitted
+    assert admission.stats()["inflight"] == {"big": 0}
+    assert admission.request("b", ["big"], now=1).admitted
+
+
+def test_no_caps_admits_everyone() -> None:
+    admission = controller(max_active_episodes=0, max_inflight_per_model=0)
+    with admission.turn("x", "gpt"):
+        assert all(
+            admission.request(str(i), ["gpt"], now=0).admitted for i in range(50)
+        )
+
+
+def test_idle_sessions_release_their_slot() -> None:
+    admission = controller(max_active_episodes=1, idle_timeout=10)
+    assert admission.request("a", ["gpt"], now=0).admitted
+    assert admission.release_idle(now=5) == []
+    assert admission.release_idle(now=11) == ["a"]
+    assert not admission.is_active("a")
+    assert admission.request("b", ["gpt"], now=11).admitted
+    # the idle session rejoins at the back of the queue
+    assert admission.request("a", ["gpt"], now=12).position == 1
+
+
+def test_stale_queue_places_are_dropped() -> None:
+    admission = controller(max_active_episodes=1)
+    admission.request("a", ["gpt"], now=0)
+    admission.request("b", ["gpt"], now=0)
+    assert admission.request("c", ["gpt"], now=QUEUE_STALE_SECONDS).position == 2
+    # "b" stopped polling
+    assert admission.request("c", ["gpt"], now=QUEUE_STALE_SECONDS + 1).position == 1
+
+
+def test_release_frees_slot_and_queue_place() -> None:
+    admission = controller(max_active_episodes=1)
+    admission.request("a", ["gpt"], now=0)
+    admission.request("b", ["gpt"], now=0)
+    admission.release("b", now=1)
+    admission.release("a", now=1)
+    assert admission.stats()["active"] == 0
+    assert admission.stats()["queued"] == 0
+    # releasing twice is harmless
+    admission.release("a", now=2)
+
+
+def test_closed_sessions_release_their_slot() -> None:
+    admission = controller(max_active_episodes=1)
+    registry = SessionRegistry()
+    registry.add_close_hook(admission.release)
+    registry.heartbeat("a", create=True)
+    admission.request("a", ["gpt"], now=0)
+    registry.close_session("a")
+    assert not admission.is_active("a")
+    registry.shutdown()
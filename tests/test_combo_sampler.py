@@ -0,0 +1,22 @@
+import random
+from collections import Counter
+
+import pytest
+
+from socialstream.combo_sampler import sample_distinct_pair
+
+
+def test_distinct_pair_is_distinct_and_uniform() -> None:
+    rng = random.Random(3)
+    n, draws = 4, 120_000
+    counts = Counter(sample_distinct_pair(n, rng) for _ in range(draws))
+    assert all(first != second for first, second in counts)
+    # every ordered pair of distinct indices is equally likely
+    assert len(counts) == n * (n - 1)
+    for count in counts.values():
+        assert count / draws == pytest.approx(1 / (n * (n - 1)), abs=0.01)
+
+
+def test_distinct_pair_needs_two_items() -> None:
+    with pytest.raises(ValueError):
+        sample_distinct_pair(1)
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from socialstream.evaluation import (
+    OVERALL,
+    EpisodeEvaluation,
+    EvaluationCache,
+    parse_evaluation,
+    reward_scores,
+)
+
+REASONING = (
+    "Both agents were polite.\n"
+    "Agent 1 comments:\n"
+    "believability: Acts like a real person.\n"
+    "goal: Got the loan,\n"
+    "but only half of it.\n"
+    "Agent 2 comments:\n"
+    "believability: Sounds scripted.\n"
+    "goal: Kept the money.\n"
+)
+REWARDS = [
+    (3.5, {"believability": 8.0, "goal": 6.0}),
+    (2.0, {"believability": 4.0, "goal": 9.0}),
+]
+
+
+def test_parses_general_comment_scores_and_comments() -> None:
+    evaluation = parse_evaluation(REASONING, REWARDS)
+    assert evaluation.general_comment == "Both agents were polite."
+    first, second = evaluation.agents
+    assert first.overall == 3.5
+    assert first.dimensions["believability"].score == 8.0
+    assert first.dimensions["believability"].comment == "Acts like a real person."
+    # a comment that runs over several lines
+    assert first.dimensions["goal"].comment == "Got the loan,\nbut only half of it."
+    assert second.dimensions["goal"].score == 9.0
+    assert second.dimensions["believability"].comment == "Sounds scripted."
+
+
+def test_scores_include_overall() -> None:
+    agent = parse_evaluation(REASONING, REWARDS).agents[0]
+    assert agent.scores() == {OVERALL: 3.5, "believability": 8.0, "goal": 6.0}
+
+
+def test_comment_without_a_score_is_kept() -> None:
+    reasoning = "Fine.\nAgent 1 comments:\nrelationship: Got closer.\n"
+    agent = parse_evaluation(reasoning, [1.0]).agents[0]
+    assert agent.overall == 1.0
+    assert agent.dimensions["relationship"].score is None
+    assert agent.dimensions["relationship"].comment == "Got closer."
+    assert agent.scores() == {OVERALL: 1.0}
+
+
+def test_missing_agent_block_leaves_comments_empty() -> None:
+    evaluation = parse_evaluation("Short episode.", REWARDS)
+    assert [agent.overall for agent in evaluation.agents] == [3.5, 2.0]
+    assert evaluation.agents[1].dimensions["goal"].comment == ""
+
+
+def test_empty_reasoning_is_an_empty_evaluation() -> None:
+    assert parse_evaluation("", REWARDS) == EpisodeEvaluation()
+    assert parse_evaluation("\n", [0.0, 0.0]) == EpisodeEvaluation()
+
+
+def test_reward_scores() -> None:
+    assert reward_scores(None) == (None, {})
+    assert reward_scores(2) == (2.0, {})
+    assert reward_scores((1, {"goal": 3})) == (1.0, {"goal": 3.0})
+
+
+def test_dict_round_trip() -> None:
+    evaluation = parse_evaluation(REASONING, REWARDS)
+    assert EpisodeEvaluation.from_dict(evaluation.to_dict()) == evaluation
+
+
+def test_cache_parses_each_episode_once() -> None:
+    cache = EvaluationCache(max_size=1)
+    episode = SimpleNamespace(pk="a", reasoning=REASONING, rewards=REWARDS)
+    first = cache.get(episode)
+    assert cache.get(episode) is first
+    cache.get(SimpleNamespace(pk="b", reasoning=REASONING, rewards=REWARDS))
+    # "a" was evicted, so it is parsed again
+    assert cache.get(episode) is not first
@@ -0,0 +1,96 @@
+from sotopia.messages import AgentAction, Observation, SimpleMessage
+
+from socialstream.message_store import KEYFRAME_INTERVAL, ConversationStore
+
+ACTIONS = ["none", "speak", "non-verbal communication", "action", "leave"]
+BACKGROUND = "Here is the context of this interaction: " + "lorem ipsum " * 20
+
+
+def observation(text: str, turn_number: int) -> Observation:
+    return Observation(
+        last_turn=text, turn_number=turn_number, available_actions=ACTIONS
+    )
+
+
+def conversation(turns: int) -> list[list[tuple[str, str, object]]]:
+    """Observations that repeat and extend the history, as the environment sends."""
+    history = BACKGROUND
+    result = []
+    for turn_number in range(turns):
+        step: list[tuple[str, str, object]] = [
+            ("Environment", name, observation(history, turn_number))
+            for name in ("Jane Doe", "John Smith")
+        ]
+        utterance = f"message number {turn_number}"
+        step.append(
+            (
+                "Jane Doe",
+                "Environment",
+                AgentAction(action_type="speak", argument=utterance),
+            )
+        )
+        step.append(
+            ("John Smith", "Environment", AgentAction(action_type="none", argument=""))
+        )
+        result.append(step)
+        history += f'\nTurn #{turn_number}: Jane Doe said: "{utterance}"'
+    return result
+
+
+def test_round_trip() -> None:
+    turns = conversation(3 * KEYFRAME_INTERVAL)
+    store = ConversationStore(turns)
+    assert len(store) == len(turns)
+    assert list(store) == turns
+
+
+def test_indexing_matches_iteration() -> None:
+    turns = conversation(KEYFRAME_INTERVAL + 5)
+    store = ConversationStore(turns)
+    for idx in (0, 1, KEYFRAME_INTERVAL, -1):
+        assert store[idx] == turns[idx]
+
+
+def test_observations_are_delta_encoded() -> None:
+    store = ConversationStore(conversation(4))
+    records = [record for turn in store._turns for record in turn]
+    observations = [record for record in records if record.kind is Observation]
+    # the second agent's copy of the first observation shares all of it
+    assert observations[1].base is observations[0]
+    assert observations[1].tail == ""
+    assert all(len(record.tail) < 100 for record in observations[1:])
+
+
+def test_keyframes_bound_the_delta_chain() -> None:
+    store = ConversationStore(conversation(2 * KEYFRAME_INTERVAL))
+    for turn in store._turns:
+        for record in turn:
+            depth = 0
+            while record.base is not None:
+                record, depth = record.base, depth + 1
+            assert depth <= KEYFRAME_INTERVAL
+
+
+def test_append_to_last_turn() -> None:
+    store = ConversationStore()
+    store.append([])
+    action = AgentAction(action_type="speak", argument="hi")
+    store.append_to_last_turn("Jane Doe", "Environment", action)
+    assert store[-1] == [("Jane Doe", "Environment", action)]
+
+
+def test_other_messages_and_short_texts_are_kept_whole() -> None:
+    turns = [
+        [("Environment", "Jane Doe", observation("short", 0))],
+        [("Environment", "Jane Doe", observation("short and then some", 1))],
+        [("Jane Doe", "Environment", SimpleMessage(message="hello"))],
+    ]
+    store = ConversationStore(turns)
+    assert list(store) == turns
+    assert all(record.base is None for turn in store._turns for record in turn)
+
+
+def test_rebuilt_messages_are_independent() -> None:
+    store = ConversationStore(conversation(1))
+    store[0][0][2].available_actions.append("extra")
+    assert store[0][0][2].available_actions == ACTIONS
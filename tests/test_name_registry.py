@@ -0,0 +1,84 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from socialstream.name_registry import NameRegistry, get_shared_registry
+
+
+class Profile(BaseModel):
+    pk: Optional[str] = None
+    first_name: str
+    last_name: str
+    age: int = 0
+
+
+def test_duplicates_get_numbered_suffixes() -> None:
+    registry = NameRegistry()
+    names = [
+        registry.name_for(Profile(pk=str(i), first_name="Jane", last_name="Doe"))
+        for i in range(3)
+    ]
+    assert names == ["Jane Doe", "Jane Doe_2", "Jane Doe_3"]
+
+
+def test_name_for_is_idempotent() -> None:
+    registry = NameRegistry()
+    profile = Profile(pk="a", first_name="Jane", last_name="Doe")
+    assert registry.name_for(profile) == registry.name_for(profile) == "Jane Doe"
+    assert len(registry) == 1
+
+
+def test_suffix_does_not_collide_with_a_literal_name() -> None:
+    registry = NameRegistry()
+    registry.name_for(Profile(pk="a", first_name="Jane", last_name="Doe_2"))
+    registry.name_for(Profile(pk="b", first_name="Jane", last_name="Doe"))
+    assert registry.name_for(Profile(pk="c", first_name="Jane", last_name="Doe")) == (
+        "Jane Doe_3"
+    )
+
+
+def test_from_profiles_ignores_input_order() -> None:
+    profiles = [
+        Profile(pk=f"pk{i}", first_name="Jane", last_name="Doe", age=i)
+        for i in range(5)
+    ]
+    forward = NameRegistry.from_profiles(profiles)
+    backward = NameRegistry.from_profiles(reversed(profiles))
+    assert all(forward.get(p.pk) == backward.get(p.pk) for p in profiles)
+
+
+def test_from_profiles_does_not_depend_on_random_pks() -> None:
+    # data/ profiles get a fresh pk on every start
+    first = NameRegistry.from_profiles(
+        [
+            Profile(pk="zz", first_name="Jane", last_name="Doe", age=30),
+            Profile(pk="aa", first_name="Jane", last_name="Doe", age=40),
+        ]
+    )
+    second = NameRegistry.from_profiles(
+        [
+            Profile(pk="aa", first_name="Jane", last_name="Doe", age=30),
+            Profile(pk="zz", first_name="Jane", last_name="Doe", age=40),
+        ]
+    )
+    assert first.get("zz") == second.get("aa")
+    assert first.get("aa") == second.get("zz")
+
+
+def test_overlay_names_do_not_leak_into_the_parent() -> None:
+    parent = NameRegistry.from_profiles(
+        [Profile(pk="a", first_name="Jane", last_name="Doe")]
+    )
+    overlay = NameRegistry(parent=parent)
+    assert overlay.get("a") == "Jane Doe"
+    assert (
+        overlay.name_for(Profile(pk="b", first_name="Jane", last_name="Doe"))
+        == "Jane Doe_2"
+    )
+    assert "b" not in parent
+    assert len(overlay) == 2
+
+
+def test_shared_registry_is_reused_per_catalog() -> None:
+    profiles = [Profile(pk="shared", first_name="Jane", last_name="Doe")]
+    assert get_shared_registry(profiles) is get_shared_registry(list(profiles))
@@ -0,0 +1,47 @@
+import io
+import json
+from typing import Any
+
+import pytest
+
+from socialstream.profile_source import iter_json_array
+
+DOCUMENTS: list[Any] = [
+    [],
+    [1, 2.5, -3e10, True, False, None],
+    ["a", "with, comma", 'quote " and ] bracket', "ünïcödé"],
+    [{"first_name": "Jane", "tags": ["a", "b"]}, {"nested": {"x": [1, {"y": 2}]}}],
+    [123456789012345678901234567890, [[]], {}],
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64 * 1024])
+def test_matches_json_load(document: list[Any], chunk_size: int) -> None:
+    f = io.StringIO(json.dumps(document, indent=2))
+    assert list(iter_json_array(f, chunk_size=chunk_size)) == document
+
+
+def test_numbers_split_across_chunks() -> None:
+    # every chunk boundary falls inside a number at some point
+    f = io.StringIO("[" + ",".join(str(10**i) for i in range(20)) + "]")
+    assert list(iter_json_array(f, chunk_size=3)) == [10**i for i in range(20)]
+
+
+def test_large_element_with_small_chunks() -> None:
+    element = {"text": "x" * 100_000}
+    f = io.StringIO(json.dumps([element, element]))
+    assert list(iter_json_array(f, chunk_size=16)) == [element, element]
+
+
+def test_is_lazy() -> None:
+    f = io.StringIO('[{"a": 1}, {"b": 2}, ' + " " * 1_000_000 + "]")
+    items = iter_json_array(f, chunk_size=64)
+    assert next(items) == {"a": 1}
+    assert f.tell() < 1_000
+
+
+@pytest.mark.parametrize("text", ['{"a": 1}', "", "[1, 2", '[{"a": ]'])
+def test_rejects_malformed_input(text: str) -> None:
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size=4))
@@ -0,0 +1,57 @@
+from socialstream.search_index import SearchIndex, get_codename_index
+
+ENTRIES = [
+    ("Jane Doe", "Jane Doe nurse"),
+    ("John Smith", "John Smith software engineer"),
+    ("Ann Janeway", "Ann Janeway captain"),
+    ("Bob Stone", "Bob Stone engineer"),
+]
+
+
+def test_empty_query_returns_catalog_order() -> None:
+    index = SearchIndex(ENTRIES)
+    assert index.search("") == [key for key, _ in ENTRIES]
+    assert index.search("  ", k=2) == ["Jane Doe", "John Smith"]
+
+
+def test_short_query_matches_word_prefixes() -> None:
+    index = SearchIndex(ENTRIES)
+    assert index.search("ja") == ["Jane Doe", "Ann Janeway"]
+    assert index.search("Jo") == ["John Smith"]
+    # "an" starts "ann" but is only inside "jane" and "janeway"
+    assert index.search("an") == ["Ann Janeway"]
+
+
+def test_trigram_query_matches_substrings() -> None:
+    index = SearchIndex(ENTRIES)
+    assert index.search("ngineer") == ["John Smith", "Bob Stone"]
+    assert index.search("neway") == ["Ann Janeway"]
+    assert index.search("xyz") == []
+
+
+def test_trigram_candidates_are_confirmed() -> None:
+    # shares every trigram of "abcab" but does not contain it
+    index = SearchIndex([("a", "abcxbca cab")])
+    assert index.search("abcab") == []
+
+
+def test_ranks_key_prefix_then_word_prefix_then_substring() -> None:
+    index = SearchIndex(
+        [
+            ("substring", "reengineered"),
+            ("word", "senior engineer"),
+            ("prefix", "engineer"),
+        ]
+    )
+    assert index.search("engineer") == ["prefix", "word", "substring"]
+
+
+def test_search_limits_results() -> None:
+    index = SearchIndex((f"agent {i}", f"agent {i}") for i in range(100))
+    assert index.search("agent", k=3) == ["agent 0", "agent 1", "agent 2"]
+    assert len(index) == 100
+
+
+def test_codename_index_is_shared() -> None:
+    codenames = ["borrow_money", "lend_book"]
+    assert get_codename_index(codenames) is get_codename_index(list(codenames))